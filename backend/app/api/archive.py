@@ -0,0 +1,59 @@
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query
+from app.services import partitions
+
+router = APIRouter()
+
+# Read-only access to months moved out of the database by retention
+# (scripts/maintain_partitions.py). Filters and column lists are pushed down to
+# the Parquet files, so a query reads only the months and columns it needs.
+GROUP_COLUMNS = {"location", "category", "priority", "status"}
+
+def _columns(value, allowed):
+    if not value:
+        return None
+    columns = [c.strip() for c in value.split(",") if c.strip()]
+    unknown = [c for c in columns if c not in allowed]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown column(s): {', '.join(unknown)}")
+    return columns
+
+@router.get("/archive/months")
+def list_archived_months():
+    """Archived months with row counts and file sizes."""
+    return {"months": sorted(partitions.read_manifest().values(), key=lambda info: info["month"])}
+
+@router.get("/archive/incidents")
+def get_archived_incidents(
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    location: Optional[str] = None,
+    category: Optional[str] = None,
+    priority: Optional[str] = None,
+    status: Optional[str] = None,
+    columns: Optional[str] = None,
+    limit: int = Query(1000, ge=1, le=10000),
+):
+    """Archived incidents matching the filters; `columns` is a comma-separated projection."""
+    items, truncated = partitions.query_archive(
+        since, until, _columns(columns, partitions.ARCHIVE_COLUMNS), limit,
+        location=location, category=category, priority=priority, status=status,
+    )
+    return {"count": len(items), "truncated": truncated, "items": items}
+
+@router.get("/archive/counts")
+def get_archived_counts(
+    group_by: str = "location,category",
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    location: Optional[str] = None,
+    category: Optional[str] = None,
+    priority: Optional[str] = None,
+):
+    """Incident counts over archived months, grouped by any of location, category, priority, status."""
+    columns = _columns(group_by, GROUP_COLUMNS)
+    if not columns:
+        raise HTTPException(status_code=400, detail="group_by is required")
+    groups = partitions.count_archive(columns, since, until, location=location, category=category, priority=priority)
+    return {"group_by": columns, "groups": groups}
@@ -1,31 +1,173 @@
-import time
 import random
-from fastapi import APIRouter, Depends, HTTPException
+import base64
+from datetime import datetime, timezone
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import func, insert, literal, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.core.database import engine, get_db, Base
-from app.models import Location, Incident
-from app.schemas.insights import IncidentCreate
+from app.core.config import settings
+from app.core.database import get_db, get_async_db
+from app.core.responses import negotiated
+from app.models import Incident, IncidentReport
+from app.api.ingest import queue_report
+from app.schemas.insights import IncidentCreate, IncidentBatchCreate, IncidentUpdate, IncidentPage, IngestAccepted, PredictResponse, PredictBatchResponse
 from app.services.nlp.predictor import predictor
+from app.services.nlp.batcher import prediction_service
+from app.services.stream import hub
+from app.services.locations import DEFAULT_GEO_TARGET, location_index
+from app.services.routing import road_graph
+from app.services import rollups
+from app.services.dedup import content_words, event_index, family_categories
+from app.services.metrics import StageTimer
 
 router = APIRouter()
 
-# Create Tables
-Base.metadata.create_all(bind=engine)
+# Tables are created by app/services/migrations.py (once per deploy, not on import)
+
+# Columns sent in incident lists ('text' only on request, it is the heaviest column).
+# Selected as plain tuples (no ORM entities) and named like IncidentResponse fields.
+INCIDENT_LIST_COLUMNS = [Incident.id, Incident.location, Incident.category, Incident.priority, Incident.status, Incident.timestamp, Incident.lat, Incident.lng, Incident.report_count]
+
+def _encode_cursor(timestamp, incident_id):
+    raw = f"{timestamp.isoformat()}|{incident_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def _decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        ts, incident_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(ts), int(incident_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
 @router.get("/locations")
-def get_locations(db: Session = Depends(get_db)):
-    return db.query(Location).all()
+async def get_locations(request: Request, db: AsyncSession = Depends(get_async_db)):
+    # Served from the in-memory gazetteer; browsers revalidate with If-None-Match
+    await location_index.refresh_async(db)
+    headers = {"ETag": location_index.etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == location_index.etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=location_index.body, media_type="application/json", headers=headers)
+
+@router.get("/incidents", response_model=IncidentPage)
+async def get_incidents(
+    request: Request,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    priority: Optional[str] = None,
+    category: Optional[str] = None,
+    location: Optional[str] = None,
+    status: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    include_text: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Newest-first page of incidents. Pass 'next_cursor' back as 'cursor' for the next page."""
+    columns = INCIDENT_LIST_COLUMNS + ([Incident.text] if include_text else [])
+    stmt = select(*columns)
+
+    # 1. FILTERS
+    if priority: stmt = stmt.where(Incident.priority == priority)
+    if category: stmt = stmt.where(Incident.category == category)
+    if location: stmt = stmt.where(Incident.location == location)
+    if status: stmt = stmt.where(Incident.status == status)
+    if since: stmt = stmt.where(Incident.timestamp >= since)
+    if until: stmt = stmt.where(Incident.timestamp < until)
+
+    # 2. KEYSET (seek past the last row of the previous page, no OFFSET)
+    if cursor:
+        ts, incident_id = _decode_cursor(cursor)
+        # Bound with the column types: an untyped datetime is compared as a differently
+        # formatted string on SQLite and the walk never advances
+        stmt = stmt.where(tuple_(Incident.timestamp, Incident.id) < tuple_(literal(ts, Incident.timestamp.type), literal(incident_id, Incident.id.type)))
+
+    # Fetch one extra row to know whether another page exists
+    stmt = stmt.order_by(Incident.timestamp.desc(), Incident.id.desc()).limit(limit + 1)
+    rows = (await db.execute(stmt)).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode_cursor(rows[-1].timestamp, rows[-1].id)
+
+    return negotiated(request, {"items": [row._asdict() for row in rows], "next_cursor": next_cursor})
+
+@router.patch("/incidents/{incident_id}")
+async def update_incident(incident_id: int, payload: IncidentUpdate, db: AsyncSession = Depends(get_async_db)):
+    """Dispatcher review: change status and/or correct the category. Reviewed rows become training labels."""
+    incident = await db.get(Incident, incident_id)
+    if incident is None:
+        raise HTTPException(status_code=404, detail="Incident not found")
+
+    was_open = incident.status == "Open"
+    if payload.status is not None:
+        incident.status = payload.status
+    if payload.category is not None and payload.category != incident.category:
+        # Move the report to its corrected category in the dashboard rollups too
+        await rollups.record_async(db, [(incident.timestamp, incident.location, incident.category, incident.priority)], sign=-1)
+        await rollups.record_async(db, [(incident.timestamp, incident.location, payload.category, incident.priority)])
+        incident.category = payload.category
+    incident.confirmed_at = datetime.now(timezone.utc)
+    await db.commit()
+
+    # Closed or re-categorised: new reports start a new event instead of merging
+    if incident.status != "Open" or payload.category is not None:
+        event_index.remove(incident.id)
+
+    # Reroute weights follow open incidents only
+    is_open = incident.status == "Open"
+    if was_open and not is_open:
+        road_graph.incident_closed(incident.location, incident.priority)
+    elif is_open and not was_open:
+        road_graph.incident_opened(incident.location, incident.priority)
+    return {"id": incident.id, "status": incident.status, "category": incident.category}
+
+@router.get("/incidents/{incident_id}/reports")
+async def get_incident_reports(incident_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Every report of the incident, oldest first: its own text, then the duplicates merged into it."""
+    first = (await db.execute(
+        select(Incident.text, Incident.timestamp.label("reported_at")).where(Incident.id == incident_id)
+    )).first()
+    if first is None:
+        raise HTTPException(status_code=404, detail="Incident not found")
+    rows = (await db.execute(
+        select(IncidentReport.id, IncidentReport.text, IncidentReport.reported_at)
+        .where(IncidentReport.incident_id == incident_id)
+        .order_by(IncidentReport.id)
+    )).all()
+    # The incident's own report has no incident_reports row, hence no id
+    reports = [{"id": None, **first._asdict()}] + [row._asdict() for row in rows]
+    return {"incident_id": incident_id, "reports": reports}
+
+@router.get("/predictor/stats")
+def get_predictor_stats():
+    # Batch sizes & queue waits, used to tune PREDICT_MICROBATCH_WINDOW_MS / _SIZE
+    return {
+        "enabled": prediction_service.enabled,
+        "window_ms": prediction_service.window * 1000,
+        "max_batch": prediction_service.max_batch,
+        "processes": prediction_service.processes,
+        "model_version": predictor.model_version,
+        **prediction_service.stats.snapshot(),
+        "cache": predictor.cache.stats(),
+        "dedup": event_index.snapshot(),
+    }
 
-@router.get("/incidents")
-def get_incidents(db: Session = Depends(get_db)):
-    return db.query(Incident).order_by(Incident.timestamp.desc()).all()
+@router.post("/predict", response_model=PredictResponse, responses={202: {"model": IngestAccepted}})
+async def predict_log(payload: IncidentCreate, request: Request, timings: bool = False, db: AsyncSession = Depends(get_async_db)):
+    # 0. QUEUED MODE: durable append, 202 + ticket now; a background consumer stores it (see /ingest)
+    if settings.PREDICT_MODE == "queue":
+        return await queue_report(payload, request)
 
-@router.post("/predict") # REMOVED strict response_model to allow flexible debug data
-def predict_log(payload: IncidentCreate, db: Session = Depends(get_db)):
-    start_time = time.time()
+    # Per-stage clock -> /metrics histograms (and nlp_debug["stages_ms"] with ?timings=true)
+    timer = StageTimer("predict")
     
-    # 1. AI PREDICTION
-    ai_result = predictor.predict(payload.raw_text)
+    # 1. AI PREDICTION (micro-batched with concurrent requests, off the event loop)
+    # ("prediction" spans the await; queue_wait / inference / keyword are its parts)
+    with timer.stage("prediction"):
+        ai_result = await prediction_service.predict(payload.raw_text, timer)
     
     # 2. GENERATE DEBUG INFO (The "Broken Tokens" logic happens here in Python)
     # Simple logic to identify "Hinglish" vs English words for display
@@ -37,42 +179,193 @@ def predict_log(payload: IncidentCreate, db: Session = Depends(get_db)):
         "entities": entities[:3], # Show first 3 entities
         "sentiment": ai_result.get("sentiment_score", "Neutral"),
         "intent": ai_result.get("category", "General") + "_Detection",
+        "location_confidence": ai_result.get("location_confidence", 0.0),
         "processing_time": 0
     }
 
-    # 3. CREATE DB RECORD
-    new_incident = Incident(
-        text=payload.raw_text,
-        location=ai_result["location"],
-        category=ai_result["category"],
-        priority=ai_result["priority"],
-        status="Open"
-    )
-    
-    db.add(new_incident)
-    db.commit()
-    db.refresh(new_incident)
+    # 3. COORDINATE LOGIC (in-memory gazetteer; unknown places keep a NULL point)
+    loc = None
+    if ai_result["location"] != "Unknown":
+        with timer.stage("location_lookup"):
+            await location_index.refresh_async(db)
+            loc = location_index.get(ai_result["location"])
+    geo_target = [loc[0], loc[1]] if loc else list(DEFAULT_GEO_TARGET)
 
-    # 4. COORDINATE LOGIC
-    geo_target = [30.9010, 75.8573]
-    if new_incident.location != "Unknown":
-        loc_obj = db.query(Location).filter(Location.name == new_incident.location).first()
-        if loc_obj:
-            geo_target = [loc_obj.lat, loc_obj.lng]
+    # 4. DUPLICATE CHECK (same place + category family + similar text within the window -> one event)
+    fingerprint, merged = None, None
+    if settings.DEDUP_WINDOW_MINUTES > 0 and ai_result["location"] != "Unknown":
+        with timer.stage("dedup_match"):
+            fingerprint = content_words(payload.raw_text)
+            match = event_index.match(ai_result["location"], ai_result["category"], fingerprint)
+        if match:
+            # The WHERE re-checks the row: another worker may have closed or re-categorised it
+            with timer.stage("db_update"):
+                merged = (await db.execute(
+                    update(Incident)
+                    .where(
+                        Incident.id == match[0],
+                        Incident.status == "Open",
+                        Incident.location == ai_result["location"],
+                        Incident.category.in_(family_categories(ai_result["category"])),
+                    )
+                    .values(report_count=Incident.report_count + 1, last_reported_at=func.now())
+                    .returning(*INCIDENT_LIST_COLUMNS, Incident.text)
+                    .execution_options(synchronize_session=False)
+                )).first()
+            if merged is None:
+                event_index.remove(match[0])
+            else:
+                # The incident keeps its first text; this driver's words are kept with it
+                with timer.stage("db_insert"):
+                    await db.execute(insert(IncidentReport).values(incident_id=merged.id, text=payload.raw_text))
+                with timer.stage("db_commit"):
+                    await db.commit()
+                event_index.touch(merged.id, merged.report_count)
 
-    process_time = round((time.time() - start_time) * 1000, 2)
-    debug_info["processing_time"] = f"{process_time}ms"
+    # 5. CREATE DB RECORD (unless the report joined an open event)
+    if merged is None:
+        new_incident = Incident(
+            text=payload.raw_text,
+            location=ai_result["location"],
+            category=ai_result["category"],
+            priority=ai_result["priority"],
+            status="Open",
+            lat=loc[0] if loc else None,
+            lng=loc[1] if loc else None,
+            report_count=1,
+        )
 
-    # 5. RETURN EVERYTHING
-    return {
-        "incident": {
+        with timer.stage("db_insert"):
+            db.add(new_incident)
+            await db.flush()
+        with timer.stage("db_refresh"):
+            await db.refresh(new_incident)
+
+        # Dashboard rollups move in the same transaction as the insert
+        with timer.stage("db_rollups"):
+            await rollups.record_async(db, [(new_incident.timestamp, new_incident.location, new_incident.category, new_incident.priority)])
+        with timer.stage("db_commit"):
+            await db.commit()
+        with timer.stage("road_graph"):
+            road_graph.incident_opened(new_incident.location, new_incident.priority)
+        if fingerprint is not None:
+            event_index.add(new_incident.id, new_incident.location, new_incident.category, fingerprint)
+
+        incident = {
             "id": new_incident.id,
             "text": new_incident.text,
             "location": new_incident.location,
             "category": new_incident.category,
             "priority": new_incident.priority,
+            "status": new_incident.status,
             "timestamp": new_incident.timestamp,
-        },
-        "geo_target": geo_target,
-        "nlp_debug": debug_info # <--- The real backend data
-    }
\ No newline at end of file
+            "lat": new_incident.lat,
+            "lng": new_incident.lng,
+            "report_count": 1,
+        }
+    else:
+        # Same event as before: the original text, priority and id, one more report
+        incident = merged._asdict()
+    incident["merged"] = merged is not None
+
+    # 6. PUSH TO LIVE DASHBOARDS (a merge re-sends the event's id with the new report_count)
+    with timer.stage("publish"):
+        hub.publish("incident", {"incident": incident, "geo_target": geo_target})
+
+    debug_info["processing_time"] = f"{round(timer.elapsed_ns() / 1e6, 2)}ms"
+    if timings or settings.PREDICT_DEBUG_TIMINGS:
+        # Serialization happens after this snapshot, so it only shows up in /metrics
+        debug_info["stages_ms"] = timer.breakdown()
+
+    # 7. RETURN EVERYTHING (encoded here so serialization gets its own stage)
+    with timer.stage("serialize"):
+        response = negotiated(request, {
+            "incident": incident,
+            "geo_target": geo_target,
+            "nlp_debug": debug_info # <--- The real backend data
+        })
+    timer.finish()
+    return response
+
+@router.post("/predict/batch", response_model=PredictBatchResponse)
+def predict_batch(payload: IncidentBatchCreate, request: Request, db: Session = Depends(get_db)):
+    timer = StageTimer("predict_batch")
+    texts = payload.raw_texts
+
+    if len(texts) > settings.PREDICT_BATCH_MAX:
+        raise HTTPException(status_code=413, detail=f"Batch too large (max {settings.PREDICT_BATCH_MAX} logs)")
+    if not texts:
+        return {"count": 0, "results": [], "processing_time": "0ms"}
+
+    # 1. AI PREDICTION (one vectorized model call for the whole batch)
+    ai_results = predictor.predict_batch(texts, timer.stages)
+
+    # 2. COORDINATE LOGIC (in-memory gazetteer, no DB round-trip)
+    coords = {}
+    with timer.stage("location_lookup"):
+        for name in {ai_result["location"] for ai_result in ai_results if ai_result["location"] != "Unknown"}:
+            loc = location_index.lookup(db, name)
+            if loc:
+                coords[name] = [loc[0], loc[1]]
+
+    # 3. BULK INSERT (single multi-row INSERT ... RETURNING, ids come back in input order)
+    rows = []
+    for text, ai_result in zip(texts, ai_results):
+        lat, lng = coords.get(ai_result["location"], (None, None))
+        rows.append({
+            "text": text,
+            "location": ai_result["location"],
+            "category": ai_result["category"],
+            "priority": ai_result["priority"],
+            "status": "Open",
+            "lat": lat,
+            "lng": lng,
+        })
+    with timer.stage("db_insert"):
+        inserted = db.execute(
+            insert(Incident).returning(Incident.id, Incident.timestamp, sort_by_parameter_order=True),
+            rows,
+        ).all()
+    with timer.stage("db_rollups"):
+        rollups.record(db, [
+            (timestamp, row["location"], row["category"], row["priority"])
+            for row, (_, timestamp) in zip(rows, inserted)
+        ])
+    with timer.stage("db_commit"):
+        db.commit()
+    with timer.stage("road_graph"):
+        for row in rows:
+            road_graph.incident_opened(row["location"], row["priority"])
+
+    # 4. BUILD RESULTS (same order as the input texts)
+    results = []
+    for row, (incident_id, timestamp) in zip(rows, inserted):
+        results.append({
+            "incident": {
+                "id": incident_id,
+                "text": row["text"],
+                "location": row["location"],
+                "category": row["category"],
+                "priority": row["priority"],
+                "status": row["status"],
+                "timestamp": timestamp,
+                "lat": row["lat"],
+                "lng": row["lng"],
+                "report_count": 1,
+                "merged": False,  # Bulk uploads always insert
+            },
+            "geo_target": coords.get(row["location"], list(DEFAULT_GEO_TARGET)),
+        })
+
+    # 5. PUSH TO LIVE DASHBOARDS (one event per incident, same as /predict)
+    with timer.stage("publish"):
+        for result in results:
+            hub.publish("incident", result)
+
+    process_time = round(timer.elapsed_ns() / 1e6, 2)
+    with timer.stage("serialize"):
+        response = negotiated(
+            request, {"count": len(results), "results": results, "processing_time": f"{process_time}ms"}
+        )
+    timer.finish()
+    return response
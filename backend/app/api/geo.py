@@ -0,0 +1,102 @@
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_async_db
+from app.core.responses import negotiated
+from app.models import Incident
+from app.services import spatial
+from app.services.locations import location_index
+
+router = APIRouter()
+
+# Map queries answered by the database (PostGIS GiST on Postgres), so the
+# frontend only downloads incidents it is about to draw.
+GEO_COLUMNS = [Incident.id, Incident.location, Incident.category, Incident.priority, Incident.status, Incident.timestamp, Incident.lat, Incident.lng]
+
+def _filter(stmt, priority, category, since):
+    if priority: stmt = stmt.where(Incident.priority == priority)
+    if category: stmt = stmt.where(Incident.category == category)
+    if since: stmt = stmt.where(Incident.timestamp >= since)
+    return stmt
+
+@router.get("/incidents/near")
+async def incidents_near(
+    request: Request,
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    radius_km: float = Query(5.0, gt=0, le=200),
+    limit: int = Query(200, ge=1, le=2000),
+    priority: Optional[str] = None,
+    category: Optional[str] = None,
+    since: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Incidents within radius_km of a point, closest first."""
+    dialect = db.get_bind().dialect.name
+    distance = spatial.distance_km(dialect, lat, lng)
+
+    stmt = _filter(select(*GEO_COLUMNS), priority, category, since)
+    stmt = stmt.where(spatial.within_radius(dialect, lat, lng, radius_km))
+
+    if distance is not None:
+        stmt = stmt.add_columns(distance.label("distance_km")).order_by(distance).limit(limit)
+        items = [row._asdict() for row in (await db.execute(stmt)).all()]
+    else:
+        # Local stand-in: box prefilter in SQL, exact circle + ordering here
+        items = []
+        for row in (await db.execute(stmt)).all():
+            item = row._asdict()
+            item["distance_km"] = spatial.haversine_km(lat, lng, row.lat, row.lng)
+            if item["distance_km"] <= radius_km:
+                items.append(item)
+        items = sorted(items, key=lambda item: item["distance_km"])[:limit]
+
+    for item in items:
+        item["distance_km"] = round(item["distance_km"], 3)
+    return negotiated(request, {"center": [lat, lng], "radius_km": radius_km, "count": len(items), "items": items})
+
+@router.get("/incidents/bbox")
+async def incidents_in_bbox(
+    request: Request,
+    min_lat: float = Query(..., ge=-90, le=90),
+    min_lng: float = Query(..., ge=-180, le=180),
+    max_lat: float = Query(..., ge=-90, le=90),
+    max_lng: float = Query(..., ge=-180, le=180),
+    limit: int = Query(500, ge=1, le=5000),
+    priority: Optional[str] = None,
+    category: Optional[str] = None,
+    since: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Newest incidents inside the map viewport (south-west / north-east corners)."""
+    if min_lat > max_lat or min_lng > max_lng:
+        raise HTTPException(status_code=400, detail="Expected min_lat <= max_lat and min_lng <= max_lng")
+
+    dialect = db.get_bind().dialect.name
+    stmt = _filter(select(*GEO_COLUMNS), priority, category, since)
+    stmt = stmt.where(spatial.within_bbox(dialect, min_lat, min_lng, max_lat, max_lng))
+    stmt = stmt.order_by(Incident.timestamp.desc(), Incident.id.desc()).limit(limit + 1)
+    rows = (await db.execute(stmt)).all()
+
+    return negotiated(request, {
+        "bbox": [min_lat, min_lng, max_lat, max_lng],
+        "count": min(len(rows), limit),
+        "truncated": len(rows) > limit,
+        "items": [row._asdict() for row in rows[:limit]],
+    })
+
+@router.get("/locations/nearest")
+async def nearest_location(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    type: str = "Hub,Mandi",
+    k: int = Query(1, ge=1, le=50),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Closest gazetteer nodes to a point (default: hubs and mandis)."""
+    # ~26 nodes already sit in memory; scanning them beats a DB round-trip
+    await location_index.refresh_async(db)
+    types = {t.strip() for t in type.split(",") if t.strip()}
+    return {"point": [lat, lng], "items": location_index.nearest(lat, lng, types, k)}
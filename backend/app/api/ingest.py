@@ -0,0 +1,64 @@
+from datetime import datetime, timezone
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.database import get_async_db
+from app.core.responses import negotiated
+from app.models import Incident
+from app.schemas.insights import IncidentCreate, IncidentBatchCreate, IngestAccepted, IngestBatchAccepted, IngestStatus
+from app.services.ingest_queue import INCIDENT_COLUMNS, ingest_service
+from app.services.locations import DEFAULT_GEO_TARGET
+
+router = APIRouter()
+
+# Fire-and-forget intake (SMS gateway, bulk relays): the report is on local disk when
+# the 202 goes out, and background consumers classify + store it (app/services/ingest_queue.py).
+# The ticket resolves to the incident once stored; the dashboards get it over /stream as usual.
+
+async def _submit(texts):
+    try:
+        return await ingest_service.submit(texts)
+    except Exception as e:
+        # Nothing was queued, the client must retry
+        raise HTTPException(status_code=503, detail=f"Ingest queue unavailable: {e}")
+
+async def queue_report(payload, request):
+    """Queues one report and answers 202 with its ticket (also /predict with PREDICT_MODE=queue)."""
+    ticket, = await _submit([payload.raw_text])
+    return negotiated(request, {
+        "ticket": ticket,
+        "status": "queued",
+        "status_url": str(request.url_for("get_ingest_status", ticket=ticket)),
+    }, status_code=202)
+
+@router.post("/ingest", status_code=202, response_model=IngestAccepted)
+async def ingest_report(payload: IncidentCreate, request: Request):
+    return await queue_report(payload, request)
+
+@router.post("/ingest/batch", status_code=202, response_model=IngestBatchAccepted)
+async def ingest_batch(payload: IncidentBatchCreate, request: Request):
+    if len(payload.raw_texts) > settings.PREDICT_BATCH_MAX:
+        raise HTTPException(status_code=413, detail=f"Batch too large (max {settings.PREDICT_BATCH_MAX} logs)")
+    tickets = await _submit(payload.raw_texts) if payload.raw_texts else []
+    return negotiated(request, {"count": len(tickets), "tickets": tickets}, status_code=202)
+
+@router.get("/ingest/stats")
+async def get_ingest_stats():
+    """Queue depth by state, age of the oldest pending report, and this worker's counters."""
+    return await ingest_service.snapshot()
+
+@router.get("/ingest/{ticket}", response_model=IngestStatus)
+async def get_ingest_status(ticket: str, request: Request, db: AsyncSession = Depends(get_async_db)):
+    status = await ingest_service.status(ticket)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Unknown ticket (never queued, or finished long ago)")
+
+    incident_id, merged = status.pop("incident_id"), bool(status.pop("merged"))
+    status["received_at"] = datetime.fromtimestamp(status["received_at"], timezone.utc)
+    if status["status"] == "done":
+        row = (await db.execute(select(*INCIDENT_COLUMNS).where(Incident.id == incident_id))).first()
+        if row is not None:
+            status["incident"] = {**row._asdict(), "merged": merged}
+            status["geo_target"] = [row.lat, row.lng] if row.lat is not None else list(DEFAULT_GEO_TARGET)
+    return negotiated(request, status)
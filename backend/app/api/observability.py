@@ -0,0 +1,89 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import ORJSONResponse, PlainTextResponse
+from app.schemas.insights import ProfilerToggle
+from app.services.dedup import event_index
+from app.services.ingest_queue import ingest_service
+from app.services.metrics import registry
+from app.services.nlp.batcher import prediction_service
+from app.services.nlp.predictor import predictor
+from app.services.profiler import profiler
+from app.services.readiness import readiness
+from app.services import workers
+
+router = APIRouter()
+
+# Per-process numbers: with several uvicorn workers, scrape each worker (or
+# aggregate in Prometheus); the process pool's inference time is reported back
+# to the worker that sent the batch.
+
+def _service_counters():
+    cache = predictor.cache.stats()
+    batches = prediction_service.stats
+    dedup = event_index.stats
+    ingest = ingest_service.stats
+    # Counted by the ingest consumers every few seconds; None (no samples) until the
+    # queue file exists, so a scrape never opens or creates it
+    queue = ingest_service.depth
+    return [
+        ("rlis_prediction_cache_total", "counter", "Prediction cache lookups.",
+         {("hit",): cache["hits"], ("miss",): cache["misses"]}, ("result",)),
+        ("rlis_prediction_cache_entries", "gauge", "Entries in the prediction cache.",
+         {(): cache["size"]}, ()),
+        ("rlis_microbatch_batches_total", "counter", "Micro-batches run by the predictor.",
+         {(): batches.batches}, ()),
+        ("rlis_microbatch_items_total", "counter", "Texts classified through micro-batches.",
+         {(): batches.items}, ()),
+        ("rlis_microbatch_errors_total", "counter", "Micro-batches that raised.",
+         {(): batches.errors}, ()),
+        ("rlis_dedup_lookups_total", "counter", "Duplicate-report lookups in the open-event index.",
+         {("hit",): dedup["hits"], ("miss",): dedup["misses"]}, ("result",)),
+        ("rlis_ingest_reports_total", "counter", "Reports through the durable ingest queue (this worker).",
+         {(event,): ingest[event] for event in ("enqueued", "processed", "merged", "released")}, ("event",)),
+        ("rlis_ingest_queue_reports", "gauge", "Reports in the ingest queue file by state (all workers).",
+         {(state,): n for state, n in queue["states"].items()} if queue else {}, ("state",)),
+        ("rlis_ingest_oldest_pending_seconds", "gauge", "Age of the oldest report not yet stored.",
+         {(): queue["oldest_pending_seconds"]} if queue else {}, ()),
+        ("rlis_model_info", "gauge", "Model version being served.",
+         {(str(predictor.model_version),): 1}, ("version",)),
+    ]
+
+registry.add_collector(_service_counters)
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """Prometheus text exposition: stage + request latency histograms and service counters."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+@router.get("/health/live")
+def get_liveness():
+    """Liveness: the process serves requests (restart it if this fails). Never touches the DB."""
+    return {"status": "alive"}
+
+@router.get("/health/ready")
+def get_readiness():
+    """Readiness: 200 once model, schema, gazetteer and open events are loaded, else 503 with each step's state."""
+    return ORJSONResponse(readiness.snapshot(), status_code=200 if readiness.ready else 503)
+
+@router.get("/health/workers")
+def get_worker_health():
+    """Status, heartbeat age, requests and memory of every worker (just this process without scripts/serve.py)."""
+    if workers.board is None:
+        return workers.local_snapshot()
+    return workers.board.snapshot()
+
+@router.get("/debug/profiler")
+def get_profile(format: str = "json", top: int = 20):
+    """Sampled stacks of the current/last run; format=folded feeds flamegraph.pl or speedscope."""
+    if format == "folded":
+        return PlainTextResponse(profiler.folded())
+    return profiler.snapshot(top)
+
+@router.put("/debug/profiler")
+def toggle_profiler(payload: ProfilerToggle):
+    if payload.enabled:
+        if payload.interval_ms <= 0:
+            raise HTTPException(status_code=400, detail="interval_ms must be positive")
+        profiler.start(payload.interval_ms, payload.duration_s, payload.reset)
+    else:
+        profiler.stop()
+    return profiler.snapshot(0)
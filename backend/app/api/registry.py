@@ -0,0 +1,58 @@
+from fastapi import APIRouter, HTTPException
+from app.schemas.insights import ModelSelection
+from app.services.nlp.predictor import predictor
+
+router = APIRouter()
+
+# Model versions under app/ml_models/. Selections are written to registry.json and
+# applied by every worker's watcher within MODEL_WATCH_SECONDS (this one right away).
+
+def _apply(**changes):
+    try:
+        selection = predictor.registry.select(**changes)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=f"Unknown model version: {e.args[0]}")
+    predictor.refresh()
+    return {"selection": selection, **_state()}
+
+def _state():
+    predictor.ensure_loaded()
+    registry = predictor.registry
+    return {
+        "active": registry.active[0],
+        "candidate": registry.candidate[0],
+        "shadow_fraction": registry.shadow_fraction,
+    }
+
+@router.get("/models")
+def list_models():
+    registry = predictor.registry
+    return {
+        "versions": sorted(registry.versions()),
+        **_state(),
+        "shadow": registry.shadow.snapshot(),
+    }
+
+@router.put("/models/active")
+def set_active_model(payload: ModelSelection):
+    if not payload.version:
+        raise HTTPException(status_code=400, detail="version is required")
+    return _apply(active=payload.version)
+
+@router.put("/models/candidate")
+def set_candidate_model(payload: ModelSelection):
+    """Shadow-score `version` on shadow_fraction of /predict traffic; version null stops shadowing."""
+    changes = {"candidate": payload.version}
+    if payload.shadow_fraction is not None:
+        if not 0 <= payload.shadow_fraction <= 1:
+            raise HTTPException(status_code=400, detail="shadow_fraction must be between 0 and 1")
+        changes["shadow_fraction"] = payload.shadow_fraction
+    return _apply(**changes)
+
+@router.post("/models/promote")
+def promote_candidate():
+    """Candidate becomes the active model (shadowing stops)."""
+    candidate = predictor.registry.candidate[0]
+    if candidate is None:
+        raise HTTPException(status_code=409, detail="No candidate model to promote")
+    return _apply(active=candidate, candidate=None)
@@ -0,0 +1,52 @@
+from collections import defaultdict
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_async_db
+from app.models import Incident
+from app.services.locations import location_index
+from app.services.routing import road_graph
+
+router = APIRouter()
+
+async def _open_counts(db):
+    stmt = (
+        select(Incident.location, Incident.priority, func.count())
+        .where(Incident.status == "Open")
+        .group_by(Incident.location, Incident.priority)
+    )
+    counts = defaultdict(dict)
+    for location, priority, n in (await db.execute(stmt)).all():
+        counts[location][priority] = n
+    return counts
+
+async def _ensure_graph(db):
+    # Rebuild when the gazetteer changes; otherwise only reconcile open-incident counts
+    await location_index.refresh_async(db)
+    if road_graph.version != location_index.version:
+        road_graph.rebuild(location_index.locations, location_index.version, await _open_counts(db))
+    elif road_graph.needs_resync():
+        road_graph.sync_open_counts(await _open_counts(db))
+
+@router.get("/routes")
+async def get_routes(
+    source: str,
+    target: str,
+    k: int = Query(3, ge=1, le=10),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """k best routes between two gazetteer nodes, ranked by ETA including open-incident delays."""
+    await _ensure_graph(db)
+    start, end = road_graph.resolve(source), road_graph.resolve(target)
+    if start is None or end is None:
+        raise HTTPException(status_code=404, detail=f"Unknown node: {source if start is None else target}")
+    if start == end:
+        raise HTTPException(status_code=400, detail="Source and target are the same node")
+
+    return {"source": start, "target": end, "routes": road_graph.k_best(start, end, k)}
+
+@router.get("/routes/graph")
+async def get_route_graph(db: AsyncSession = Depends(get_async_db)):
+    """Edges and per-node incident delays (for drawing the network), plus cache counters."""
+    await _ensure_graph(db)
+    return {**road_graph.snapshot(), "edge_list": road_graph.edge_list()}
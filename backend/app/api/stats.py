@@ -0,0 +1,110 @@
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_async_db
+from app.models import IncidentRollup
+
+router = APIRouter()
+
+# Dashboard aggregates. Everything here reads the hourly `incident_rollups` table,
+# never `incidents`, so cost depends on the window size, not on total log volume.
+
+def _utc(value):
+    # Incident timestamps and rollup buckets are UTC; a naive since/until is taken as UTC too
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+def _window(hours, since, until):
+    until = _utc(until) if until else datetime.now(timezone.utc)
+    since = _utc(since) if since else until - timedelta(hours=hours)
+    if since >= until:
+        raise HTTPException(status_code=400, detail="'since' must be before 'until'")
+    return since, until
+
+def _filtered(stmt, since, until, location, category, priority):
+    stmt = stmt.where(IncidentRollup.bucket >= since.replace(minute=0, second=0, microsecond=0), IncidentRollup.bucket < until)
+    if location:
+        stmt = stmt.where(IncidentRollup.location == location)
+    if category:
+        stmt = stmt.where(IncidentRollup.category == category)
+    if priority:
+        stmt = stmt.where(IncidentRollup.priority == priority)
+    return stmt
+
+async def _totals_by(db, column, since, until, location, category, priority):
+    stmt = select(column, func.sum(IncidentRollup.count)).group_by(column)
+    rows = (await db.execute(_filtered(stmt, since, until, location, category, priority))).all()
+    return {key: int(n) for key, n in rows}
+
+@router.get("/stats/summary")
+async def stats_summary(
+    hours: int = Query(24, ge=1, le=24 * 366),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    location: Optional[str] = None,
+    category: Optional[str] = None,
+    priority: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Incident totals per priority, category and location for the window (default: last 24h)."""
+    since, until = _window(hours, since, until)
+    filters = (since, until, location, category, priority)
+
+    by_priority = await _totals_by(db, IncidentRollup.priority, *filters)
+    return {
+        "since": since,
+        "until": until,
+        "total": sum(by_priority.values()),
+        "by_priority": by_priority,
+        "by_category": await _totals_by(db, IncidentRollup.category, *filters),
+        "by_location": await _totals_by(db, IncidentRollup.location, *filters),
+    }
+
+@router.get("/stats/heatmap")
+async def stats_heatmap(
+    hours: int = Query(24, ge=1, le=24 * 366),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    category: Optional[str] = None,
+    priority: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Location x priority counts for the map overlay."""
+    since, until = _window(hours, since, until)
+    stmt = (
+        select(IncidentRollup.location, IncidentRollup.priority, func.sum(IncidentRollup.count))
+        .group_by(IncidentRollup.location, IncidentRollup.priority)
+    )
+    rows = (await db.execute(_filtered(stmt, since, until, None, category, priority))).all()
+
+    cells = {}
+    for location, prio, n in rows:
+        cell = cells.setdefault(location, {"location": location, "total": 0, "by_priority": {}})
+        cell["by_priority"][prio] = int(n)
+        cell["total"] += int(n)
+    return {"since": since, "until": until, "cells": sorted(cells.values(), key=lambda c: -c["total"])}
+
+@router.get("/stats/timeseries")
+async def stats_timeseries(
+    hours: int = Query(24, ge=1, le=24 * 366),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    location: Optional[str] = None,
+    category: Optional[str] = None,
+    priority: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Hourly incident counts (one point per bucket that has incidents)."""
+    since, until = _window(hours, since, until)
+    stmt = (
+        select(IncidentRollup.bucket, func.sum(IncidentRollup.count))
+        .group_by(IncidentRollup.bucket)
+        .order_by(IncidentRollup.bucket)
+    )
+    rows = (await db.execute(_filtered(stmt, since, until, location, category, priority))).all()
+    return {
+        "since": since,
+        "until": until,
+        "points": [{"bucket": bucket, "count": int(n)} for bucket, n in rows],
+    }
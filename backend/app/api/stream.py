@@ -0,0 +1,58 @@
+import asyncio
+from typing import Optional
+from fastapi import APIRouter, Header, Request
+from fastapi.responses import StreamingResponse
+from app.core.config import settings
+from app.services.stream import hub
+
+router = APIRouter()
+
+@router.get("/incidents/stream")
+async def stream_incidents(
+    request: Request,
+    last_event_id: Optional[int] = Header(None),
+    last_id: Optional[int] = None,
+):
+    """
+    Server-Sent Events feed of new incidents. Browsers' EventSource resends
+    Last-Event-ID on reconnect; '?last_id=' does the same for other clients.
+    """
+    hub.bind_loop(asyncio.get_running_loop())
+    resume_from = last_event_id if last_event_id is not None else last_id
+
+    async def event_source():
+        # Subscribe BEFORE reading the backlog so nothing falls in the gap
+        sub = hub.subscribe()
+        sent = 0
+        try:
+            if resume_from is not None:
+                missed = hub.replay_since(resume_from)
+                if missed is None:
+                    # Too far behind: tell the dashboard to refetch /incidents
+                    yield "event: reset\ndata: {}\n\n"
+                else:
+                    for seq, frame in missed:
+                        sent = seq
+                        yield frame
+
+            while not await request.is_disconnected():
+                try:
+                    seq, frame = await asyncio.wait_for(sub.queue.get(), settings.STREAM_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    if sub.dropped:
+                        break
+                    yield ": keepalive\n\n"
+                    continue
+                if seq > sent:
+                    sent = seq
+                    yield frame
+                if sub.dropped and sub.queue.empty():
+                    break
+        finally:
+            hub.unsubscribe(sub)
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
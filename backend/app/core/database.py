@@ -1,17 +1,60 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from app.core.config import settings
 
+def _pool_options(url):
+    # SQLite (local stand-in) uses a single-connection pool that rejects these options
+    if url.startswith("sqlite"):
+        return {}
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
 # FIX: Remove 'connect_args' (Postgres handles threads automatically)
-engine = create_engine(settings.DATABASE_URL)
+engine = create_engine(settings.DATABASE_URL, **_pool_options(settings.DATABASE_URL))
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine for the hot request path (asyncpg): handlers await Postgres
+# instead of parking a threadpool worker on every query
+async_engine = create_async_engine(settings.ASYNC_DATABASE_URL, **_pool_options(settings.ASYNC_DATABASE_URL))
+
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
+def add_missing_columns(bind, table):
+    """
+    create_all() never alters existing tables: ALTER TABLE ... ADD COLUMN for any
+    model column the live table lacks. NOT NULL columns need a plain string server_default
+    (existing rows take that value).
+    """
+    existing = {c["name"] for c in inspect(bind).get_columns(table.name)}
+    added = []
+    for column in table.columns:
+        if column.name not in existing:
+            ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(bind.dialect)}"
+            if column.server_default is not None and isinstance(column.server_default.arg, str):
+                ddl += f" DEFAULT {column.server_default.arg}"
+                if not column.nullable:
+                    ddl += " NOT NULL"
+            with bind.begin() as conn:
+                conn.execute(text(ddl))
+            added.append(column.name)
+    return added
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
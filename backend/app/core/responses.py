@@ -0,0 +1,37 @@
+from datetime import date, datetime
+from decimal import Decimal
+import orjson
+from fastapi import Request
+from fastapi.responses import ORJSONResponse, Response
+
+# Hot endpoints (incident lists, /predict) hand plain dicts / row mappings straight
+# to orjson instead of FastAPI's jsonable_encoder walk over every field. Their
+# response_model still documents the shape; the selected columns ARE that shape.
+MSGPACK_MEDIA_TYPE = "application/x-msgpack"
+
+def dumps(content):
+    """JSON bytes for SSE frames and anything else serialized outside a response."""
+    return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+def _msgpack_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()  # Same strings the JSON responses carry
+    if isinstance(value, Decimal):
+        return float(value)
+    if hasattr(value, "tolist"):
+        return value.tolist()     # numpy
+    raise TypeError(f"Cannot msgpack {type(value).__name__}")
+
+class MsgpackResponse(Response):
+    media_type = MSGPACK_MEDIA_TYPE
+
+    def render(self, content):
+        import msgpack  # Only needed by clients that ask for it
+
+        return msgpack.packb(content, default=_msgpack_default, use_bin_type=True)
+
+def negotiated(request: Request, content, status_code=200, headers=None):
+    """msgpack when the client sends Accept: application/x-msgpack, orjson otherwise."""
+    if MSGPACK_MEDIA_TYPE in request.headers.get("accept", ""):
+        return MsgpackResponse(content, status_code=status_code, headers=headers)
+    return ORJSONResponse(content, status_code=status_code, headers=headers)
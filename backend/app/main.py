@@ -1,13 +1,31 @@
+import time
+_import_started = time.perf_counter()
+
+import asyncio
+from datetime import datetime, timedelta, timezone
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import func, or_, select
 from app.core.config import settings
-from app.api import endpoints
+from app.core.database import SessionLocal, engine
+from app.api import archive, endpoints, geo, ingest, observability, registry, routing, stats, stream
+from app.models import Incident
+from app.services import migrations, partitions, workers
+from app.services.dedup import event_index
+from app.services.ingest_queue import ingest_service
+from app.services.locations import location_index
+from app.services.metrics import RequestMetricsMiddleware
+from app.services.nlp.predictor import predictor
+from app.services.readiness import readiness
+from app.services.stream import hub
 
 # 1. Initialize the App
 app = FastAPI(
     title="RLIS Punjab",
     description="Rural Logistics Intelligence System - Punjab",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,  # orjson for every JSON response
 )
 
 # 2. CORS Configuration (THE FIX)
@@ -25,10 +43,103 @@ app.add_middleware(
     allow_methods=["*"],  # Allow GET, POST, PUT, DELETE
     allow_headers=["*"],
 )
+# Request count + latency per route for /api/v1/metrics
+app.add_middleware(RequestMetricsMiddleware)
 
 # 3. Include Routes
 app.include_router(endpoints.router, prefix="/api/v1")
+app.include_router(stream.router, prefix="/api/v1")
+app.include_router(stats.router, prefix="/api/v1")
+app.include_router(geo.router, prefix="/api/v1")
+app.include_router(routing.router, prefix="/api/v1")
+app.include_router(registry.router, prefix="/api/v1")
+app.include_router(observability.router, prefix="/api/v1")
+app.include_router(archive.router, prefix="/api/v1")
+app.include_router(ingest.router, prefix="/api/v1")
+
+# 4. Startup steps: nothing below touches the disk or the database at import or before
+# the server listens. They run in order in a background thread (app/services/readiness.py),
+# retried until they succeed; /health/ready answers 200 once all are done.
+
+# 4a. Lexicon + active model (the only numpy user on the request path)
+def load_model():
+    predictor.ensure_loaded()
+
+# 4b. Schema: in-process for a plain `uvicorn app.main:app`; under scripts/serve.py a
+# migration process of the master does it once and the workers just wait for it
+def apply_migrations():
+    if workers.board is not None:
+        while not workers.board.schema_ready():
+            time.sleep(0.2)
+    elif settings.MIGRATE_ON_STARTUP:
+        migrations.migrate(engine)
+
+# 4c. Warm the in-memory location index before the first prediction
+def load_location_index():
+    db = SessionLocal()
+    try:
+        location_index.refresh(db, force=True)
+    finally:
+        db.close()
+
+# 4d. Load recent open incidents so duplicate reports merge across restarts
+def load_open_events():
+    cutoff = datetime.now(timezone.utc) - timedelta(minutes=settings.DEDUP_WINDOW_MINUTES)
+    db = SessionLocal()
+    try:
+        rows = db.execute(
+            select(Incident.id, Incident.location, Incident.category, Incident.text,
+                   func.coalesce(Incident.last_reported_at, Incident.timestamp), Incident.report_count)
+            .where(Incident.status == "Open", Incident.location != "Unknown")
+            # Bound on the partition key so only the newest partitions are read
+            .where(Incident.timestamp >= cutoff - timedelta(days=1))
+            .where(or_(Incident.timestamp >= cutoff, Incident.last_reported_at >= cutoff))
+        ).all()
+    finally:
+        db.close()
+    print(f"🔁 Dedup index warmed with {event_index.warm(rows)} open events")
+
+readiness.add("model", load_model)
+readiness.add("schema", apply_migrations)
+readiness.add("locations", load_location_index)
+readiness.add("open_events", load_open_events)
+
+@app.on_event("startup")
+def start_readiness_steps():
+    readiness.start()
+
+# 5. Pick up new model versions / registry changes in the background (no restarts)
+@app.on_event("startup")
+def watch_models():
+    predictor.start_watching()
+
+# 6. Keep next months' incident partitions created ahead of time (Postgres)
+@app.on_event("startup")
+def premake_partitions():
+    partitions.start_premaking(engine)
+
+# 7. Drain the durable ingest queue once the schema and dedup index are there (reports
+# accepted before that, or left by a previous run, wait safely in the queue file)
+@app.on_event("startup")
+async def start_ingest_consumers():
+    async def start_when_ready():
+        await readiness.wait()
+        ingest_service.start()
+    asyncio.get_running_loop().create_task(start_when_ready())
+
+# 8. Tell the scripts/serve.py master this worker's event loop is alive (and whether it's ready)
+@app.on_event("startup")
+async def start_worker_heartbeat():
+    workers.start_heartbeat()
+
+# 9. In a scripts/serve.py worker, live-stream events (from every worker) arrive through the master
+@app.on_event("startup")
+async def start_stream_relay():
+    hub.start_relay()
 
 @app.get("/")
 def read_root():
-    return {"status": "active", "system": "RLIS Punjab (Docker)"}
\ No newline at end of file
+    return {"status": "active", "system": "RLIS Punjab (Docker)"}
+
+# Reported by /health/ready and scripts/import_report.py
+readiness.import_seconds = round(time.perf_counter() - _import_started, 3)
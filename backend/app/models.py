@@ -1,5 +1,6 @@
 # backend/app/models.py
-from sqlalchemy import Column, Integer, String, Float, DateTime
+from datetime import datetime, timezone
+from sqlalchemy import Column, Integer, String, Float, DateTime, Index
 from sqlalchemy.sql import func
 from app.core.database import Base
 
@@ -12,6 +13,13 @@ class Location(Base):
     lat = Column(Float)
     lng = Column(Float)
 
+class GazetteerVersion(Base):
+    """Single row bumped by scripts/seed_postgre.py so API workers know to reload locations."""
+    __tablename__ = "gazetteer_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
 class Incident(Base):
     __tablename__ = "incidents"
 
@@ -21,4 +29,67 @@ class Incident(Base):
     category = Column(String)
     priority = Column(String)
     status = Column(String, default="Open")
-    timestamp = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
+    # Stamped by SQLAlchemy so every row is stored alike: SQLite's CURRENT_TIMESTAMP drops
+    # the microseconds, and keyset cursors compare (timestamp, id) as stored text there
+    timestamp = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), server_default=func.now())
+    # Resolved point (NULL when the location is unknown); PostGIS `geom` is generated from these
+    lat = Column(Float)
+    lng = Column(Float)
+    # Set when a dispatcher reviews the incident (status/category); such rows are training labels
+    confirmed_at = Column(DateTime(timezone=True))
+    # Duplicate reports merged into this incident (see app/services/dedup.py)
+    report_count = Column(Integer, nullable=False, default=1, server_default="1")
+    last_reported_at = Column(DateTime(timezone=True))
+    # Durable-queue ticket of the report that created it (app/services/ingest_queue.py);
+    # lets a re-claimed batch skip reports already stored. NULL for other insert paths.
+    ingest_ticket = Column(String)
+
+    # Keyset pagination walks (timestamp, id) newest-first; each filter gets its own
+    # prefix so "priority=Critical" pages are an index range scan, not a table scan
+    __table_args__ = (
+        Index("ix_incidents_timestamp_id", "timestamp", "id"),
+        Index("ix_incidents_priority_timestamp_id", "priority", "timestamp", "id"),
+        Index("ix_incidents_category_timestamp_id", "category", "timestamp", "id"),
+        Index("ix_incidents_location_timestamp_id", "location", "timestamp", "id"),
+        Index("ix_incidents_status_timestamp_id", "status", "timestamp", "id"),
+        Index("ix_incidents_confirmed_at_id", "confirmed_at", "id"),
+        Index("ix_incidents_ingest_ticket", ingest_ticket, postgresql_where=ingest_ticket.isnot(None)),
+    )
+
+class IncidentReport(Base):
+    """
+    A duplicate report merged into an open incident (see app/services/dedup.py). The
+    incident keeps its first report's text; every later one is kept here.
+    """
+    __tablename__ = "incident_reports"
+
+    id = Column(Integer, primary_key=True)
+    # No foreign key: on Postgres `incidents` is partitioned and its key includes the timestamp
+    incident_id = Column(Integer, nullable=False)
+    text = Column(String)
+    reported_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), server_default=func.now())
+    # Durable-queue ticket (app/services/ingest_queue.py), so a re-claimed batch doesn't store it twice
+    ingest_ticket = Column(String)
+
+    __table_args__ = (
+        Index("ix_incident_reports_incident_id", "incident_id", "id"),
+        Index("ix_incident_reports_ingest_ticket", ingest_ticket, postgresql_where=ingest_ticket.isnot(None)),
+    )
+
+class IncidentRollup(Base):
+    """
+    Pre-aggregated report counts per hour x location x category x priority.
+    Kept current by every insert path (see app/services/rollups.py), so dashboard
+    KPIs read O(buckets) rows instead of scanning `incidents`.
+    """
+    __tablename__ = "incident_rollups"
+
+    bucket = Column(DateTime(timezone=True), primary_key=True)  # Hour start
+    location = Column(String, primary_key=True)
+    category = Column(String, primary_key=True)
+    priority = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("ix_incident_rollups_location_bucket", "location", "bucket"),
+    )
@@ -1,7 +1,7 @@
 # insights.py: Logic for RLIS Punjab Project
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional
+from typing import Any, Dict, List, Optional
 
 # Base schema with shared attributes
 class IncidentBase(BaseModel):
@@ -11,16 +11,84 @@ class IncidentBase(BaseModel):
 class IncidentCreate(IncidentBase):
     pass
 
-# Schema for READING an incident (Output to Frontend)
-class IncidentResponse(IncidentBase):
+# Schema for CREATING many incidents at once (Depot bulk upload)
+class IncidentBatchCreate(BaseModel):
+    raw_texts: List[str]
+
+# Schema for choosing served / shadowed model versions (version "latest" follows new releases)
+class ModelSelection(BaseModel):
+    version: Optional[str] = None
+    shadow_fraction: Optional[float] = None
+
+# Schema for a dispatcher's review (close it, correct the category)
+class IncidentUpdate(BaseModel):
+    status: Optional[str] = None
+    category: Optional[str] = None
+
+# Schema for switching the sampling profiler on/off at runtime
+class ProfilerToggle(BaseModel):
+    enabled: bool
+    interval_ms: float = 5.0
+    duration_s: Optional[float] = None
+    reset: bool = True
+
+# Schema for READING an incident (Output to Frontend); mirrors app/models.Incident.
+# List endpoints leave out `text` unless include_text=true.
+class IncidentResponse(BaseModel):
     id: int
+    text: Optional[str] = None
     location: Optional[str] = None
     category: Optional[str] = None
-    priority: str
-    sentiment_score: Optional[float] = None
-    status: str
-    created_at: datetime
+    priority: Optional[str] = None
+    status: Optional[str] = None
+    timestamp: Optional[datetime] = None
+    lat: Optional[float] = None
+    lng: Optional[float] = None
+    report_count: int = 1
+    confirmed_at: Optional[datetime] = None
+    last_reported_at: Optional[datetime] = None
 
     # This tells Pydantic to treat SQLAlchemy models as valid dictionaries
     class Config:
-        from_attributes = True  # Use 'orm_mode = True' if you are on Pydantic v1
\ No newline at end of file
+        from_attributes = True  # Use 'orm_mode = True' if you are on Pydantic v1
+
+# One keyset page of GET /incidents
+class IncidentPage(BaseModel):
+    items: List[IncidentResponse]
+    next_cursor: Optional[str] = None
+
+# A classified report: a new incident, or an open one it was merged into
+class PredictedIncident(IncidentResponse):
+    merged: bool = False
+
+class PredictResult(BaseModel):
+    incident: PredictedIncident
+    geo_target: List[float]
+
+# /predict adds the NLP debug panel data (free-form)
+class PredictResponse(PredictResult):
+    nlp_debug: Dict[str, Any]
+
+class PredictBatchResponse(BaseModel):
+    count: int
+    results: List[PredictResult]
+    processing_time: str
+
+# Durable ingest queue: the 202 receipt(s), and what a ticket resolves to
+class IngestAccepted(BaseModel):
+    ticket: str
+    status: str
+    status_url: str
+
+class IngestBatchAccepted(BaseModel):
+    count: int
+    tickets: List[str]
+
+class IngestStatus(BaseModel):
+    ticket: str
+    status: str                 # queued | processing | done | failed
+    received_at: datetime
+    attempts: int
+    error: Optional[str] = None
+    incident: Optional[PredictedIncident] = None   # Once done (None if since archived)
+    geo_target: Optional[List[float]] = None
\ No newline at end of file
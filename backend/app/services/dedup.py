@@ -0,0 +1,192 @@
+import json
+import re
+import threading
+import time
+from collections import Counter
+from datetime import timezone
+from app.core.config import settings
+from app.services.nlp.cache import normalize_text
+from app.services.nlp.predictor import LEXICON_PATH
+from app.services.nlp.resolver import skeleton
+
+# Same tokens as the classifier's vectorizer (2+ word characters)
+_TOKEN = re.compile(r"(?u)\b\w\w+\b")
+
+_vocabulary = None
+_vocabulary_lock = threading.Lock()
+
+def _load_vocabulary():
+    """(place words, place skeletons, filler words, synonyms, category families) from the lexicon, read once per process."""
+    global _vocabulary
+    with _vocabulary_lock:
+        if _vocabulary is None:
+            with open(LEXICON_PATH, encoding="utf-8") as f:
+                lexicon = json.load(f)
+            places = {
+                token
+                for loc in lexicon["locations"]
+                for term in [loc["name"], *loc["aliases"]]
+                for token in _TOKEN.findall(term.lower())
+            }
+            places.update(lexicon.get("location_synonyms", {}))
+            places.update(lexicon.get("location_synonyms", {}).values())
+            _vocabulary = (
+                places,
+                {skeleton([token]) for token in places},
+                set(lexicon.get("dedup_filler_words", [])),
+                lexicon.get("dedup_synonyms", {}),
+                {
+                    category: (family, tuple(members))
+                    for family, members in lexicon.get("dedup_category_families", {}).items()
+                    for category in members
+                },
+            )
+    return _vocabulary
+
+def content_words(text):
+    """
+    What a report says happened, as a set of consonant skeletons. Place names are
+    dropped (events are already bucketed by location; misspelt ones by skeleton),
+    so are filler words ("hai", "near", "bht"), and Roman Urdu / Punjabi synonyms
+    are folded ("fasa" -> "stuck"): "truck stuck at Khanna mandi" and "Truck fasa
+    hai Khanna mandi" give the same set, while "Fire at Khanna mandi godown" and
+    "Accident at Khanna mandi, truck overturned" share nothing.
+    """
+    places, place_skeletons, filler, synonyms, _ = _load_vocabulary()
+    words = set()
+    for token in _TOKEN.findall(normalize_text(text)):
+        if token in filler or token in places:
+            continue
+        key = skeleton([synonyms.get(token, token)])
+        if key not in place_skeletons:
+            words.add(key)
+    return frozenset(words)
+
+def category_family(category):
+    """
+    The kind of event a category stands for. The model ("Harvest_Traffic") and the keyword
+    rules ("Traffic Jam") name the same jam differently, so events are bucketed by family.
+    """
+    return _load_vocabulary()[4].get(category, (category, None))[0]
+
+def family_categories(category):
+    """Every stored category of `category`'s family (the merge UPDATE re-checks the row against these)."""
+    return list(_load_vocabulary()[4].get(category, (None, (category,)))[1])
+
+def similarity(a, b):
+    """Jaccard index of two content_words() sets; 0.0 when either is empty (nothing to compare)."""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+def _epoch(value):
+    # The DB hands back naive UTC (SQLite CURRENT_TIMESTAMP) or aware timestamps
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+class OpenEvent:
+    __slots__ = ("id", "fingerprint", "last_seen", "report_count")
+
+    def __init__(self, incident_id, fingerprint, last_seen, report_count):
+        self.id = incident_id
+        self.fingerprint = fingerprint
+        self.last_seen = last_seen
+        self.report_count = report_count
+
+class EventIndex:
+    """
+    Recent open incidents bucketed by (location, category family), so deciding whether a
+    new report repeats one is a dict lookup plus a few small set intersections.
+
+    An event stays matchable for `window` seconds after its LAST report (repeat
+    reports keep a live jam open for merging). Per process: each worker learns
+    its own merges and warms from the DB at startup; the UPDATE that merges
+    re-checks the row, so a stale entry only costs a missed merge.
+    """
+
+    def __init__(self, window_seconds, min_similarity):
+        self.window = window_seconds
+        self.min_similarity = min_similarity
+        self._buckets = {}     # (location, category family) -> {incident id: OpenEvent}
+        self._keys = {}        # incident id -> bucket key
+        self._lock = threading.Lock()
+        self.stats = Counter()
+
+    # --- 1. LOOKUP ---
+    def match(self, location, category, fingerprint, now=None):
+        """(incident id, similarity) of the most similar live event, or None."""
+        now = time.time() if now is None else now
+        with self._lock:
+            bucket = self._buckets.get((location, category_family(category)))
+            if not bucket:
+                self.stats["misses"] += 1
+                return None
+            best = None
+            for event in list(bucket.values()):
+                if now - event.last_seen > self.window:
+                    self._drop(event.id)
+                    continue
+                score = similarity(event.fingerprint, fingerprint)
+                if score >= self.min_similarity and (best is None or score > best[1]):
+                    best = (event.id, score)
+            self.stats["hits" if best else "misses"] += 1
+            return best
+
+    # --- 2. UPDATES ---
+    def add(self, incident_id, location, category, fingerprint, last_seen=None, report_count=1):
+        key = (location, category_family(category))
+        event = OpenEvent(incident_id, fingerprint, time.time() if last_seen is None else last_seen, report_count)
+        with self._lock:
+            self._drop(incident_id)
+            self._buckets.setdefault(key, {})[incident_id] = event
+            self._keys[incident_id] = key
+
+    def touch(self, incident_id, report_count, now=None):
+        """A report merged into the event: slide its window forward."""
+        with self._lock:
+            key = self._keys.get(incident_id)
+            if key is None:
+                return
+            event = self._buckets[key][incident_id]
+            event.last_seen = time.time() if now is None else now
+            event.report_count = report_count
+
+    def remove(self, incident_id):
+        """Closed or re-categorised: later reports must not merge into it."""
+        with self._lock:
+            self._drop(incident_id)
+
+    def _drop(self, incident_id):
+        key = self._keys.pop(incident_id, None)
+        if key is not None:
+            bucket = self._buckets[key]
+            bucket.pop(incident_id, None)
+            if not bucket:
+                del self._buckets[key]
+
+    def warm(self, rows):
+        """rows: (id, location, category, text, last reported at, report_count) of open incidents."""
+        now = time.time()
+        loaded = 0
+        for incident_id, location, category, text, last_reported, report_count in rows:
+            last_seen = _epoch(last_reported)
+            if last_seen is None or now - last_seen > self.window:
+                continue
+            self.add(incident_id, location, category, content_words(text or ""), last_seen, report_count or 1)
+            loaded += 1
+        return loaded
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "open_events": len(self._keys),
+                "buckets": len(self._buckets),
+                "window_minutes": self.window / 60,
+                "min_similarity": self.min_similarity,
+                **self.stats,
+            }
+
+event_index = EventIndex(settings.DEDUP_WINDOW_MINUTES * 60, settings.DEDUP_MIN_SIMILARITY)
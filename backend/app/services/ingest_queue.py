@@ -0,0 +1,535 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import Counter, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from sqlalchemy import insert, select, update
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, engine
+from app.models import Incident, IncidentReport
+from app.services import partitions, rollups
+from app.services.dedup import category_family, content_words, event_index, family_categories, similarity
+from app.services.locations import DEFAULT_GEO_TARGET, location_index
+from app.services.metrics import STAGE_SECONDS, StageTimer
+from app.services.nlp.predictor import predictor
+from app.services.routing import road_graph
+from app.services.stream import hub
+
+# Reports wait here between the 202 and the database. One SQLite file in WAL mode on
+# local disk, shared by every worker process on the host (SQLite's file lock makes
+# appends and claims atomic across processes):
+#
+#   queued --claim--> processing --commit--> done        (ticket -> incident id)
+#                         |  lease expired / batch failed: back to queued
+#                         '- MAX_ATTEMPTS reached --------> failed
+#
+# A report is acknowledged only after its append is committed (fsync'd with
+# synchronous=FULL), so once the client has a ticket the report survives a crash.
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    ticket TEXT NOT NULL UNIQUE,
+    text TEXT NOT NULL,
+    received_at REAL NOT NULL,
+    state TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    available_at REAL NOT NULL,
+    incident_id INTEGER,
+    merged INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS ix_reports_state_available ON reports (state, available_at, seq);
+CREATE INDEX IF NOT EXISTS ix_reports_finished_at ON reports (finished_at) WHERE finished_at IS NOT NULL;
+"""
+
+# An empty queue is re-checked this often (reports appended by other processes)
+IDLE_POLL_SECONDS = 0.5
+PURGE_EVERY_SECONDS = 300
+# Queue depth for /metrics is counted by the consumers this often, not per scrape
+DEPTH_EVERY_SECONDS = 5
+
+ClaimedReport = namedtuple("ClaimedReport", "seq ticket text received_at attempts")
+
+# Same columns as IncidentResponse, returned by a merge's UPDATE
+INCIDENT_COLUMNS = [Incident.id, Incident.text, Incident.location, Incident.category, Incident.priority, Incident.status,
+                    Incident.timestamp, Incident.lat, Incident.lng, Incident.report_count]
+
+class DurableQueue:
+    """The on-disk queue. Blocking sqlite3 calls: run them off the event loop."""
+
+    def __init__(self, path, synchronous="FULL"):
+        self.path = path
+        self.synchronous = synchronous
+        self._local = threading.local()   # sqlite3 connections stay in the thread that opened them
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # Autocommit mode: every write below runs in an explicit BEGIN IMMEDIATE
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(f"PRAGMA synchronous={self.synchronous}")
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def exists(self):
+        """False until something was appended on this host (then there is nothing to claim or count)."""
+        return os.path.exists(self.path)
+
+    @contextmanager
+    def _write(self):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    # --- 1. PRODUCERS ---
+    def append(self, texts):
+        """Durably appends reports (one transaction, one fsync). Returns their tickets in order."""
+        now = time.time()
+        rows = [(uuid.uuid4().hex, text, now, now) for text in texts]
+        with self._write() as conn:
+            conn.executemany("INSERT INTO reports (ticket, text, received_at, available_at) VALUES (?, ?, ?, ?)", rows)
+        return [row[0] for row in rows]
+
+    # --- 2. CONSUMERS ---
+    def claim(self, limit, lease_seconds, max_attempts):
+        """Leases up to `limit` of the oldest available reports (queued, or leased by a consumer that died)."""
+        now = time.time()
+        with self._write() as conn:
+            # A lease that expired MAX_ATTEMPTS times (the report keeps killing its worker): park it
+            conn.execute(
+                "UPDATE reports SET state = 'failed', error = coalesce(error, 'lease expired'), finished_at = ? "
+                "WHERE state = 'processing' AND available_at <= ? AND attempts >= ?",
+                (now, now, max_attempts),
+            )
+            rows = conn.execute(
+                "UPDATE reports SET state = 'processing', attempts = attempts + 1, available_at = ? "
+                "WHERE seq IN (SELECT seq FROM reports WHERE state IN ('queued', 'processing') AND available_at <= ? "
+                "ORDER BY seq LIMIT ?) "
+                "RETURNING seq, ticket, text, received_at, attempts",
+                (now + lease_seconds, now, limit),
+            ).fetchall()
+        return sorted((ClaimedReport(*row) for row in rows), key=lambda row: row.seq)
+
+    def complete(self, outcomes):
+        """outcomes: (seq, incident id, merged) of stored reports."""
+        now = time.time()
+        with self._write() as conn:
+            conn.executemany(
+                "UPDATE reports SET state = 'done', incident_id = ?, merged = ?, error = NULL, finished_at = ? WHERE seq = ?",
+                [(incident_id, int(merged), now, seq) for seq, incident_id, merged in outcomes],
+            )
+
+    def release(self, seqs, error, max_attempts, backoff_seconds=2.0):
+        """A failed batch: back to the queue after a growing delay, or `failed` after max_attempts."""
+        now = time.time()
+        with self._write() as conn:
+            conn.executemany(
+                "UPDATE reports SET "
+                "state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'queued' END, "
+                "finished_at = CASE WHEN attempts >= ? THEN ? END, "
+                "available_at = ? + ? * attempts, error = ? WHERE seq = ?",
+                [(max_attempts, max_attempts, now, now, backoff_seconds, error[:500], seq) for seq in seqs],
+            )
+
+    # --- 3. STATUS ---
+    def status(self, ticket):
+        row = self._conn().execute(
+            "SELECT ticket, state, received_at, attempts, incident_id, merged, error FROM reports WHERE ticket = ?",
+            (ticket,),
+        ).fetchone()
+        if row is None:
+            return None
+        keys = ("ticket", "status", "received_at", "attempts", "incident_id", "merged", "error")
+        return dict(zip(keys, row))
+
+    def depth(self):
+        """{state: reports} plus the age (seconds) of the oldest unfinished report."""
+        conn = self._conn()
+        counts = dict(conn.execute("SELECT state, count(*) FROM reports GROUP BY state").fetchall())
+        oldest = conn.execute("SELECT min(received_at) FROM reports WHERE state IN ('queued', 'processing')").fetchone()[0]
+        return {
+            "states": {state: counts.get(state, 0) for state in ("queued", "processing", "done", "failed")},
+            "oldest_pending_seconds": round(time.time() - oldest, 3) if oldest is not None else 0.0,
+        }
+
+    def purge(self, keep_seconds):
+        """Drops finished tickets older than keep_seconds (failed ones stay for inspection)."""
+        with self._write() as conn:
+            return conn.execute(
+                "DELETE FROM reports WHERE state = 'done' AND finished_at < ?", (time.time() - keep_seconds,)
+            ).rowcount
+
+def _utc(epoch):
+    return datetime.fromtimestamp(epoch, timezone.utc)
+
+def _report_row(incident_id, report):
+    return {"incident_id": incident_id, "text": report.text, "reported_at": _utc(report.received_at), "ingest_ticket": report.ticket}
+
+def _classify(texts, with_fingerprints):
+    # Worker thread: the model call and the content words stay off the event loop
+    timings = {}
+    results = predictor.predict_batch(texts, timings)
+    fingerprints = [content_words(text) for text in texts] if with_fingerprints else [None] * len(texts)
+    return results, fingerprints, timings
+
+class IngestService:
+    """
+    Per-process front of the durable queue.
+
+    submit() group-commits: appends arriving while the previous append is being
+    written go to disk together in the next transaction, so a burst costs a few
+    fsyncs rather than one per report. INGEST_CONSUMERS tasks claim batches,
+    classify them in one model call, fold duplicates into open events (or into an
+    earlier report of the same batch), bulk-insert the rest and mark the tickets
+    done. Incidents and merged reports (incident_reports) carry their ticket, so
+    a batch re-claimed after a crash between the DB commit and the queue update
+    is not stored or counted twice.
+    """
+
+    def __init__(self, queue, consumers, batch_size, lease_seconds, max_attempts, keep_seconds):
+        self.queue = queue
+        self.consumers = consumers
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.keep_seconds = keep_seconds
+        self.stats = Counter()
+        self.depth = None           # queue.depth() as of the consumers' last count (None: no queue file yet)
+        self._executor = ThreadPoolExecutor(max_workers=consumers + 2, thread_name_prefix="rlis-ingest")
+        self._pending = []          # (texts, future) waiting for the next append
+        self._writer = None
+        self._wake_writer = None
+        self._work = None           # Set when this process appended something
+        self._consumers = []
+        self._last_purge = time.monotonic()
+        self._last_depth = float("-inf")
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    # --- 1. LIFECYCLE ---
+    def start(self):
+        """Starts the writer and the consumers on the running loop (app startup)."""
+        self._ensure_writer()
+        if not self._consumers:
+            loop = asyncio.get_running_loop()
+            self._consumers = [loop.create_task(self._consume()) for _ in range(self.consumers)]
+            print(f"📥 Ingest queue {self.queue.path}: {self.consumers} consumers, batches of {self.batch_size}")
+
+    def _ensure_writer(self):
+        if self._writer is None or self._writer.done():
+            self._wake_writer = asyncio.Event()
+            self._work = self._work or asyncio.Event()
+            self._writer = asyncio.get_running_loop().create_task(self._write_loop())
+
+    # --- 2. PRODUCERS ---
+    async def submit(self, texts):
+        """Durably queues the texts; returns their tickets once they are on disk."""
+        self._ensure_writer()
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((list(texts), future))
+        self._wake_writer.set()
+        return await future
+
+    async def _write_loop(self):
+        while True:
+            await self._wake_writer.wait()
+            self._wake_writer.clear()
+            while self._pending:
+                batch, self._pending = self._pending, []
+                texts = [text for chunk, _ in batch for text in chunk]
+                try:
+                    tickets = await self._run(self.queue.append, texts)
+                except Exception as e:
+                    # Nothing was committed: every waiting request gets the error (-> 5xx, client retries)
+                    for _, future in batch:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+                start = 0
+                for chunk, future in batch:
+                    if not future.done():
+                        future.set_result(tickets[start:start + len(chunk)])
+                    start += len(chunk)
+                self.stats["enqueued"] += len(texts)
+                self.stats["appends"] += 1
+                self._work.set()
+
+    # --- 3. CONSUMERS ---
+    async def _idle(self):
+        # Woken early when this process appends; other processes' appends wait for the poll
+        self._work.clear()
+        try:
+            await asyncio.wait_for(self._work.wait(), IDLE_POLL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _consume(self):
+        while True:
+            if not self.queue.exists():
+                # /ingest not used on this host yet: don't create the file to find it empty
+                await self._idle()
+                continue
+            await self._maybe_count_depth()
+            try:
+                claimed = await self._run(self.queue.claim, self.batch_size, self.lease_seconds, self.max_attempts)
+            except Exception as e:
+                print(f"❌ Ingest queue claim failed: {e}")
+                await asyncio.sleep(IDLE_POLL_SECONDS)
+                continue
+
+            if not claimed:
+                await self._idle()
+                await self._maybe_purge()
+                continue
+
+            outcomes = await self._process_or_split(claimed)
+            if outcomes:
+                try:
+                    await self._run(self.queue.complete, outcomes)
+                except Exception as e:
+                    # The lease runs out and the batch is re-claimed; stored tickets are skipped then
+                    print(f"⚠️ Could not mark {len(outcomes)} ingested reports done: {e}")
+
+    async def _process_or_split(self, claimed):
+        try:
+            return await self._process(claimed)
+        except Exception as e:
+            self.stats["failed_batches"] += 1
+            if len(claimed) == 1:
+                print(f"⚠️ Ingest of report {claimed[0].ticket} failed (attempt {claimed[0].attempts}): {e}")
+                try:
+                    await self._run(self.queue.release, [claimed[0].seq], str(e), self.max_attempts)
+                    self.stats["released"] += 1
+                except Exception as release_error:
+                    # Still leased: it comes back when the lease runs out
+                    print(f"⚠️ Could not release report {claimed[0].ticket}: {release_error}")
+                return []
+        # One bad report must not hold back the rest of its batch: retry them one by one
+        outcomes = []
+        for report in claimed:
+            outcomes.extend(await self._process_or_split([report]))
+        return outcomes
+
+    async def _maybe_count_depth(self):
+        if time.monotonic() - self._last_depth < DEPTH_EVERY_SECONDS:
+            return
+        self._last_depth = time.monotonic()
+        try:
+            self.depth = await self._run(self.queue.depth)
+        except Exception as e:
+            print(f"⚠️ Ingest queue depth count failed: {e}")
+
+    async def _maybe_purge(self):
+        if time.monotonic() - self._last_purge < PURGE_EVERY_SECONDS:
+            return
+        self._last_purge = time.monotonic()
+        try:
+            purged = await self._run(self.queue.purge, self.keep_seconds)
+        except Exception as e:
+            print(f"⚠️ Ingest queue purge failed: {e}")
+            return
+        if purged:
+            print(f"🧹 Purged {purged} finished ingest tickets")
+
+    # --- 4. ONE BATCH: CLASSIFY -> DEDUP -> BULK INSERT ---
+    async def _process(self, claimed):
+        """Stores a claimed batch. Returns (seq, incident id, merged) per report."""
+        timer = StageTimer("ingest")
+        now = time.time()
+        for report in claimed:
+            STAGE_SECONDS.observe(max(now - report.received_at, 0.0), "ingest", "queue_wait")
+
+        # 1. AI PREDICTION (one model call for the batch, in a worker thread)
+        dedup = settings.DEDUP_WINDOW_MINUTES > 0
+        with timer.stage("prediction"):
+            ai_results, fingerprints, timings = await self._run(_classify, [r.text for r in claimed], dedup)
+        for name, ns in timings.items():
+            timer.add(name, ns)
+
+        async with AsyncSessionLocal() as db:
+            with timer.stage("location_lookup"):
+                await location_index.refresh_async(db)
+
+            # 2. RETRIES: reports an earlier attempt already stored (crash before the queue update)
+            stored = {}       # ticket -> (incident id, merged)
+            retried = [r for r in claimed if r.attempts > 1]
+            if retried:
+                tickets = [r.ticket for r in retried]
+                for ticket, incident_id in (await db.execute(
+                    select(Incident.ingest_ticket, Incident.id)
+                    .where(Incident.ingest_ticket.in_(tickets))
+                    .where(Incident.timestamp >= _utc(min(r.received_at for r in retried)))
+                )).all():
+                    stored[ticket] = (incident_id, False)
+                for ticket, incident_id in (await db.execute(
+                    select(IncidentReport.ingest_ticket, IncidentReport.incident_id)
+                    .where(IncidentReport.ingest_ticket.in_(tickets))
+                )).all():
+                    stored[ticket] = (incident_id, True)
+
+            # 3. PLACE EVERY REPORT: an open event, an earlier new incident of this batch, or a new incident
+            outcomes = {}     # seq -> (incident id, merged) once known
+            to_events = {}    # event id -> [report index]
+            groups = []       # new incidents: [report index, ...] (first report is the incident's own)
+            with timer.stage("dedup_match"):
+                for i, (report, ai_result, fingerprint) in enumerate(zip(claimed, ai_results, fingerprints)):
+                    if report.ticket in stored:
+                        outcomes[report.seq] = stored[report.ticket]
+                        continue
+                    if dedup and ai_result["location"] != "Unknown":
+                        match = event_index.match(ai_result["location"], ai_result["category"], fingerprint, now=report.received_at)
+                        if match:
+                            to_events.setdefault(match[0], []).append(i)
+                            continue
+                    self._group(groups, i, ai_results, fingerprints, dedup)
+
+            # 4. MERGES (the WHERE re-checks the row; a closed event makes its reports a new incident)
+            merged_rows = []
+            reports = []      # incident_reports rows: merged reports keep their own text
+            with timer.stage("db_update"):
+                for event_id, members in to_events.items():
+                    first = ai_results[members[0]]
+                    row = (await db.execute(
+                        update(Incident)
+                        .where(
+                            Incident.id == event_id,
+                            Incident.status == "Open",
+                            Incident.location == first["location"],
+                            Incident.category.in_(family_categories(first["category"])),
+                        )
+                        .values(
+                            report_count=Incident.report_count + len(members),
+                            last_reported_at=_utc(max(claimed[i].received_at for i in members)),
+                        )
+                        .returning(*INCIDENT_COLUMNS)
+                        .execution_options(synchronize_session=False)
+                    )).first()
+                    if row is None:
+                        event_index.remove(event_id)
+                        groups.append(members)
+                        continue
+                    merged_rows.append(row)
+                    for i in members:
+                        outcomes[claimed[i].seq] = (event_id, True)
+                        reports.append(_report_row(event_id, claimed[i]))
+
+            # 5. BULK INSERT (single multi-row INSERT ... RETURNING, ids in input order)
+            rows = []
+            for members in groups:
+                report, ai_result = claimed[members[0]], ai_results[members[0]]
+                loc = location_index.get(ai_result["location"]) if ai_result["location"] != "Unknown" else None
+                rows.append({
+                    "text": report.text,
+                    "location": ai_result["location"],
+                    "category": ai_result["category"],
+                    "priority": ai_result["priority"],
+                    "status": "Open",
+                    # When the report arrived, not when the queue got to it
+                    "timestamp": _utc(report.received_at),
+                    "lat": loc[0] if loc else None,
+                    "lng": loc[1] if loc else None,
+                    "report_count": len(members),
+                    "last_reported_at": _utc(claimed[members[-1]].received_at) if len(members) > 1 else None,
+                    "ingest_ticket": report.ticket,
+                })
+            inserted = []
+            if rows:
+                with timer.stage("db_insert"):
+                    await self._run(partitions.ensure_months, engine, [row["timestamp"] for row in rows])
+                    inserted = (await db.execute(
+                        insert(Incident).returning(Incident.id, Incident.timestamp, sort_by_parameter_order=True),
+                        rows,
+                    )).all()
+                with timer.stage("db_rollups"):
+                    await rollups.record_async(db, [
+                        (timestamp, row["location"], row["category"], row["priority"])
+                        for row, (_, timestamp) in zip(rows, inserted)
+                    ])
+            for members, (incident_id, _) in zip(groups, inserted):
+                reports.extend(_report_row(incident_id, claimed[i]) for i in members[1:])
+            if reports:
+                with timer.stage("db_reports"):
+                    await db.execute(insert(IncidentReport), reports)
+            with timer.stage("db_commit"):
+                await db.commit()
+
+        # 6. IN-MEMORY STATE (after the commit, like /predict)
+        incidents = []
+        with timer.stage("road_graph"):
+            for members, row, (incident_id, timestamp) in zip(groups, rows, inserted):
+                road_graph.incident_opened(row["location"], row["priority"])
+                if dedup and row["location"] != "Unknown":
+                    last = claimed[members[-1]].received_at
+                    event_index.add(incident_id, row["location"], row["category"], fingerprints[members[0]], last, len(members))
+                outcomes[claimed[members[0]].seq] = (incident_id, False)
+                for i in members[1:]:
+                    outcomes[claimed[i].seq] = (incident_id, True)
+                incident = {key: row[key] for key in ("text", "location", "category", "priority", "status", "lat", "lng", "report_count")}
+                incidents.append({"id": incident_id, "timestamp": timestamp, **incident, "merged": False})
+            for row in merged_rows:
+                event_index.touch(row.id, row.report_count)
+                incidents.append({**row._asdict(), "merged": True})
+
+        # 7. PUSH TO LIVE DASHBOARDS (same events as /predict)
+        with timer.stage("publish"):
+            for incident in incidents:
+                geo_target = [incident["lat"], incident["lng"]] if incident["lat"] is not None else list(DEFAULT_GEO_TARGET)
+                hub.publish("incident", {"incident": incident, "geo_target": geo_target})
+
+        timer.finish()
+        self.stats["processed"] += len(claimed)
+        self.stats["batches"] += 1
+        self.stats["merged"] += sum(1 for _, merged in outcomes.values() if merged)
+        return [(seq, incident_id, merged) for seq, (incident_id, merged) in outcomes.items()]
+
+    @staticmethod
+    def _group(groups, i, ai_results, fingerprints, dedup):
+        """Joins report i to an earlier new incident of the batch it duplicates, else starts one."""
+        ai_result = ai_results[i]
+        if dedup and ai_result["location"] != "Unknown":
+            for members in groups:
+                first = ai_results[members[0]]
+                if first["location"] == ai_result["location"] \
+                        and category_family(first["category"]) == category_family(ai_result["category"]) \
+                        and similarity(fingerprints[members[0]], fingerprints[i]) >= event_index.min_similarity:
+                    members.append(i)
+                    return
+        groups.append([i])
+
+    # --- 5. STATUS ---
+    async def status(self, ticket):
+        return await self._run(self.queue.status, ticket)
+
+    async def snapshot(self):
+        return {
+            **(await self._run(self.queue.depth)),
+            "consumers": len(self._consumers),
+            "batch_size": self.batch_size,
+            **self.stats,
+        }
+
+ingest_service = IngestService(
+    DurableQueue(settings.INGEST_QUEUE_PATH, settings.INGEST_SYNCHRONOUS),
+    consumers=settings.INGEST_CONSUMERS,
+    batch_size=settings.INGEST_BATCH_SIZE,
+    lease_seconds=settings.INGEST_LEASE_SECONDS,
+    max_attempts=settings.INGEST_MAX_ATTEMPTS,
+    keep_seconds=settings.INGEST_KEEP_HOURS * 3600,
+)
@@ -0,0 +1,116 @@
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from app.core.config import settings
+from app.models import GazetteerVersion, Location
+from app.services.nlp.predictor import LEXICON_PATH
+from app.services.spatial import haversine_km
+
+# Fallback map target when the location is unknown (Ludhiana)
+DEFAULT_GEO_TARGET = [30.9010, 75.8573]
+
+class LocationIndex:
+    """
+    In-memory copy of the `locations` table (~26 rows), keyed by name and alias.
+
+    Loaded on first use and reloaded only when the gazetteer_version row changes
+    (checked at most every LOCATION_CACHE_CHECK_SECONDS), so predictions resolve
+    coordinates without a DB round-trip. Also holds the pre-encoded /locations
+    body and its ETag.
+    """
+
+    def __init__(self, check_seconds):
+        self.check_seconds = check_seconds
+        self.version = None
+        self.by_key = {}          # lowercased name/alias -> (lat, lng, type)
+        self.locations = []
+        self.body = b"[]"
+        self.etag = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._async_refreshing = False
+        self._aliases = self._load_aliases()
+
+    def _load_aliases(self):
+        # Same aliases the keyword matcher uses ("khanna" -> "Khanna Mandi")
+        try:
+            with open(LEXICON_PATH, encoding="utf-8") as f:
+                return {loc["name"]: loc["aliases"] for loc in json.load(f)["locations"]}
+        except (OSError, ValueError, KeyError):
+            return {}
+
+    def is_stale(self):
+        return self.version is None or time.monotonic() - self._checked_at >= self.check_seconds
+
+    def refresh(self, db, force=False):
+        if not force and not self.is_stale():
+            return
+
+        with self._lock:
+            if not force and not self.is_stale():
+                return
+            now = time.monotonic()
+            row = db.get(GazetteerVersion, 1)
+            version = row.version if row else 0
+            if force or version != self.version:
+                self._load(db, version)
+            self._checked_at = now
+
+    def _load(self, db, version):
+        rows = db.query(Location).order_by(Location.id).all()
+        locations = [
+            {"id": loc.id, "name": loc.name, "type": loc.type, "lat": loc.lat, "lng": loc.lng}
+            for loc in rows
+        ]
+
+        by_key = {}
+        for loc in locations:
+            entry = (loc["lat"], loc["lng"], loc["type"])
+            by_key[loc["name"].lower()] = entry
+            for alias in self._aliases.get(loc["name"], []):
+                by_key.setdefault(alias.lower(), entry)
+
+        body = json.dumps(locations).encode()
+        self.by_key = by_key
+        self.locations = locations
+        self.body = body
+        self.etag = f'"{version}-{hashlib.sha1(body).hexdigest()[:16]}"'
+        self.version = version
+        print(f"📍 Location index loaded: {len(locations)} nodes (gazetteer v{version})")
+
+    def get(self, name):
+        """(lat, lng, type) for a location name or alias, or None. Memory only."""
+        return self.by_key.get(name.lower())
+
+    def nearest(self, lat, lng, types=None, k=1):
+        """k closest gazetteer nodes (optionally only these types) with distance_km. Memory only."""
+        candidates = [
+            {**loc, "distance_km": round(haversine_km(lat, lng, loc["lat"], loc["lng"]), 3)}
+            for loc in self.locations
+            if loc["lat"] is not None and (not types or loc["type"] in types)
+        ]
+        return sorted(candidates, key=lambda loc: loc["distance_km"])[:k]
+
+    def lookup(self, db, name):
+        self.refresh(db)
+        return self.get(name)
+
+    async def refresh_async(self, db):
+        # AsyncSession: run the (rare) reload through run_sync, skip it entirely when fresh.
+        # Coroutines share the loop thread, so only one may hold the thread lock at a time:
+        # the others serve the current copy (or wait for the very first load).
+        while self.is_stale():
+            if not self._async_refreshing:
+                self._async_refreshing = True
+                try:
+                    await db.run_sync(self.refresh)
+                finally:
+                    self._async_refreshing = False
+                return
+            if self.version is not None:
+                return
+            await asyncio.sleep(0.005)
+
+location_index = LocationIndex(settings.LOCATION_CACHE_CHECK_SECONDS)
@@ -0,0 +1,201 @@
+import threading
+import time
+from bisect import bisect_left
+
+# Upper bounds (seconds) for stage/request latency histograms: 50us .. 10s
+LATENCY_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Histogram:
+    """Prometheus-style histogram (cumulative buckets, _sum, _count) per label set."""
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}   # label values -> [per-bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[i] += 1
+            series[-1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {labels: list(values) for labels, values in self._series.items()}
+        for labels, values in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), values):
+                cumulative += count
+                le = _labels(self.labelnames + ("le",), labels + (_number(bound),))
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            base = _labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{base} {values[-1]!r}")
+            lines.append(f"{self.name}_count{base} {cumulative}")
+        return lines
+
+class Counter:
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def total(self):
+        with self._lock:
+            return sum(self._values.values())
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = dict(self._values)
+        for labels, value in sorted(values.items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {value}")
+        return lines
+
+class Registry:
+    """
+    Metrics of this process, rendered in the Prometheus text format. Collectors are
+    callables returning (name, type, help, {label tuple: value}, labelnames) for
+    numbers other services already keep (cache hits, batch counts, ...).
+    """
+
+    def __init__(self):
+        self.metrics = []
+        self.collectors = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector):
+        self.collectors.append(collector)
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        for collector in self.collectors:
+            for name, kind, help, values, labelnames in collector():
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in values.items():
+                    lines.append(f"{name}{_labels(labelnames, labels)} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+STAGE_SECONDS = registry.register(Histogram(
+    "rlis_stage_seconds", "Time spent in each stage of a request.", ("endpoint", "stage"),
+))
+REQUEST_SECONDS = registry.register(Histogram(
+    "rlis_http_request_seconds", "End-to-end HTTP request time (per route template).", ("method", "route", "status"),
+))
+REQUESTS = registry.register(Counter(
+    "rlis_http_requests_total", "HTTP requests handled.", ("method", "route", "status"),
+))
+
+class StageTimer:
+    """
+    Per-request stage clock (perf_counter_ns):
+
+        timer = StageTimer("predict")
+        with timer.stage("db_commit"):
+            await db.commit()
+        timer.finish()   # -> histograms; timer.breakdown() -> {stage: ms}
+
+    Stages measured elsewhere (e.g. inside a micro-batch) are added with add().
+    """
+
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.started = time.perf_counter_ns()
+        self.stages = {}    # stage -> ns (repeated stages accumulate)
+
+    def stage(self, name):
+        return _Stage(self, name)
+
+    def add(self, name, ns):
+        self.stages[name] = self.stages.get(name, 0) + ns
+
+    def elapsed_ns(self):
+        return time.perf_counter_ns() - self.started
+
+    def breakdown(self):
+        out = {name: round(ns / 1e6, 3) for name, ns in self.stages.items()}
+        out["total"] = round(self.elapsed_ns() / 1e6, 3)
+        return out
+
+    def finish(self):
+        for name, ns in self.stages.items():
+            STAGE_SECONDS.observe(ns / 1e9, self.endpoint, name)
+        STAGE_SECONDS.observe(self.elapsed_ns() / 1e9, self.endpoint, "total")
+
+class _Stage:
+    __slots__ = ("timer", "name", "started")
+
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.timer.add(self.name, time.perf_counter_ns() - self.started)
+
+class RequestMetricsMiddleware:
+    """
+    ASGI middleware: request count + latency per route template ("/incidents/{incident_id}",
+    not every id). Plain ASGI rather than BaseHTTPMiddleware so streaming responses pass
+    straight through; for those the time runs until the stream closes.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter_ns()
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            labels = (scope["method"], getattr(route, "path", "unmatched"), str(status[0]))
+            REQUEST_SECONDS.observe((time.perf_counter_ns() - started) / 1e9, *labels)
+            REQUESTS.inc(*labels)
@@ -0,0 +1,28 @@
+from sqlalchemy import text
+from app.core.database import Base, add_missing_columns
+from app.models import Incident
+from app.services import partitions, spatial
+
+def migrate(engine):
+    """
+    Brings the database schema up to date (idempotent): tables (on Postgres `incidents`
+    as the partitioned parent), columns and indexes added since the table was created,
+    PostGIS, and this month's + upcoming partitions.
+
+    Runs once per deploy: scripts/serve.py runs it in the master before forking
+    workers, scripts/migrate.py runs it on its own. A plain `uvicorn app.main:app`
+    runs it at startup (MIGRATE_ON_STARTUP).
+    """
+    partitions.create_parent(engine)
+    Base.metadata.create_all(bind=engine)
+    # create_all skips tables that already exist, so add any new columns, then new indexes
+    add_missing_columns(engine, Incident.__table__)
+    for index in Incident.__table__.indexes:
+        index.create(bind=engine, checkfirst=True)
+    if engine.dialect.name == "sqlite":
+        # Rows from the old CURRENT_TIMESTAMP default lack microseconds and would sort
+        # apart from equal cursor values (SQLite compares DateTime as text)
+        with engine.begin() as conn:
+            conn.execute(text("UPDATE incidents SET timestamp = timestamp || '.000000' WHERE length(timestamp) = 19"))
+    spatial.ensure_schema(engine)
+    partitions.ensure_upcoming(engine)
@@ -0,0 +1,175 @@
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from app.core.config import settings
+from app.services.nlp.predictor import IncidentPredictor, predictor
+
+# Batch-size histogram buckets (upper bounds, last one catches everything above)
+BATCH_SIZE_BUCKETS = [1, 2, 4, 8, 16, 32, 64, 128, 256]
+
+# --- Process pool workers: each child loads its own predictor once ---
+_worker_predictor = None
+
+def _init_worker():
+    global _worker_predictor
+    _worker_predictor = IncidentPredictor()
+    _worker_predictor.ensure_loaded()
+    _worker_predictor.start_watching()
+
+def _predict_in_worker(texts):
+    timings = {}
+    return _worker_predictor.predict_batch(texts, timings), timings
+
+class BatchStats:
+    """Counters the ops team uses to tune the batching window."""
+
+    def __init__(self, sample_size=2048):
+        self.batches = 0
+        self.items = 0
+        self.errors = 0
+        self.size_buckets = [0] * (len(BATCH_SIZE_BUCKETS) + 1)
+        self.queue_waits_ms = deque(maxlen=sample_size)
+        self.batch_times_ms = deque(maxlen=sample_size)
+
+    def record(self, size, waits_ms, batch_ms):
+        self.batches += 1
+        self.items += size
+        for i, bound in enumerate(BATCH_SIZE_BUCKETS):
+            if size <= bound:
+                self.size_buckets[i] += 1
+                break
+        else:
+            self.size_buckets[-1] += 1
+        self.queue_waits_ms.extend(waits_ms)
+        self.batch_times_ms.append(batch_ms)
+
+    def snapshot(self):
+        labels = [f"<={b}" for b in BATCH_SIZE_BUCKETS] + [f">{BATCH_SIZE_BUCKETS[-1]}"]
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "errors": self.errors,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0,
+            "batch_size_histogram": dict(zip(labels, self.size_buckets)),
+            "queue_wait_ms": _percentiles(self.queue_waits_ms),
+            "batch_time_ms": _percentiles(self.batch_times_ms),
+        }
+
+def _percentiles(samples):
+    if not samples:
+        return {"p50": 0, "p90": 0, "p99": 0, "max": 0}
+    ordered = sorted(samples)
+    pick = lambda q: round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 3)
+    return {"p50": pick(0.50), "p90": pick(0.90), "p99": pick(0.99), "max": round(ordered[-1], 3)}
+
+class PredictionService:
+    """
+    Micro-batching front door for IncidentPredictor.
+
+    Concurrent /predict calls are queued; a collector task takes the first waiting
+    text, keeps gathering for up to `window_ms` (or until `max_batch` texts), then
+    runs ONE vectorized predict_batch and hands each caller its own result.
+    Batches run in the predictor's thread executor, or in a process pool when
+    `processes` > 0 (one batch in flight per process).
+    """
+
+    def __init__(self, predictor, window_ms, max_batch, processes=0):
+        self.predictor = predictor
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self.processes = processes
+        self.stats = BatchStats()
+        self._pool = None
+        self._loop = None
+        self._queue = None
+        self._slots = None
+        self._task = None
+
+    @property
+    def enabled(self):
+        return self.max_batch > 1
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        # (Re)bind to the running loop: queues and tasks can't cross event loops
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.processes or settings.PREDICT_THREADS)
+        if self.processes and self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.processes, initializer=_init_worker)
+        self._task = loop.create_task(self._collect())
+
+    async def predict(self, text, timer=None):
+        """`timer` (a StageTimer) gets queue_wait plus the inference/keyword time of the batch it rode in."""
+        # A sampled fraction is re-scored by the candidate model on the shadow thread (if one is set)
+        self.predictor.registry.offer_shadow([text])
+        if not self.enabled:
+            timings = {}
+            result = await self.predictor.predict_async(text, timings)
+            if timer is not None:
+                for stage, ns in timings.items():
+                    timer.add(stage, ns)
+            return result
+
+        self._ensure_started()
+        future = self._loop.create_future()
+        self._queue.put_nowait((text, future, time.perf_counter_ns(), timer))
+        return await future
+
+    async def _collect(self):
+        while True:
+            batch = [await self._queue.get()]
+            deadline = self._loop.time() + self.window
+
+            while len(batch) < self.max_batch:
+                timeout = deadline - self._loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            # Wait for a free executor slot, then let the batch run while we collect the next one
+            await self._slots.acquire()
+            self._loop.create_task(self._run_batch(batch))
+
+    async def _run_batch(self, batch):
+        started = time.perf_counter_ns()
+        texts = [text for text, _, _, _ in batch]
+        try:
+            if self._pool is not None:
+                results, timings = await self._loop.run_in_executor(self._pool, _predict_in_worker, texts)
+            else:
+                timings = {}
+                results = await self.predictor.predict_batch_async(texts, timings)
+        except Exception as e:
+            self.stats.errors += 1
+            for _, future, _, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self._slots.release()
+
+        # Every request in the batch waited for the whole batch, so each gets its full timings
+        for (_, future, enqueued, timer), result in zip(batch, results):
+            if timer is not None:
+                timer.add("queue_wait", started - enqueued)
+                for stage, ns in timings.items():
+                    timer.add(stage, ns)
+            if not future.done():
+                future.set_result(result)
+
+        waits = [(started - enqueued) / 1e6 for _, _, enqueued, _ in batch]
+        self.stats.record(len(batch), waits, (time.perf_counter_ns() - started) / 1e6)
+
+prediction_service = PredictionService(
+    predictor,
+    window_ms=settings.PREDICT_MICROBATCH_WINDOW_MS,
+    max_batch=settings.PREDICT_MICROBATCH_SIZE,
+    processes=settings.PREDICT_PROCESSES,
+)
@@ -0,0 +1,80 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+
+_SPACES = re.compile(r"\s+")
+
+def normalize_text(text):
+    """
+    Cache key for a driver message: lowercase, whitespace collapsed.
+    "Road clear,  reaching on time." and "road clear, reaching on time." share one entry.
+    Punctuation is kept: the keyword rules match lexicon terms like "nh-44" literally,
+    so "brake-fail" and "brake fail" can classify differently. The predictor runs every
+    text through this on the uncached path too, so results never depend on the cache.
+    """
+    return _SPACES.sub(" ", text.lower()).strip()
+
+class PredictionCache:
+    """Thread-safe bounded LRU with per-entry TTL, plus hit/miss/eviction counters."""
+
+    def __init__(self, max_size, ttl_seconds):
+        self.max_size = max_size
+        self.ttl = ttl_seconds
+        self._data = OrderedDict()  # key -> (value, expires_at)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self):
+        return self.max_size > 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        expires_at = time.monotonic() + self.ttl if self.ttl > 0 else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            if self._data:
+                self.invalidations += 1
+            self._data.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
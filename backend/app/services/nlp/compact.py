@@ -0,0 +1,164 @@
+import json
+import os
+import re
+from functools import lru_cache
+import numpy as np
+
+# Files written next to the pickle by `python train_nlp.py` (see export_compact)
+META_FILE = "meta.json"
+VOCAB_FILE = "vocab.json"
+IDF_FILE = "idf.npy"
+WEIGHTS_FILE = "weights.npy"          # NB feature_log_prob_, transposed: (n_features, n_classes)
+PRIOR_FILE = "class_log_prior.npy"
+
+def export_compact(pipeline, out_dir):
+    """
+    Flattens a fitted CountVectorizer -> TfidfTransformer -> MultinomialNB pipeline
+    (or the incremental HashingVectorizer -> MultinomialNB one) into plain JSON + .npy
+    files. Only reads fitted attributes, so sklearn is needed here (training time)
+    but never by the serving path.
+    """
+    vect = pipeline.named_steps["vect"]
+    clf = pipeline.named_steps["clf"]
+    hashing = not hasattr(vect, "vocabulary_")
+
+    os.makedirs(out_dir, exist_ok=True)
+    meta = {
+        "classes": [str(c) for c in clf.classes_],
+        "vectorizer": "hashing" if hashing else "count",
+        "ngram_range": list(vect.ngram_range),
+        "lowercase": vect.lowercase,
+        "token_pattern": vect.token_pattern,
+    }
+    if hashing:
+        meta.update({"n_features": vect.n_features, "alternate_sign": vect.alternate_sign, "norm": vect.norm, "sublinear_tf": False})
+    else:
+        tfidf = pipeline.named_steps["tfidf"]
+        meta.update({"norm": tfidf.norm, "sublinear_tf": tfidf.sublinear_tf})
+    with open(os.path.join(out_dir, META_FILE), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+
+    # Plain (uncompressed) .npy so workers can memory-map them
+    if not hashing:
+        with open(os.path.join(out_dir, VOCAB_FILE), "w", encoding="utf-8") as f:
+            json.dump({term: int(i) for term, i in vect.vocabulary_.items()}, f)
+        np.save(os.path.join(out_dir, IDF_FILE), np.ascontiguousarray(pipeline.named_steps["tfidf"].idf_, dtype=np.float64))
+    np.save(os.path.join(out_dir, WEIGHTS_FILE), np.ascontiguousarray(clf.feature_log_prob_.T, dtype=np.float64))
+    np.save(os.path.join(out_dir, PRIOR_FILE), np.ascontiguousarray(clf.class_log_prior_, dtype=np.float64))
+
+def murmurhash3_32(data, seed=0):
+    """MurmurHash3 x86_32 of bytes as a signed int, same as sklearn.utils.murmurhash3_32."""
+    c1, c2 = 0xcc9e2d51, 0x1b873593
+    h = seed
+    nblocks = len(data) // 4
+    for i in range(0, nblocks * 4, 4):
+        k = int.from_bytes(data[i:i + 4], "little")
+        k = (k * c1) & 0xFFFFFFFF
+        k = ((k << 15) | (k >> 17)) & 0xFFFFFFFF
+        h ^= (k * c2) & 0xFFFFFFFF
+        h = ((h << 13) | (h >> 19)) & 0xFFFFFFFF
+        h = (h * 5 + 0xe6546b64) & 0xFFFFFFFF
+
+    tail = data[nblocks * 4:]
+    if tail:
+        k = int.from_bytes(tail, "little")
+        k = (k * c1) & 0xFFFFFFFF
+        k = ((k << 15) | (k >> 17)) & 0xFFFFFFFF
+        h ^= (k * c2) & 0xFFFFFFFF
+
+    h ^= len(data)
+    h ^= h >> 16
+    h = (h * 0x85ebca6b) & 0xFFFFFFFF
+    h ^= h >> 13
+    h = (h * 0xc2b2ae35) & 0xFFFFFFFF
+    h ^= h >> 16
+    return h - (1 << 32) if h & 0x80000000 else h
+
+@lru_cache(maxsize=1 << 18)
+def _hashed_feature(term, n_features):
+    """(column, sign) exactly as HashingVectorizer places `term`. Cached: n-grams repeat a lot."""
+    h = murmurhash3_32(term.encode("utf-8"))
+    if h == -2147483648:
+        return (2147483647 - (n_features - 1)) % n_features, -1
+    return abs(h) % n_features, (1 if h >= 0 else -1)
+
+class CompactNBClassifier:
+    """
+    sklearn-free re-implementation of the training pipeline's predict():
+    word n-gram lookup -> tf * idf -> l2 norm -> argmax(x . log P(w|c) + log P(c)).
+
+    The numeric arrays are memory-mapped read-only, so every uvicorn worker on the
+    box shares the same physical pages instead of unpickling its own copy.
+    """
+
+    def __init__(self, model_dir):
+        with open(os.path.join(model_dir, META_FILE), encoding="utf-8") as f:
+            meta = json.load(f)
+
+        # Hashed models (incremental training) have no vocabulary and no idf
+        self.hashing = meta.get("vectorizer") == "hashing"
+        if self.hashing:
+            self.vocabulary = None
+            self.n_features = meta["n_features"]
+            self.alternate_sign = meta["alternate_sign"]
+        else:
+            with open(os.path.join(model_dir, VOCAB_FILE), encoding="utf-8") as f:
+                self.vocabulary = json.load(f)
+
+        self.classes = np.array(meta["classes"], dtype=object)
+        self.min_n, self.max_n = meta["ngram_range"]
+        self.lowercase = meta["lowercase"]
+        self.token_re = re.compile(meta["token_pattern"])
+        self.norm = meta["norm"]
+        self.sublinear_tf = meta["sublinear_tf"]
+
+        self.idf = None if self.hashing else np.load(os.path.join(model_dir, IDF_FILE), mmap_mode="r")
+        self.weights = np.load(os.path.join(model_dir, WEIGHTS_FILE), mmap_mode="r")
+        self.class_log_prior = np.load(os.path.join(model_dir, PRIOR_FILE), mmap_mode="r")
+
+    @staticmethod
+    def exists(model_dir):
+        return all(os.path.exists(os.path.join(model_dir, name)) for name in (META_FILE, WEIGHTS_FILE, PRIOR_FILE))
+
+    def _features(self, text):
+        """Counts of known n-grams in one text, as {feature_index: count}."""
+        if self.lowercase:
+            text = text.lower()
+        tokens = self.token_re.findall(text)
+        counts = {}
+        vocab = self.vocabulary
+        for n in range(self.min_n, self.max_n + 1):
+            for i in range(len(tokens) - n + 1):
+                term = tokens[i] if n == 1 else " ".join(tokens[i:i + n])
+                if self.hashing:
+                    idx, sign = _hashed_feature(term, self.n_features)
+                    counts[idx] = counts.get(idx, 0) + (sign if self.alternate_sign else 1)
+                    continue
+                idx = vocab.get(term)
+                if idx is not None:
+                    counts[idx] = counts.get(idx, 0) + 1
+        return counts
+
+    def predict(self, texts):
+        labels = []
+        for text in texts:
+            counts = self._features(text)
+            if not counts:
+                # Empty vector: NB falls back to the class prior
+                labels.append(self.classes[int(np.argmax(self.class_log_prior))])
+                continue
+
+            idx = np.fromiter(counts.keys(), dtype=np.intp, count=len(counts))
+            tf = np.fromiter(counts.values(), dtype=np.float64, count=len(counts))
+            if self.sublinear_tf:
+                tf = np.log(tf) + 1
+            x = tf * self.idf[idx] if self.idf is not None else tf
+            if self.norm == "l2":
+                x /= np.sqrt(np.dot(x, x))
+            elif self.norm == "l1":
+                x /= np.abs(x).sum()
+
+            # Sparse dot product: only the rows for n-grams present in the text
+            scores = x @ self.weights[idx] + self.class_log_prior
+            labels.append(self.classes[int(np.argmax(scores))])
+        return np.array(labels, dtype=object)
@@ -0,0 +1,86 @@
+import json
+import os
+import shutil
+import time
+
+# Versioned output of `python train_nlp.py --incremental`:
+#   app/ml_models/incremental/v0001/{state.joblib, compact/, training.json}
+#   app/ml_models/incremental/CURRENT   <- name of the version being served
+# Version directories are never modified after publish; switching models is one
+# atomic rename of CURRENT, which the predictor notices and hot-swaps.
+INCREMENTAL_DIR = os.path.join("app", "ml_models", "incremental")
+CURRENT_FILE = "CURRENT"
+STATE_FILE = "state.joblib"      # Fitted pipeline (NB counts) to continue partial_fit from
+INFO_FILE = "training.json"
+COMPACT_SUBDIR = "compact"
+
+DEFAULT_N_FEATURES = 2 ** 18
+
+def new_pipeline(n_features=DEFAULT_N_FEATURES):
+    """HashingVectorizer -> MultinomialNB: stateless features, so it can learn chunk by chunk."""
+    from sklearn.feature_extraction.text import HashingVectorizer
+    from sklearn.naive_bayes import MultinomialNB
+    from sklearn.pipeline import Pipeline
+
+    return Pipeline([
+        # Same n-grams/tokens as the batch model; no idf (it needs the whole corpus up front)
+        ('vect', HashingVectorizer(ngram_range=(1, 2), n_features=n_features, alternate_sign=False, norm="l2")),
+        ('clf', MultinomialNB()),
+    ])
+
+def partial_fit(pipeline, texts, labels, classes):
+    X = pipeline.named_steps["vect"].transform(texts)
+    pipeline.named_steps["clf"].partial_fit(X, labels, classes=classes)
+
+def current_version(root=INCREMENTAL_DIR):
+    """Directory of the version CURRENT points at, or None."""
+    try:
+        with open(os.path.join(root, CURRENT_FILE), encoding="utf-8") as f:
+            name = f.read().strip()
+    except OSError:
+        return None
+    path = os.path.join(root, name)
+    return path if name and os.path.isdir(path) else None
+
+def list_versions(root=INCREMENTAL_DIR):
+    if not os.path.isdir(root):
+        return []
+    return sorted(name for name in os.listdir(root) if name.startswith("v") and name[1:].isdigit())
+
+def load_version(path):
+    import joblib
+
+    with open(os.path.join(path, INFO_FILE), encoding="utf-8") as f:
+        info = json.load(f)
+    return joblib.load(os.path.join(path, STATE_FILE)), info
+
+def publish_version(pipeline, info, root=INCREMENTAL_DIR):
+    """Writes the next vNNNN directory completely, then points CURRENT at it. Returns its path."""
+    import joblib
+    from app.services.nlp.compact import export_compact
+
+    os.makedirs(root, exist_ok=True)
+    versions = list_versions(root)
+    name = f"v{int(versions[-1][1:]) + 1 if versions else 1:04d}"
+    final = os.path.join(root, name)
+    staging = final + ".tmp"
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+
+    # 1. Everything goes into a staging dir first (readers never see a partial version)
+    joblib.dump(pipeline, os.path.join(staging, STATE_FILE))
+    export_compact(pipeline, os.path.join(staging, COMPACT_SUBDIR))
+    info = {**info, "version": name, "published": time.strftime("%Y-%m-%d %H:%M:%S")}
+    with open(os.path.join(staging, INFO_FILE), "w", encoding="utf-8") as f:
+        json.dump(info, f, indent=2)
+    os.rename(staging, final)
+
+    # 2. Atomic switch
+    set_current(name, root)
+    return final
+
+def set_current(name, root=INCREMENTAL_DIR):
+    tmp = os.path.join(root, CURRENT_FILE + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(name)
+    os.replace(tmp, os.path.join(root, CURRENT_FILE))
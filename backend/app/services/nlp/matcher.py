@@ -0,0 +1,85 @@
+import json
+import re
+
+# Rank used when a term does not belong to that kind (rules or locations)
+NO_MATCH = 1 << 30
+
+class KeywordMatcher:
+    """
+    Finds every priority keyword and location alias in ONE regex pass.
+
+    Built once from the lexicon (see lexicon.json). Rules and locations are
+    ranked by their order in the file: the first rule/location hit wins, exactly
+    like the old if/elif chains, no matter where in the text it appears.
+    """
+
+    def __init__(self, priority_rules, locations):
+        self.rules = [(rule["priority"], rule["category"]) for rule in priority_rules]
+        self.locations = [loc["name"] for loc in locations]
+
+        # term -> [best rule rank, best location rank]
+        ranks = {}
+        for rank, rule in enumerate(priority_rules):
+            for kw in rule["keywords"]:
+                entry = ranks.setdefault(kw.lower(), [NO_MATCH, NO_MATCH])
+                entry[0] = min(entry[0], rank)
+        for rank, loc in enumerate(locations):
+            for alias in loc["aliases"]:
+                entry = ranks.setdefault(alias.lower(), [NO_MATCH, NO_MATCH])
+                entry[1] = min(entry[1], rank)
+
+        # The regex reports only the longest term at each position, so a term also
+        # carries the ranks of every shorter term it starts with ("chakka jam" vs "chakka")
+        self._ranks = {}
+        for term in ranks:
+            rule_rank, loc_rank = ranks[term]
+            for other, (other_rule, other_loc) in ranks.items():
+                if other != term and term.startswith(other):
+                    rule_rank = min(rule_rank, other_rule)
+                    loc_rank = min(loc_rank, other_loc)
+            self._ranks[term] = (rule_rank, loc_rank)
+
+        # Trie-shaped alternation (no backtracking over 100s of literals) inside a
+        # zero-width lookahead so overlapping terms ("rajpurain") are all seen
+        alternation = _trie_regex(self._ranks)
+        self._pattern = re.compile(f"(?=({alternation}))") if alternation else None
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, encoding="utf-8") as f:
+            lexicon = json.load(f)
+        return cls(lexicon["priority_rules"], lexicon["locations"])
+
+    def match(self, text_lower):
+        """Returns ((priority, category) or None, location name or None)."""
+        best_rule, best_loc = NO_MATCH, NO_MATCH
+        if self._pattern is not None:
+            for term in self._pattern.findall(text_lower):
+                rule_rank, loc_rank = self._ranks[term]
+                if rule_rank < best_rule: best_rule = rule_rank
+                if loc_rank < best_loc: best_loc = loc_rank
+
+        rule = self.rules[best_rule] if best_rule != NO_MATCH else None
+        location = self.locations[best_loc] if best_loc != NO_MATCH else None
+        return rule, location
+
+
+def _trie_regex(terms):
+    """Compiles literals into a prefix-shared regex: ["fog", "fire"] -> "f(?:ire|og)"."""
+    trie = {}
+    for term in terms:
+        node = trie
+        for ch in term:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def build(node):
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch != ""]
+        if not branches:
+            return ""
+        if len(branches) == 1 and "" not in node:
+            return branches[0]
+        group = "(?:" + "|".join(branches) + ")"
+        return group + "?" if "" in node else group
+
+    return build(trie)
@@ -1,94 +1,196 @@
-import joblib
+import asyncio
 import os
-import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from app.core.config import settings
+from app.services.nlp.cache import PredictionCache, normalize_text
+from app.services.nlp.registry import ModelRegistry
+from app.services.nlp.matcher import KeywordMatcher
+from app.services.nlp.resolver import LocationResolver
 
-MODEL_PATH = os.path.join("app", "ml_models", "punjab_logistics_v1", "incident_classifier.pkl")
+# Keywords & location aliases live in data so the lexicon can grow without code changes
+LEXICON_PATH = os.path.join("app", "services", "nlp", "lexicon.json")
+
+# Dedicated threads for CPU-bound sklearn calls so async handlers never block the event loop
+# and inference can't starve the default threadpool used by sync endpoints
+_executor = ThreadPoolExecutor(max_workers=settings.PREDICT_THREADS, thread_name_prefix="rlis-predict")
+
+def _stat(path):
+    try:
+        st = os.stat(path)
+        return st.st_mtime_ns, st.st_size
+    except OSError:
+        return None
 
 class IncidentPredictor:
     def __init__(self):
         self.model = None
-        self._load_model()
+        self.model_version = None
+        self.generation = 0
+        self.loaded = False
+        self.cache = PredictionCache(settings.PREDICT_CACHE_SIZE, settings.PREDICT_CACHE_TTL_SECONDS)
+        self.registry = ModelRegistry()
+        self._watcher = None
+        self._lexicon_stat = None
+        self._refresh_lock = threading.Lock()
+        # Nothing is read from disk here: importing the app stays cheap, and the lexicon +
+        # model (numpy / sklearn) load in the startup readiness step or on first use
 
-    def _load_model(self):
-        if os.path.exists(MODEL_PATH):
-            try:
-                self.model = joblib.load(MODEL_PATH)
-                print(f"✅ AI Model Loaded from {MODEL_PATH}")
-            except Exception as e:
-                print(f"❌ Failed to load model: {e}")
-        else:
-            print(f"⚠️ Model not found at {MODEL_PATH}. Using fallback logic.")
-
-    def predict(self, text):
-        text_lower = text.lower()
-        
-        # 1. AI PREDICTION
-        category = "General"
-        if self.model:
+    def ensure_loaded(self):
+        """Loads lexicon + model once; every entry point calls this first."""
+        if self.loaded:
+            return
+        with self._refresh_lock:
+            if not self.loaded:
+                self.reload()
+
+    def reload(self):
+        """(Re)loads lexicon + model and drops cached results computed with the old ones."""
+        self._load_lexicon()
+        self.registry.sync()
+        self.model_version, self.model = self.registry.active
+        if self.model is None:
+            print("⚠️ No model found under app/ml_models. Using fallback logic.")
+        self.generation += 1
+        self.cache.clear()
+        self.loaded = True
+
+    def refresh(self):
+        """
+        Picks up a new model version / registry.json selection / lexicon edit. Everything is
+        loaded first and then swapped in by reference, so requests never see a half-loaded
+        model and in-flight ones finish on the old one.
+        """
+        if not self.loaded:
+            return self.ensure_loaded()
+        with self._refresh_lock:
+            changed = False
+            lexicon_stat = _stat(LEXICON_PATH)
+            if lexicon_stat != self._lexicon_stat:
+                self._load_lexicon()
+                print("🔄 Lexicon changed, keyword rules reloaded")
+                changed = True
+            if self.registry.sync():
+                self.model_version, self.model = self.registry.active
+                changed = True
+            if changed:
+                self.generation += 1
+                self.cache.clear()
+
+    def _load_lexicon(self):
+        self.matcher = KeywordMatcher.from_file(LEXICON_PATH)
+        self.resolver = LocationResolver.from_file(LEXICON_PATH, min_confidence=settings.LOCATION_MIN_CONFIDENCE)
+        self._lexicon_stat = _stat(LEXICON_PATH)
+
+    def start_watching(self):
+        """Background thread that calls refresh() every MODEL_WATCH_SECONDS (no restarts for new models)."""
+        if self._watcher is not None:
+            return
+
+        def watch():
+            while True:
+                time.sleep(settings.MODEL_WATCH_SECONDS)
+                try:
+                    self.refresh()
+                except Exception as e:
+                    print(f"❌ Model watcher error: {e}")
+
+        self._watcher = threading.Thread(target=watch, name="rlis-model-watch", daemon=True)
+        self._watcher.start()
+
+    def predict(self, text, timings=None):
+        """`timings` (optional dict) accumulates perf_counter_ns spent in "inference" and "keyword"."""
+        self.ensure_loaded()
+        if not self.cache.enabled:
+            return self._predict_uncached(text, timings)
+
+        # Repeated / near-duplicate messages skip the model entirely
+        key = normalize_text(text)
+        generation = self.generation
+        result = self.cache.get(key)
+        if result is None:
+            result = self._predict_uncached(key, timings)
+            # Don't store a result computed just before a reload
+            if generation == self.generation:
+                self.cache.put(key, result)
+        return dict(result)
+
+    def _predict_uncached(self, text, timings=None):
+        return self._predict_batch_uncached([text], timings)[0]
+
+    async def predict_async(self, text, timings=None):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_executor, self.predict, text, timings)
+
+    async def predict_batch_async(self, texts, timings=None):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_executor, self.predict_batch, texts, timings)
+
+    def predict_batch(self, texts, timings=None):
+        """Classifies a list of texts with ONE vectorized model call, results in input order."""
+        texts = list(texts)
+        if not texts:
+            return []
+        self.ensure_loaded()
+
+        if not self.cache.enabled:
+            return self._predict_batch_uncached(texts, timings)
+
+        # Only cache misses go to the model (each distinct key once)
+        keys = [normalize_text(text) for text in texts]
+        generation = self.generation
+        results = [self.cache.get(key) for key in keys]
+        missing = list(dict.fromkeys(key for key, result in zip(keys, results) if result is None))
+        if missing:
+            fresh = dict(zip(missing, self._predict_batch_uncached(missing, timings)))
+            if generation == self.generation:
+                for key, result in fresh.items():
+                    self.cache.put(key, result)
+            results = [result if result is not None else fresh[key] for key, result in zip(keys, results)]
+        return [dict(result) for result in results]
+
+    def _predict_batch_uncached(self, texts, timings=None):
+        # Same input as a cache key (idempotent), so cache on/off can't change a result
+        texts = [normalize_text(text) for text in texts]
+        # 1. AI PREDICTION (single pass through the pipeline for the whole batch)
+        started = time.perf_counter_ns()
+        categories = ["General"] * len(texts)
+        model = self.model  # One read: a concurrent swap can't split this call across models
+        if model:
             try:
-                category = self.model.predict([text])[0]
+                categories = list(model.predict(texts))
             except:
                 pass
+        inferred = time.perf_counter_ns()
+
+        # 2. KEYWORD LAYER (per text, same rules as predict)
+        results = [self._apply_rules(text, category) for text, category in zip(texts, categories)]
+        if timings is not None:
+            timings["inference"] = timings.get("inference", 0) + inferred - started
+            timings["keyword"] = timings.get("keyword", 0) + time.perf_counter_ns() - inferred
+        return results
+
+    def _apply_rules(self, text, category):
+        # 2 + 3. LOCATION & PRIORITY KEYWORDS (one pass, Critical > High > Med > Low)
+        text_lower = text.lower()
+        rule, location = self.matcher.match(text_lower)
+        confidence = 1.0 if location else 0.0
+        # 2b. Misspelt / vowel-dropped place names ("amrtsr gt", "sirhnd"); on a tie with an
+        # exact alias the resolver's pick wins, it prefers longer names ("ferozepur rasta")
+        resolved = self.resolver.resolve(text_lower)
+        if resolved and resolved[1] >= confidence:
+            location, confidence = resolved
 
-        # 2. LOCATION LOGIC (Matches DB Names Exactly)
-        location = "Unknown"
-        if "ludhiana" in text_lower: location = "Ludhiana Transport Nagar"
-        elif "khanna" in text_lower: location = "Khanna Mandi"
-        elif "moga" in text_lower: location = "Moga Grain Market"
-        elif "phagwara" in text_lower: location = "Phagwara"  # Now exists in DB
-        elif "rajpura" in text_lower: location = "Rajpura Toll"
-        elif "sahnewal" in text_lower: location = "Sahnewal Mandi"
-        elif "doraha" in text_lower: location = "Doraha"
-        
-        # 3. PRIORITY & KEYWORD LOGIC (Comprehensive List)
         priority = "Low"
-        
-        # --- CRITICAL (Red) ---
-        critical_keywords = [
-            "accident", "fire", "leak", "blast", "explosion", 
-            "palat", "overturned", "collision", "thuk", "takkar",
-            "casualty", "dead", "dangerous", "chemical", "emergency",
-            "crash", "oil spill", "pile up", "brake fail", "jal gya", "burst"
-        ]
-        
-        # --- HIGH (Orange) ---
-        high_keywords = [
-            "jam", "blocked", "stuck", "chakka jam", "gridlock", 
-            "fas gaye", "not moving", "closed", "dharna", "protest",
-            "packed", "rush", "crawling", "long line", "lambi line", "stopped"
-        ]
-        
-        # --- MEDIUM (Yellow) ---
-        medium_keywords = [
-            "fog", "dhund", "smog", "rain", "slow", "heavy traffic", 
-            "wait", "queue", "visibility", "storm", "wind", "tree fallen",
-            "water logging", "slippery", "smoke"
-        ]
-
-        # --- LOW (Green) - Explicit Check ---
-        low_keywords = [
-            "clear", "smooth", "reached", "unload", "safe", 
-            "good", "open", "normal", "leaving", "done", "complete", "khul gya"
-        ]
-
-        # LOGIC CHAIN (Order Matters: Critical > High > Med > Low)
-        if any(w in text_lower for w in critical_keywords):
-            priority = "Critical"
-            category = "Accident/Hazard"
-        elif any(w in text_lower for w in high_keywords):
-            priority = "High"
-            category = "Traffic Jam"
-        elif any(w in text_lower for w in medium_keywords):
-            priority = "Medium"
-            category = "Weather/Slow"
-        elif any(w in text_lower for w in low_keywords):
-            priority = "Low"
-            category = "Logistics Update"
+        if rule:
+            priority, category = rule
 
         return {
             "category": category.title(),
             "priority": priority,
-            "location": location,
+            "location": location or "Unknown",
+            "location_confidence": confidence,
             "sentiment_score": "Negative" if priority in ["Critical", "High"] else "Neutral"
         }
 
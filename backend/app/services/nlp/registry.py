@@ -0,0 +1,263 @@
+import json
+import os
+import random
+import re
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from app.core.config import settings
+from app.services.nlp import incremental
+
+ML_MODELS_DIR = os.path.join("app", "ml_models")
+# Which versions to serve, shared by every worker process: {"active", "candidate", "shadow_fraction"}
+REGISTRY_FILE = os.path.join(ML_MODELS_DIR, "registry.json")
+PICKLE_FILE = "incident_classifier.pkl"
+COMPACT_SUBDIR = "compact"
+
+def _version_number(name):
+    match = re.search(r"(\d+)$", name)
+    return int(match.group(1)) if match else -1
+
+def _fingerprint(path):
+    """(name, mtime, size) of every file under a version dir; changes when it is re-exported."""
+    out = []
+    for base, _, files in os.walk(path):
+        for name in sorted(files):
+            try:
+                st = os.stat(os.path.join(base, name))
+                out.append((os.path.relpath(os.path.join(base, name), path), st.st_mtime_ns, st.st_size))
+            except OSError:
+                pass
+    return tuple(sorted(out))
+
+def load_model(path):
+    """Compact (memory-mapped, sklearn-free) when present unless MODEL_FORMAT=pickle, else the pickle."""
+    from app.services.nlp.compact import CompactNBClassifier  # numpy: imported at first model load, not with the app
+    compact_dir = os.path.join(path, COMPACT_SUBDIR)
+    if settings.MODEL_FORMAT != "pickle" and CompactNBClassifier.exists(compact_dir):
+        return CompactNBClassifier(compact_dir)
+    import joblib  # Only the pickle path needs joblib/sklearn
+    return joblib.load(os.path.join(path, PICKLE_FILE))
+
+class ShadowStats:
+    """Agreement and per-model latency of candidate vs active on sampled traffic."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self, active=None, candidate=None):
+        self.active = active
+        self.candidate = candidate
+        self.scored = 0
+        self.agreed = 0
+        self.dropped = 0
+        self.errors = 0
+        self.disagreements = Counter()  # (active label, candidate label) -> n
+        self.active_ms = deque(maxlen=2048)
+        self.candidate_ms = deque(maxlen=2048)
+
+    def snapshot(self):
+        from app.services.nlp.batcher import _percentiles  # batcher imports the predictor; import lazily
+
+        return {
+            "active": self.active,
+            "candidate": self.candidate,
+            "scored": self.scored,
+            "agreement": round(self.agreed / self.scored, 4) if self.scored else None,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "top_disagreements": [
+                {"active": a, "candidate": c, "count": n} for (a, c), n in self.disagreements.most_common(10)
+            ],
+            "active_latency_ms": _percentiles(self.active_ms),
+            "candidate_latency_ms": _percentiles(self.candidate_ms),
+        }
+
+class ModelRegistry:
+    """
+    Every servable model version under app/ml_models/: batch-trained directories
+    (punjab_logistics_v1, ...) and incremental versions (incremental/v0003, ...).
+
+    sync() resolves which version is active (and which is the shadow candidate),
+    loads any that changed, and swaps them in with a single reference assignment.
+    The predictor's watcher thread calls it, so loading never happens on a request.
+    """
+
+    def __init__(self, root=ML_MODELS_DIR):
+        self.root = root
+        self._active = (None, None)      # (version id, model)
+        self._candidate = (None, None)
+        self._fingerprints = {}
+        self._failed = {}                # version id -> fingerprint that failed to load (no retry until it changes)
+        self.shadow_fraction = 0.0
+        self.shadow = ShadowStats()
+        self._shadow_pending = 0
+        self._shadow_lock = threading.Lock()
+        self._shadow_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rlis-shadow")
+
+    @property
+    def active(self):
+        return self._active
+
+    @property
+    def candidate(self):
+        return self._candidate
+
+    # --- 1. DISCOVERY ---
+    def versions(self):
+        """{version id: directory} for every directory holding a compact export or a pickle."""
+        from app.services.nlp.compact import CompactNBClassifier
+        found = {}
+        if os.path.isdir(self.root):
+            for name in os.listdir(self.root):
+                path = os.path.join(self.root, name)
+                if name.startswith((".", "_")) or not os.path.isdir(path) or path == incremental.INCREMENTAL_DIR:
+                    continue
+                if CompactNBClassifier.exists(os.path.join(path, COMPACT_SUBDIR)) or os.path.exists(os.path.join(path, PICKLE_FILE)):
+                    found[name] = path
+        for name in incremental.list_versions():
+            found[f"incremental/{name}"] = os.path.join(incremental.INCREMENTAL_DIR, name)
+        return found
+
+    def targets(self, versions):
+        """(active id, candidate id, shadow fraction): registry.json overrides the MODEL_* settings."""
+        selection = {
+            "active": settings.MODEL_ACTIVE,
+            "candidate": settings.MODEL_CANDIDATE or None,
+            "shadow_fraction": settings.MODEL_SHADOW_FRACTION,
+        }
+        try:
+            with open(REGISTRY_FILE, encoding="utf-8") as f:
+                selection.update(json.load(f))
+        except (OSError, ValueError):
+            pass
+
+        active = selection["active"]
+        if active == "latest":
+            active = self._latest(versions)
+        candidate = selection["candidate"]
+        if candidate == "latest":
+            candidate = self._latest(versions)
+        if candidate == active:
+            candidate = None
+        return active, candidate, float(selection["shadow_fraction"] or 0)
+
+    def _latest(self, versions):
+        # The incremental CURRENT pointer wins (it moves on every retrain), else the highest batch _vN
+        current = incremental.current_version() if settings.MODEL_FORMAT in ("auto", "incremental") else None
+        if current:
+            return f"incremental/{os.path.basename(current)}"
+        batch = [name for name in versions if not name.startswith("incremental/")]
+        return max(batch, key=lambda name: (_version_number(name), name)) if batch else None
+
+    # --- 2. LOAD + SWAP ---
+    def sync(self):
+        """Loads changed targets in the calling thread, then swaps. Returns True when the active model changed."""
+        versions = self.versions()
+        active_id, candidate_id, fraction = self.targets(versions)
+
+        changed = False
+        loaded = self._load_if_changed(active_id, self._active, versions)
+        if loaded is not None:
+            self._active = loaded
+            changed = True
+            print(f"✅ AI Model {active_id} active (from {versions[active_id]})")
+
+        if candidate_id is None:
+            self._candidate = (None, None)
+        else:
+            loaded = self._load_if_changed(candidate_id, self._candidate, versions)
+            if loaded is not None:
+                self._candidate = loaded
+                print(f"🧪 Candidate model {candidate_id} shadowing {fraction:.0%} of traffic")
+        self.shadow_fraction = fraction if self._candidate[1] is not None else 0.0
+
+        if (self.shadow.active, self.shadow.candidate) != (self._active[0], self._candidate[0]):
+            self.shadow.reset(self._active[0], self._candidate[0])
+        return changed
+
+    def _load_if_changed(self, version_id, current, versions):
+        if version_id not in versions:
+            if version_id is not None and self._failed.get(version_id) != "missing":
+                self._failed[version_id] = "missing"
+                print(f"⚠️ Model version '{version_id}' not found in {self.root}")
+            return None
+        fingerprint = _fingerprint(versions[version_id])
+        if version_id == current[0] and self._fingerprints.get(version_id) == fingerprint:
+            return None
+        if self._failed.get(version_id) == fingerprint:
+            return None
+        try:
+            model = load_model(versions[version_id])
+        except Exception as e:
+            # Keep serving whatever is loaded now
+            self._failed[version_id] = fingerprint
+            print(f"❌ Failed to load model {version_id}: {e}")
+            return None
+        self._fingerprints[version_id] = fingerprint
+        return version_id, model
+
+    def select(self, **changes):
+        """Writes new targets to registry.json (atomic); every worker's watcher applies them."""
+        versions = self.versions()
+        for key in ("active", "candidate"):
+            value = changes.get(key)
+            if value not in (None, "latest") and value not in versions:
+                raise KeyError(value)
+
+        selection = {}
+        try:
+            with open(REGISTRY_FILE, encoding="utf-8") as f:
+                selection = json.load(f)
+        except (OSError, ValueError):
+            pass
+        selection.update(changes)
+
+        tmp = REGISTRY_FILE + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(selection, f, indent=2)
+        os.replace(tmp, REGISTRY_FILE)
+        return selection
+
+    # --- 3. SHADOW SCORING (off the request path) ---
+    def offer_shadow(self, texts):
+        """Samples texts for candidate-vs-active scoring on the shadow thread. Never blocks."""
+        if not self.shadow_fraction or self._candidate[1] is None:
+            return
+        sampled = [text for text in texts if random.random() < self.shadow_fraction]
+        if not sampled:
+            return
+        with self._shadow_lock:
+            if self._shadow_pending >= settings.MODEL_SHADOW_MAX_PENDING:
+                self.shadow.dropped += len(sampled)
+                return
+            self._shadow_pending += 1
+        self._shadow_executor.submit(self._score_shadow, sampled, self._active, self._candidate)
+
+    def _score_shadow(self, texts, active, candidate):
+        try:
+            # Both models run here, back to back, so their latencies are comparable
+            started = time.perf_counter()
+            expected = active[1].predict(texts)
+            mid = time.perf_counter()
+            observed = candidate[1].predict(texts)
+            done = time.perf_counter()
+
+            stats = self.shadow
+            if (stats.active, stats.candidate) != (active[0], candidate[0]):
+                return  # Targets switched while this was queued
+            per_text = 1000.0 / len(texts)
+            for a, c in zip(expected, observed):
+                stats.scored += 1
+                if a == c:
+                    stats.agreed += 1
+                else:
+                    stats.disagreements[(str(a), str(c))] += 1
+                stats.active_ms.append((mid - started) * per_text)
+                stats.candidate_ms.append((done - mid) * per_text)
+        except Exception:
+            self.shadow.errors += 1
+        finally:
+            with self._shadow_lock:
+                self._shadow_pending -= 1
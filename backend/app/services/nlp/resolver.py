@@ -0,0 +1,178 @@
+import json
+import re
+from collections import Counter
+from itertools import chain
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_VOWELS = str.maketrans("", "", "aeiou")
+_REPEATS = re.compile(r"(.)\1+")
+
+# Skeleton matches rank just below an exact spelling
+SKELETON_WEIGHT = 0.9
+# A word in this many different place names ("road", "mandi") never identifies one alone
+GENERIC_MIN_PLACES = 3
+# Scored spans remembered (messages reuse a small vocabulary); cleared when full
+SPAN_MEMO_SIZE = 50000
+
+def skeleton(tokens):
+    """Consonant skeleton: first letter of each word plus its consonants, repeats collapsed ("amritsar gate" -> "amrtsr gt")."""
+    return " ".join(_REPEATS.sub(r"\1", token[0] + token[1:].translate(_VOWELS)) for token in tokens)
+
+def _trigrams(value):
+    padded = f"  {value} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def edit_distance(a, b, limit):
+    """Levenshtein distance, or None as soon as it must exceed `limit`."""
+    if abs(len(a) - len(b)) > limit:
+        return None
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if min(current) > limit:
+            return None
+        previous = current
+    return previous[-1] if previous[-1] <= limit else None
+
+class _SpanIndex:
+    """Keys of one word count: exact + skeleton dicts and trigram postings over both."""
+
+    def __init__(self):
+        self.keys = []          # (key, skeleton, location rank)
+        self.exact = {}
+        self.skeletons = {}
+        self.grams = {}         # trigram -> [key id]
+        self.skeleton_grams = {}
+
+    def add(self, key, key_skeleton, rank):
+        if key in self.exact:
+            return
+        key_id = len(self.keys)
+        self.keys.append((key, key_skeleton, rank))
+        self.exact[key] = key_id
+        self.skeletons.setdefault(key_skeleton, key_id)
+        for gram in _trigrams(key):
+            self.grams.setdefault(gram, []).append(key_id)
+        for gram in _trigrams(key_skeleton):
+            self.skeleton_grams.setdefault(gram, []).append(key_id)
+
+    def closest(self, value, skeletons, threshold, limit):
+        """(similarity, key id) of the nearest key spelling (or skeleton) at >= threshold, else None."""
+        postings = self.skeleton_grams if skeletons else self.grams
+        grams = _trigrams(value)
+        # A key within budget b of the span is at most b longer, so b <= (1 - t) * len / t.
+        # One edit breaks at most 3 trigrams, so such a key keeps most of the span's
+        # trigrams: most spans ("truck", "stuck near") fail this before any counting
+        widest = int((1.0 - threshold) * len(value) / threshold + 1e-9)
+        if len(grams & postings.keys()) < len(grams) - 3 * widest:
+            return None
+        shared = Counter(chain.from_iterable(postings.get(gram, ()) for gram in grams))
+        best = None
+        for key_id, count in shared.most_common(limit):
+            key = self.keys[key_id][1 if skeletons else 0]
+            longest = max(len(key), len(value))
+            budget = int((1.0 - threshold) * longest + 1e-9)
+            if count < len(grams) - 3 * budget:
+                continue
+            distance = edit_distance(value, key, budget)
+            if distance is None:
+                continue
+            score = 1.0 - distance / longest
+            if best is None or score > best[0]:
+                best = (score, key_id)
+        return best
+
+class LocationResolver:
+    """
+    Typo- and abbreviation-tolerant lookup of gazetteer places in a message, for
+    what the exact alias pass misses: "amrtsr gt" (vowels dropped), "sirhnd",
+    "frzpr rd". Built once from the lexicon's names + aliases.
+
+    Every 1..3-word span of the message is scored against keys with the same
+    word count: exact spelling 1.0, same consonant skeleton 0.9, otherwise the
+    edit-distance similarity of the spelling (or 0.9 x that of the skeletons),
+    checked only for the few keys sharing the most trigrams with the span.
+    Scores are remembered per span, so a warm resolver costs tens of µs per message.
+    The best span wins (longer spans on ties, then lexicon order).
+    """
+
+    def __init__(self, locations, synonyms=None, min_confidence=0.8, candidates=4):
+        self.names = [loc["name"] for loc in locations]
+        self.synonyms = synonyms or {}   # Message word -> the word place names use ("rasta" -> "road")
+        self.min_confidence = min_confidence
+        self.limit = candidates
+        self._indexes = {}      # word count -> _SpanIndex
+        self._memo = {}         # (word count, span) -> (confidence, rank) | None
+
+        places = {}
+        for rank, loc in enumerate(locations):
+            for variant in [loc["name"], *loc["aliases"]]:
+                tokens = _TOKEN.findall(variant.lower())
+                if not tokens:
+                    continue
+                self._add(tokens, rank)
+                if len(tokens) > 1:
+                    self._add(["".join(tokens)], rank)  # "nh 44" also as "nh44"
+                for token in tokens:
+                    places.setdefault(token, set()).add(rank)
+        self.generic = {token for token, ranks in places.items() if len(ranks) >= GENERIC_MIN_PLACES}
+
+    def _add(self, tokens, rank):
+        index = self._indexes.setdefault(len(tokens), _SpanIndex())
+        index.add(" ".join(tokens), skeleton(tokens), rank)
+
+    @classmethod
+    def from_file(cls, path, **options):
+        with open(path, encoding="utf-8") as f:
+            lexicon = json.load(f)
+        return cls(lexicon["locations"], lexicon.get("location_synonyms"), **options)
+
+    def resolve(self, text_lower):
+        """(location name, confidence) of the best place mentioned, or None below min_confidence."""
+        tokens = [self.synonyms.get(token, token) for token in _TOKEN.findall(text_lower)]
+        best = None     # (confidence, words, -rank)
+        for words, index in self._indexes.items():
+            for start in range(len(tokens) - words + 1):
+                span_tokens = tokens[start:start + words]
+                if all(token in self.generic for token in span_tokens):
+                    continue
+                span = " ".join(span_tokens)
+                if len(span) < 3:
+                    continue
+                memo_key = (words, span)
+                scored = self._memo.get(memo_key, self)
+                if scored is self:
+                    if len(self._memo) >= SPAN_MEMO_SIZE:
+                        self._memo.clear()
+                    scored = self._memo[memo_key] = self._score(index, span, span_tokens)
+                if scored is None:
+                    continue
+                confidence, rank = scored
+                key = (confidence, words, -rank)
+                if best is None or key > best:
+                    best = key
+        if best is None or best[0] < self.min_confidence:
+            return None
+        return self.names[-best[2]], round(best[0], 3)
+
+    def _score(self, index, span, span_tokens):
+        key_id = index.exact.get(span)
+        if key_id is not None:
+            return 1.0, index.keys[key_id][2]
+        span_skeleton = skeleton(span_tokens)
+        key_id = index.skeletons.get(span_skeleton)
+        # "rkt" (Raikot) is enough; two letters are not
+        if key_id is not None and len(span_skeleton) >= 3:
+            return SKELETON_WEIGHT, index.keys[key_id][2]
+
+        # Only keys that could still reach min_confidence are measured
+        best = None
+        spelled = index.closest(span, False, self.min_confidence, self.limit)
+        if spelled is not None:
+            best = (spelled[0], index.keys[spelled[1]][2])
+        consonants = index.closest(span_skeleton, True, self.min_confidence / SKELETON_WEIGHT, self.limit)
+        if consonants is not None and (best is None or SKELETON_WEIGHT * consonants[0] > best[0]):
+            best = (SKELETON_WEIGHT * consonants[0], index.keys[consonants[1]][2])
+        return best
@@ -0,0 +1,344 @@
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from sqlalchemy import delete, func, inspect, select, text
+from sqlalchemy.schema import CreateColumn
+from app.core.config import settings
+from app.models import Incident, IncidentReport
+
+# On Postgres `incidents` is range-partitioned by month on `timestamp`:
+#   incidents                      <- parent (PARTITION BY RANGE), indexes declared here
+#   incidents_p202610              <- FOR VALUES FROM ('2026-10-01') TO ('2026-11-01')
+# Queries with a timestamp bound are pruned to the months they cover; newest-first
+# pages (ORDER BY timestamp DESC ... LIMIT) read the newest partition first and stop.
+# Retention detaches months older than PARTITION_RETENTION_MONTHS, exports each to
+# ARCHIVE_DIR/<month>.parquet and drops it. Rollups keep the archived history; merged
+# duplicate reports (incident_reports) older than the cutoff are deleted, not archived.
+PARENT = "incidents"
+PARTITION_RE = re.compile(r"^incidents_p(\d{4})(\d{2})$")
+MANIFEST_FILE = "manifest.json"
+# Exported columns (the PostGIS `geom` column is derived from lat/lng, not archived;
+# the ingest queue ticket only matters while the report is being stored)
+ARCHIVE_COLUMNS = [c.name for c in Incident.__table__.columns if c.name != "ingest_ticket"]
+
+_known_months = set()   # Partitions this process has already created/seen
+
+# --- 1. MONTH ARITHMETIC ---
+def month_start(value):
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+def add_months(month, n):
+    index = month.year * 12 + month.month - 1 + n
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+def partition_name(month):
+    return f"{PARENT}_p{month:%Y%m}"
+
+def month_key(month):
+    return f"{month:%Y-%m}"
+
+# --- 2. POSTGRES DDL ---
+def _is_postgres(bind):
+    return bind.dialect.name == "postgresql"
+
+def is_partitioned(conn):
+    kind = conn.execute(text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:name)"), {"name": PARENT}).scalar()
+    return kind == "p"
+
+def _create_parent(conn):
+    """CREATE TABLE incidents ... PARTITION BY RANGE (timestamp), columns as in app/models.py."""
+    preparer = conn.dialect.identifier_preparer
+    columns = []
+    for column in Incident.__table__.columns:
+        if column.name == "id":
+            # The sequence outlives any one table (migrate() reuses it, ids keep counting)
+            columns.append(f"id INTEGER NOT NULL DEFAULT nextval('{PARENT}_id_seq')")
+        else:
+            columns.append(str(CreateColumn(column).compile(dialect=conn.dialect)))
+    # Unique constraints on a partitioned table must include the partition key
+    columns.append(f"PRIMARY KEY (id, {preparer.quote('timestamp')})")
+
+    conn.execute(text(f"CREATE SEQUENCE IF NOT EXISTS {PARENT}_id_seq"))
+    conn.execute(text(f"CREATE TABLE {PARENT} ({', '.join(columns)}) PARTITION BY RANGE ({preparer.quote('timestamp')})"))
+    conn.execute(text(f"ALTER SEQUENCE {PARENT}_id_seq OWNED BY {PARENT}.id"))
+
+def create_parent(engine):
+    """Before create_all(): a fresh Postgres database gets the partitioned parent table."""
+    if not _is_postgres(engine) or inspect(engine).has_table(PARENT):
+        return
+    with engine.begin() as conn:
+        _create_parent(conn)
+    print(f"🗂️ Created partitioned table '{PARENT}' (monthly on timestamp)")
+
+def _create_partitions(conn, months):
+    conn.execute(text("SELECT pg_advisory_xact_lock(hashtext('rlis_incident_partitions'))"))
+    for month in sorted(months):
+        conn.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF {PARENT} "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+        ))
+
+def ensure_months(engine, timestamps):
+    """Creates the monthly partitions these timestamps fall into (bulk loads of old logs)."""
+    if not _is_postgres(engine):
+        return
+    months = {month_start(ts) for ts in timestamps if ts is not None} - _known_months
+    if not months:
+        return
+    with engine.begin() as conn:
+        if is_partitioned(conn):
+            _create_partitions(conn, months)
+    _known_months.update(months)
+
+def ensure_upcoming(engine, now=None):
+    """This month plus PARTITION_PREMAKE_MONTHS ahead, so live inserts always have a home."""
+    current = month_start(now or datetime.now(timezone.utc))
+    ensure_months(engine, [add_months(current, n) for n in range(settings.PARTITION_PREMAKE_MONTHS + 1)])
+
+def start_premaking(engine, interval_seconds=6 * 3600):
+    """Daemon thread re-running ensure_upcoming(), so a long-lived worker never runs out of months."""
+    if not _is_postgres(engine):
+        return
+
+    def run():
+        while True:
+            time.sleep(interval_seconds)
+            try:
+                ensure_upcoming(engine)
+            except Exception as e:
+                print(f"❌ Partition maintenance error: {e}")
+
+    threading.Thread(target=run, name="rlis-partitions", daemon=True).start()
+
+def attached_partitions(conn):
+    """{month: partition name} currently attached to the parent."""
+    rows = conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass(:name)"
+    ), {"name": PARENT}).scalars()
+    return {_partition_month(name): name for name in rows if _partition_month(name)}
+
+def detached_partitions(conn):
+    """Partition tables no longer attached (detached by retention, not yet archived)."""
+    rows = conn.execute(text(
+        "SELECT c.relname FROM pg_class c WHERE c.relkind = 'r' AND c.relname LIKE :pattern "
+        "AND c.relnamespace = current_schema()::regnamespace "
+        "AND NOT EXISTS (SELECT 1 FROM pg_inherits i WHERE i.inhrelid = c.oid)"
+    ), {"pattern": f"{PARENT}\\_p%"}).scalars()
+    return {_partition_month(name): name for name in rows if _partition_month(name)}
+
+def _partition_month(name):
+    match = PARTITION_RE.match(name)
+    return datetime(int(match.group(1)), int(match.group(2)), 1, tzinfo=timezone.utc) if match else None
+
+def migrate(engine):
+    """
+    One-off: turns an existing plain `incidents` table into the partitioned layout
+    (rows copied in one transaction; ids and the id sequence are kept).
+    Indexes and the PostGIS column are re-created by the usual startup steps afterwards.
+    """
+    if not _is_postgres(engine):
+        raise RuntimeError("Partitioning needs PostgreSQL")
+    with engine.begin() as conn:
+        if is_partitioned(conn):
+            return 0
+        conn.execute(text(f"LOCK TABLE {PARENT} IN ACCESS EXCLUSIVE MODE"))
+        conn.execute(text(f"ALTER TABLE {PARENT} RENAME TO {PARENT}_unpartitioned"))
+        conn.execute(text(f"ALTER SEQUENCE {PARENT}_id_seq OWNED BY NONE"))
+        _create_parent(conn)
+
+        first, last = conn.execute(text(f"SELECT min(timestamp), max(timestamp) FROM {PARENT}_unpartitioned")).one()
+        now = datetime.now(timezone.utc)
+        month, end = month_start(first or now), add_months(month_start(max(last or now, now)), settings.PARTITION_PREMAKE_MONTHS)
+        months = []
+        while month <= end:
+            months.append(month)
+            month = add_months(month, 1)
+        _create_partitions(conn, months)
+
+        names = ", ".join(ARCHIVE_COLUMNS)
+        values = ", ".join("COALESCE(timestamp, now())" if c == "timestamp" else c for c in ARCHIVE_COLUMNS)
+        moved = conn.execute(text(f"INSERT INTO {PARENT} ({names}) SELECT {values} FROM {PARENT}_unpartitioned")).rowcount
+        # Its indexes (same names as the new ones) go with it
+        conn.execute(text(f"DROP TABLE {PARENT}_unpartitioned"))
+    _known_months.update(months)
+    return moved
+
+# --- 3. RETENTION + ARCHIVE ---
+def retention_cutoff(now=None, keep_months=None):
+    """First month that is kept: this month and the keep_months - 1 before it stay live."""
+    keep = settings.PARTITION_RETENTION_MONTHS if keep_months is None else keep_months
+    return add_months(month_start(now or datetime.now(timezone.utc)), -(keep - 1))
+
+def apply_retention(engine, now=None, keep_months=None):
+    """Moves every month before the cutoff out of the database and into Parquet. Returns the archived months."""
+    keep = settings.PARTITION_RETENTION_MONTHS if keep_months is None else keep_months
+    if keep <= 0:
+        return []
+    cutoff = retention_cutoff(now, keep)
+    archived = []
+    with engine.begin() as conn:
+        conn.execute(delete(IncidentReport).where(IncidentReport.reported_at < cutoff))
+
+    if _is_postgres(engine):
+        # 1. Detach (instant, metadata only): hot queries stop seeing the month right away
+        with engine.begin() as conn:
+            for month, name in sorted(attached_partitions(conn).items()):
+                if month < cutoff:
+                    conn.execute(text(f"ALTER TABLE {PARENT} DETACH PARTITION {name}"))
+                    print(f"📤 Detached {name}")
+        # 2. Export, then drop. A failed export leaves the table for the next run.
+        with engine.connect() as conn:
+            pending = sorted(detached_partitions(conn).items())
+        for month, name in pending:
+            with engine.connect() as conn:
+                info = export_month(conn, month, text(f"SELECT {', '.join(ARCHIVE_COLUMNS)} FROM {name}"))
+            with engine.begin() as conn:
+                conn.execute(text(f"DROP TABLE {name}"))
+            archived.append(info)
+        return archived
+
+    # Local stand-in (no partitions): export + delete rows month by month
+    table = Incident.__table__
+    with engine.connect() as conn:
+        oldest = conn.execute(select(func.min(table.c.timestamp))).scalar()
+    if oldest is None:
+        return []
+    month = month_start(oldest)
+    while month < cutoff:
+        upper = add_months(month, 1)
+        bounds = (table.c.timestamp >= month.replace(tzinfo=None), table.c.timestamp < upper.replace(tzinfo=None))
+        with engine.begin() as conn:
+            if conn.execute(select(func.count()).select_from(table).where(*bounds)).scalar():
+                archived.append(export_month(conn, month, select(*[table.c[c] for c in ARCHIVE_COLUMNS]).where(*bounds)))
+                conn.execute(delete(table).where(*bounds))
+        month = upper
+    return archived
+
+def _archive_schema():
+    import pyarrow as pa
+
+    return pa.schema([
+        ("id", pa.int64()),
+        ("text", pa.string()),
+        ("location", pa.string()),
+        ("category", pa.string()),
+        ("priority", pa.string()),
+        ("status", pa.string()),
+        ("timestamp", pa.timestamp("us", tz="UTC")),
+        ("lat", pa.float64()),
+        ("lng", pa.float64()),
+        ("confirmed_at", pa.timestamp("us", tz="UTC")),
+        ("report_count", pa.int32()),
+        ("last_reported_at", pa.timestamp("us", tz="UTC")),
+    ])
+
+def export_month(conn, month, query, batch_size=50_000):
+    """Streams `query` into ARCHIVE_DIR/<YYYY-MM>.parquet (zstd, row groups of batch_size)."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = _archive_schema()
+    os.makedirs(settings.ARCHIVE_DIR, exist_ok=True)
+    path = os.path.join(settings.ARCHIVE_DIR, f"{month_key(month)}.parquet")
+    tmp = path + ".tmp"
+
+    rows = 0
+    result = conn.execution_options(stream_results=True, yield_per=batch_size).execute(query)
+    with pq.ParquetWriter(tmp, schema, compression="zstd") as writer:
+        for batch in result.partitions():
+            columns = list(zip(*batch))
+            writer.write_table(pa.table(
+                {field.name: pa.array(values, type=field.type) for field, values in zip(schema, columns)},
+                schema=schema,
+            ))
+            rows += len(batch)
+    if os.path.exists(path):
+        # Rows of this month archived by an earlier run stay: merge into one file. An id in
+        # both means a re-run after an export whose DROP/DELETE never committed; keep one copy.
+        import pyarrow.compute as pc
+
+        fresh = pq.read_table(tmp, schema=schema)
+        earlier = pq.read_table(path, schema=schema)
+        earlier = earlier.filter(pc.invert(pc.is_in(earlier["id"], value_set=fresh["id"])))
+        merged = pa.concat_tables([earlier, fresh])
+        pq.write_table(merged, tmp, compression="zstd")
+        rows = merged.num_rows
+    os.replace(tmp, path)
+
+    info = {"month": month_key(month), "file": os.path.basename(path), "rows": rows,
+            "bytes": os.path.getsize(path), "archived_at": time.strftime("%Y-%m-%d %H:%M:%S")}
+    _update_manifest(info)
+    print(f"🧊 Archived {rows:,} incidents of {info['month']} -> {path}")
+    return info
+
+def _update_manifest(info):
+    manifest = read_manifest()
+    manifest[info["month"]] = info
+    path = os.path.join(settings.ARCHIVE_DIR, MANIFEST_FILE)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+def read_manifest():
+    try:
+        with open(os.path.join(settings.ARCHIVE_DIR, MANIFEST_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+# --- 4. READ-ONLY ARCHIVE QUERIES ---
+def _archive_dataset(since=None, until=None):
+    """pyarrow dataset over the monthly files overlapping [since, until)."""
+    import pyarrow.dataset as ds
+
+    files = []
+    for key, info in sorted(read_manifest().items()):
+        month = datetime.strptime(key, "%Y-%m").replace(tzinfo=timezone.utc)
+        if since is not None and add_months(month, 1) <= _aware(since):
+            continue
+        if until is not None and month >= _aware(until):
+            continue
+        path = os.path.join(settings.ARCHIVE_DIR, info["file"])
+        if os.path.exists(path):
+            files.append(path)
+    return ds.dataset(files, schema=_archive_schema(), format="parquet") if files else None
+
+def _aware(value):
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+def _archive_filter(since, until, **equals):
+    import pyarrow.dataset as ds
+
+    expr = None
+    parts = [ds.field(name) == value for name, value in equals.items() if value is not None]
+    if since is not None:
+        parts.append(ds.field("timestamp") >= _aware(since))
+    if until is not None:
+        parts.append(ds.field("timestamp") < _aware(until))
+    for part in parts:
+        expr = part if expr is None else expr & part
+    return expr
+
+def query_archive(since=None, until=None, columns=None, limit=1000, **equals):
+    """Archived incidents matching the filters (pushed down to the Parquet row groups)."""
+    dataset = _archive_dataset(since, until)
+    if dataset is None:
+        return [], False
+    table = dataset.head(limit + 1, columns=columns, filter=_archive_filter(since, until, **equals))
+    return table.slice(0, limit).to_pylist(), table.num_rows > limit
+
+def count_archive(group_by, since=None, until=None, **equals):
+    """Incident counts per `group_by` columns over the archived months."""
+    dataset = _archive_dataset(since, until)
+    if dataset is None:
+        return []
+    table = dataset.to_table(columns=group_by, filter=_archive_filter(since, until, **equals))
+    counts = table.group_by(group_by).aggregate([([], "count_all")])
+    rows = [{**{c: row[c] for c in group_by}, "count": row["count_all"]} for row in counts.to_pylist()]
+    return sorted(rows, key=lambda row: -row["count"])
@@ -0,0 +1,101 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from app.core.config import settings
+
+class SamplingProfiler:
+    """
+    Low-overhead wall-clock sampler for a live worker: every `interval` a daemon thread
+    grabs the current stack of every other thread (sys._current_frames) and counts it.
+    Nothing is installed on the request path, so it can be switched on in production
+    for a minute and off again. Stacks come out in the "folded" format that
+    flamegraph.pl / speedscope read directly.
+    """
+
+    def __init__(self, max_seconds):
+        self.max_seconds = max_seconds
+        self.stacks = Counter()    # "thread;outer (file:line);...;leaf (file:line)" -> samples
+        self.samples = 0
+        self.interval = 0.0
+        self.started_at = None
+        self.stopped_at = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval_ms=5.0, duration_s=None, reset=True):
+        self.stop()
+        with self._lock:
+            if reset:
+                self.stacks.clear()
+                self.samples = 0
+            self.interval = max(interval_ms, 0.5) / 1000.0
+            self.started_at = time.time()
+            self.stopped_at = None
+        # Never left running by accident: stops after max_seconds at most
+        duration = min(duration_s or self.max_seconds, self.max_seconds)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(self._stop, duration), name="rlis-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def _run(self, stop, duration):
+        own = threading.get_ident()
+        deadline = time.monotonic() + duration
+        while not stop.wait(self.interval) and time.monotonic() < deadline:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            frames = sys._current_frames()
+            with self._lock:
+                for ident, frame in frames.items():
+                    if ident != own:
+                        self.stacks[self._fold(names.get(ident, str(ident)), frame)] += 1
+                self.samples += 1
+        self.stopped_at = time.time()
+
+    @staticmethod
+    def _fold(thread_name, frame):
+        parts = []
+        while frame is not None:
+            code = frame.f_code
+            parts.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        parts.append(thread_name)
+        return ";".join(reversed(parts))
+
+    def folded(self):
+        with self._lock:
+            return "\n".join(f"{stack} {n}" for stack, n in self.stacks.most_common()) + "\n"
+
+    def snapshot(self, top=20):
+        with self._lock:
+            leaves, inclusive = Counter(), Counter()
+            for stack, n in self.stacks.items():
+                frames = stack.split(";")[1:]
+                if frames:
+                    leaves[frames[-1]] += n
+                for name in set(frames):
+                    inclusive[name] += n
+            return {
+                "running": self.running,
+                "interval_ms": self.interval * 1000,
+                "started_at": self.started_at,
+                "stopped_at": self.stopped_at,
+                "samples": self.samples,
+                "distinct_stacks": len(self.stacks),
+                # Where threads were when sampled (self time) vs anywhere on the stack
+                "top_self": [{"frame": f, "samples": n} for f, n in leaves.most_common(top)],
+                "top_inclusive": [{"frame": f, "samples": n} for f, n in inclusive.most_common(top)],
+            }
+
+profiler = SamplingProfiler(settings.PROFILER_MAX_SECONDS)
@@ -0,0 +1,99 @@
+import asyncio
+import os
+import threading
+import time
+import traceback
+from app.core.config import settings
+
+def _process_start():
+    """Wall-clock start of this process, from /proc (scripts/serve.py resets it in each worker it forks)."""
+    try:
+        with open("/proc/self/stat", encoding="ascii") as f:
+            ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime", encoding="ascii") as f:
+            uptime = float(f.read().split()[0])
+        return time.time() - uptime + ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return time.time()
+
+def describe(error):
+    """One line for logs / the readiness body (driver errors span many lines)."""
+    lines = str(error).strip().splitlines()
+    return f"{type(error).__name__}: {lines[0] if lines else ''}"
+
+class Readiness:
+    """
+    Startup work that needs the disk or the database (model, schema, gazetteer, open
+    events) runs in one background thread AFTER the server is listening, so a new
+    replica answers /health/live immediately and /health/ready (what the load balancer
+    and autoscaler route on) once every step has succeeded.
+
+    Steps run in the order they were added; a failing step (typically: database not
+    reachable yet) is retried every READINESS_RETRY_SECONDS and blocks the steps after
+    it, which may depend on it (schema before the gazetteer).
+    """
+
+    def __init__(self):
+        self.steps = {}             # name -> state dict, in run order
+        self.import_seconds = None  # Time to import app.main (set at the end of it)
+        self.started_at = _process_start()
+        self.ready_at = None
+        self._functions = {}
+        self._thread = None
+        self._ready = threading.Event()
+
+    def add(self, name, fn):
+        self._functions[name] = fn
+        self.steps[name] = {"state": "pending", "attempts": 0, "seconds": None, "error": None}
+
+    @property
+    def ready(self):
+        return self._ready.is_set()
+
+    def start(self):
+        """Runs the steps in a daemon thread (idempotent)."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="rlis-readiness", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        for name, fn in self._functions.items():
+            step = self.steps[name]
+            while True:
+                step["state"] = "running"
+                step["attempts"] += 1
+                started = time.perf_counter()
+                try:
+                    fn()
+                except Exception as e:
+                    step["state"] = "retrying"
+                    step["error"] = describe(e)
+                    if step["attempts"] == 1:
+                        traceback.print_exc()
+                    print(f"⏳ Startup step '{name}' failed (attempt {step['attempts']}), retrying in {settings.READINESS_RETRY_SECONDS:.0f}s: {step['error']}")
+                    time.sleep(settings.READINESS_RETRY_SECONDS)
+                    continue
+                step.update(state="done", seconds=round(time.perf_counter() - started, 3), error=None)
+                break
+        self.ready_at = time.time()
+        self._ready.set()
+        timings = ", ".join(f"{name} {step['seconds']}s" for name, step in self.steps.items())
+        print(f"✅ Ready {self.ready_at - self.started_at:.2f}s after process start ({timings})")
+
+    async def wait(self, poll_seconds=0.1):
+        """Awaits readiness without holding a thread."""
+        while not self.ready:
+            await asyncio.sleep(poll_seconds)
+
+    def snapshot(self):
+        now = time.time()
+        return {
+            "ready": self.ready,
+            "uptime_s": round(now - self.started_at, 2),
+            "import_s": self.import_seconds,
+            "ready_after_s": round(self.ready_at - self.started_at, 2) if self.ready_at else None,
+            "steps": self.steps,
+        }
+
+readiness = Readiness()
@@ -0,0 +1,73 @@
+from collections import Counter
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from app.models import Incident, IncidentRollup
+
+def floor_hour(ts):
+    return ts.replace(minute=0, second=0, microsecond=0)
+
+def aggregate(incidents, sign=1):
+    """[(timestamp, location, category, priority), ...] -> upsert params, one per bucket key."""
+    counts = Counter((floor_hour(ts), location, category, priority) for ts, location, category, priority in incidents)
+    return [
+        {"bucket": bucket, "location": location, "category": category, "priority": priority, "count": sign * n}
+        for (bucket, location, category, priority), n in counts.items()
+    ]
+
+def _dialect_name(conn):
+    # Session / AsyncSession expose get_bind(); Connection has .dialect
+    return conn.get_bind().dialect.name if hasattr(conn, "get_bind") else conn.dialect.name
+
+def upsert_statement(dialect_name):
+    """INSERT ... ON CONFLICT (bucket key) DO UPDATE SET count = count + excluded.count"""
+    insert = postgresql.insert if dialect_name == "postgresql" else sqlite.insert
+    stmt = insert(IncidentRollup)
+    return stmt.on_conflict_do_update(
+        index_elements=["bucket", "location", "category", "priority"],
+        set_={"count": IncidentRollup.count + stmt.excluded["count"]},
+    )
+
+def record(conn, incidents, sign=1):
+    """Adds new incidents to the rollups inside the caller's transaction (sync Session/Connection)."""
+    params = aggregate(incidents, sign)
+    if params:
+        conn.execute(upsert_statement(_dialect_name(conn)), params)
+
+async def record_async(db, incidents, sign=1):
+    # sign=-1 takes incidents back out (e.g. a dispatcher re-categorised one)
+    params = aggregate(incidents, sign)
+    if params:
+        await db.execute(upsert_statement(_dialect_name(db)), params)
+
+def _bucket_expr(dialect_name):
+    if dialect_name == "postgresql":
+        return func.date_trunc("hour", Incident.timestamp)
+    # SQLite stores DateTime as text; match SQLAlchemy's 'YYYY-MM-DD HH:MM:SS.ffffff' format
+    return func.strftime("%Y-%m-%d %H:00:00.000000", Incident.timestamp)
+
+def rebuild(conn, since=None):
+    """
+    Recomputes rollups from `incidents` (everything still stored, or buckets from `since` on).
+    Run periodically or after bulk loads to repair any drift.
+    """
+    if since is None:
+        # Months archived by retention are gone from `incidents` and their rollups are
+        # the only record left, so "everything" starts at the oldest row still stored
+        since = conn.execute(select(func.min(Incident.timestamp))).scalar()
+        if since is None:
+            return 0
+    bucket = _bucket_expr(_dialect_name(conn))
+
+    since = floor_hour(since)
+    source = (
+        select(bucket.label("bucket"), Incident.location, Incident.category, Incident.priority, func.count().label("count"))
+        .where(Incident.timestamp >= since)
+    )
+    clear = delete(IncidentRollup).where(IncidentRollup.bucket >= since)
+    source = source.group_by(bucket, Incident.location, Incident.category, Incident.priority)
+
+    conn.execute(clear)
+    result = conn.execute(
+        IncidentRollup.__table__.insert().from_select(["bucket", "location", "category", "priority", "count"], source)
+    )
+    return result.rowcount
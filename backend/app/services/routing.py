@@ -0,0 +1,348 @@
+import heapq
+import itertools
+import threading
+import time
+from collections import Counter
+from app.core.config import settings
+from app.services.spatial import haversine_km
+
+# Delay (minutes) an open incident adds to passing through its node, by priority
+PRIORITY_DELAY_MINUTES = {"Critical": 90.0, "High": 30.0, "Medium": 10.0, "Low": 3.0}
+
+ROAD_DETOUR = 1.25  # Straight line -> road distance
+SPEED_KMH = {"Road": 60.0}
+DEFAULT_SPEED_KMH = 40.0
+
+INF = float("inf")
+
+class ShortestPathTree:
+    """Dijkstra tree from `root`: dist[node] (minutes) and parent[node]."""
+
+    def __init__(self, root):
+        self.root = root
+        self.dist = {}
+        self.parent = {}
+
+    def path_to(self, node):
+        if self.dist.get(node, INF) == INF:
+            return None
+        path = [node]
+        while path[-1] != self.root:
+            path.append(self.parent[path[-1]])
+        return path  # node -> ... -> root (edges are symmetric, so also the route back)
+
+    def subtree(self, node):
+        children = {}
+        for child, parent in self.parent.items():
+            children.setdefault(parent, []).append(child)
+        out, stack = set(), [node]
+        while stack:
+            current = stack.pop()
+            out.add(current)
+            stack.extend(children.get(current, ()))
+        return out
+
+class RoadGraph:
+    """
+    In-memory road network over the gazetteer nodes (hubs, mandis, villages, cities, roads).
+
+    Each node links to its `neighbours` nearest nodes. Edge cost is travel minutes plus
+    half of each endpoint's incident delay, so costs stay symmetric and one cached tree
+    per source answers both directions. Open incidents change node delays one at a time;
+    cached trees are repaired around the changed node instead of being recomputed.
+    """
+
+    def __init__(self, neighbours, max_node_delay, resync_seconds):
+        self.neighbours = neighbours
+        self.max_node_delay = max_node_delay
+        self.resync_seconds = resync_seconds
+        self.version = None
+        self.nodes = {}        # name -> {"lat", "lng", "type"}
+        self.by_key = {}       # lowercased name -> name
+        self.base = {}         # name -> {neighbour: travel minutes}
+        self.open = {}         # name -> Counter(priority -> open incidents)
+        self.delay = {}        # name -> minutes
+        self._trees = {}       # root -> ShortestPathTree
+        self._synced_at = 0.0
+        self._lock = threading.RLock()
+        self.stats = Counter()
+
+    # --- 1. BUILD ---
+    def rebuild(self, locations, version, open_counts):
+        nodes = {
+            loc["name"]: {"lat": loc["lat"], "lng": loc["lng"], "type": loc["type"]}
+            for loc in locations if loc["lat"] is not None
+        }
+        base = {name: {} for name in nodes}
+
+        def link(a, b):
+            minutes = self._travel_minutes(nodes[a], nodes[b])
+            base[a][b] = base[b][a] = minutes
+
+        # k nearest neighbours (made symmetric)
+        for name, node in nodes.items():
+            ranked = sorted(
+                (haversine_km(node["lat"], node["lng"], other["lat"], other["lng"]), other_name)
+                for other_name, other in nodes.items() if other_name != name
+            )
+            for _, other_name in ranked[:self.neighbours]:
+                link(name, other_name)
+
+        # Join any disconnected clusters through their closest pair of nodes
+        components = self._components(base)
+        while len(components) > 1:
+            first = components[0]
+            _, a, b = min(
+                (haversine_km(nodes[a]["lat"], nodes[a]["lng"], nodes[b]["lat"], nodes[b]["lng"]), a, b)
+                for a in first for b in nodes if b not in first
+            )
+            link(a, b)
+            components = self._components(base)
+
+        with self._lock:
+            self.nodes = nodes
+            self.by_key = {name.lower(): name for name in nodes}
+            self.base = base
+            self.open = {name: Counter() for name in nodes}
+            self.delay = {name: 0.0 for name in nodes}
+            self._trees = {}
+            self.version = version
+            self._apply_counts(open_counts, repair=False)
+            self._synced_at = time.monotonic()
+        edges = sum(len(v) for v in base.values()) // 2
+        print(f"🛣️ Road graph built: {len(nodes)} nodes, {edges} edges (gazetteer v{version})")
+
+    @staticmethod
+    def _travel_minutes(a, b):
+        km = haversine_km(a["lat"], a["lng"], b["lat"], b["lng"]) * ROAD_DETOUR
+        speed = max(SPEED_KMH.get(a["type"], DEFAULT_SPEED_KMH), SPEED_KMH.get(b["type"], DEFAULT_SPEED_KMH))
+        return km / speed * 60.0
+
+    @staticmethod
+    def _components(base):
+        seen, components = set(), []
+        for start in base:
+            if start in seen:
+                continue
+            component, stack = set(), [start]
+            while stack:
+                node = stack.pop()
+                if node not in component:
+                    component.add(node)
+                    stack.extend(base[node])
+            seen |= component
+            components.append(component)
+        return components
+
+    def needs_resync(self):
+        return time.monotonic() - self._synced_at >= self.resync_seconds
+
+    def resolve(self, name):
+        return self.by_key.get(name.strip().lower())
+
+    # --- 2. INCIDENT UPDATES ---
+    def incident_opened(self, location, priority):
+        self._adjust(location, priority, +1)
+
+    def incident_closed(self, location, priority):
+        self._adjust(location, priority, -1)
+
+    def _adjust(self, location, priority, delta):
+        with self._lock:
+            if location not in self.open:
+                return
+            counts = self.open[location]
+            counts[priority] = max(0, counts[priority] + delta)
+            self._set_delay(location, self._node_delay(counts))
+
+    def sync_open_counts(self, open_counts):
+        """Reconciles with the DB (other workers/processes also open and close incidents)."""
+        with self._lock:
+            self._apply_counts(open_counts, repair=True)
+            self._synced_at = time.monotonic()
+
+    def _apply_counts(self, open_counts, repair):
+        for name in self.nodes:
+            counts = Counter(open_counts.get(name, {}))
+            if counts != self.open[name]:
+                self.open[name] = counts
+                if repair:
+                    self._set_delay(name, self._node_delay(counts))
+                else:
+                    self.delay[name] = self._node_delay(counts)
+
+    def _node_delay(self, counts):
+        minutes = sum(PRIORITY_DELAY_MINUTES.get(priority, 0.0) * n for priority, n in counts.items())
+        return min(minutes, self.max_node_delay)
+
+    def cost(self, a, b):
+        return self.base[a][b] + (self.delay[a] + self.delay[b]) / 2
+
+    # --- 3. SHORTEST-PATH TREES (cached per source, repaired in place) ---
+    def _set_delay(self, node, minutes):
+        old = self.delay[node]
+        if minutes == old:
+            return
+        self.delay[node] = minutes
+        for tree in self._trees.values():
+            if minutes > old:
+                self._repair_increase(tree, node)
+            else:
+                self._repair_decrease(tree, node)
+        self.stats["delay_updates"] += 1
+
+    def tree(self, root):
+        tree = self._trees.get(root)
+        if tree is None:
+            tree = ShortestPathTree(root)
+            tree.dist = {name: INF for name in self.nodes}
+            tree.dist[root] = 0.0
+            self._dijkstra(tree, [(0.0, root)])
+            self._trees[root] = tree
+            self.stats["tree_builds"] += 1
+        else:
+            self.stats["tree_hits"] += 1
+        return tree
+
+    def _dijkstra(self, tree, heap, allowed=None):
+        """Standard Dijkstra relaxation from the seeded heap; `allowed` limits which nodes may change."""
+        heapq.heapify(heap)
+        while heap:
+            d, node = heapq.heappop(heap)
+            if d > tree.dist[node]:
+                continue
+            for other in self.base[node]:
+                if allowed is not None and other not in allowed:
+                    continue
+                nd = d + self.cost(node, other)
+                if nd < tree.dist[other]:
+                    tree.dist[other] = nd
+                    tree.parent[other] = node
+                    heapq.heappush(heap, (nd, other))
+
+    def _repair_increase(self, tree, node):
+        # Costier edges around `node` can only lengthen paths that run through it:
+        # exactly the tree below it. Everything else keeps its distance.
+        affected = tree.subtree(node)
+        if node == tree.root:
+            affected.discard(node)
+        for name in affected:
+            tree.dist[name] = INF
+            tree.parent.pop(name, None)
+
+        heap = []
+        for name in affected:
+            for other in self.base[name]:
+                if other not in affected and tree.dist[other] < INF:
+                    nd = tree.dist[other] + self.cost(other, name)
+                    if nd < tree.dist[name]:
+                        tree.dist[name] = nd
+                        tree.parent[name] = other
+            if tree.dist[name] < INF:
+                heap.append((tree.dist[name], name))
+        self._dijkstra(tree, heap, allowed=affected)
+        self.stats["tree_repairs"] += 1
+
+    def _repair_decrease(self, tree, node):
+        # Cheaper edges around `node`: push improvements outwards from its endpoints
+        heap = []
+        for a, b in itertools.chain(((node, o) for o in self.base[node]), ((o, node) for o in self.base[node])):
+            nd = tree.dist[a] + self.cost(a, b)
+            if nd < tree.dist[b]:
+                tree.dist[b] = nd
+                tree.parent[b] = a
+                heap.append((nd, b))
+        self._dijkstra(tree, heap)
+        self.stats["tree_repairs"] += 1
+
+    # --- 4. K BEST ROUTES (Yen) ---
+    def k_best(self, source, target, k):
+        with self._lock:
+            # Cached tree rooted at the target: exact remaining cost in the full graph,
+            # an admissible A* heuristic for every spur search (removing edges only adds cost)
+            to_target = self.tree(target)
+            first = to_target.path_to(source)
+            if first is None:
+                return []
+
+            routes = [(self._path_cost(first), first)]
+            candidates, seen = [], {tuple(first)}
+            for _ in range(1, k):
+                last = routes[-1][1]
+                for i in range(len(last) - 1):
+                    spur, root_path = last[i], last[:i + 1]
+                    banned_edges = {
+                        (path[i], path[i + 1]) for _, path in routes
+                        if len(path) > i + 1 and path[:i + 1] == root_path
+                    }
+                    spur_path = self._astar(spur, target, to_target.dist, set(root_path[:-1]), banned_edges)
+                    if spur_path is None:
+                        continue
+                    path = root_path[:-1] + spur_path
+                    if tuple(path) not in seen:
+                        seen.add(tuple(path))
+                        heapq.heappush(candidates, (self._path_cost(path), path))
+                if not candidates:
+                    break
+                routes.append(heapq.heappop(candidates))
+            return [self._describe(path) for _, path in routes]
+
+    def _astar(self, source, target, heuristic, banned_nodes, banned_edges):
+        g = {source: 0.0}
+        parent = {}
+        heap = [(heuristic.get(source, 0.0), source)]
+        while heap:
+            _, node = heapq.heappop(heap)
+            if node == target:
+                path = [node]
+                while path[-1] != source:
+                    path.append(parent[path[-1]])
+                return path[::-1]
+            for other in self.base[node]:
+                if other in banned_nodes or (node, other) in banned_edges:
+                    continue
+                ng = g[node] + self.cost(node, other)
+                if ng < g.get(other, INF):
+                    g[other] = ng
+                    parent[other] = node
+                    heapq.heappush(heap, (ng + heuristic.get(other, 0.0), other))
+        return None
+
+    def _path_cost(self, path):
+        return sum(self.cost(a, b) for a, b in zip(path, path[1:]))
+
+    def _describe(self, path):
+        travel = sum(self.base[a][b] for a, b in zip(path, path[1:]))
+        km = sum(
+            haversine_km(self.nodes[a]["lat"], self.nodes[a]["lng"], self.nodes[b]["lat"], self.nodes[b]["lng"])
+            for a, b in zip(path, path[1:])
+        ) * ROAD_DETOUR
+        return {
+            "nodes": path,
+            "coords": [[self.nodes[n]["lat"], self.nodes[n]["lng"]] for n in path],
+            "distance_km": round(km, 2),
+            "travel_minutes": round(travel, 1),
+            "delay_minutes": round(self._path_cost(path) - travel, 1),
+            "eta_minutes": round(self._path_cost(path), 1),
+            "incidents": {n: dict(self.open[n]) for n in path if sum(self.open[n].values())},
+        }
+
+    def edge_list(self):
+        with self._lock:
+            return [
+                [a, b, round(minutes, 1)]
+                for a, links in self.base.items() for b, minutes in links.items() if a < b
+            ]
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "version": self.version,
+                "nodes": len(self.nodes),
+                "edges": sum(len(v) for v in self.base.values()) // 2,
+                "cached_trees": len(self._trees),
+                "delayed_nodes": {n: round(d, 1) for n, d in self.delay.items() if d},
+                **self.stats,
+            }
+
+road_graph = RoadGraph(settings.ROUTE_NEIGHBOURS, settings.ROUTE_MAX_NODE_DELAY_MINUTES, settings.ROUTE_RESYNC_SECONDS)
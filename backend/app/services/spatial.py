@@ -0,0 +1,73 @@
+import math
+from sqlalchemy import func, literal_column, text
+from app.core.database import add_missing_columns
+from app.models import Incident
+
+SRID = 4326
+EARTH_RADIUS_KM = 6371.0088
+
+# incidents.lat/lng are plain floats written by every insert path (COPY included).
+# On Postgres, PostGIS derives a generated geometry column from them, so writers
+# never build geometries themselves. Two GiST indexes: one on geom for viewport
+# (&&) scans, one on geography(geom) so metre-radius ST_DWithin is index-assisted.
+GEOM = literal_column("incidents.geom")
+
+def ensure_schema(engine):
+    """Adds lat/lng (and on Postgres the PostGIS column + indexes) to an existing incidents table."""
+    # 1. Plain columns (create_all() never alters existing tables)
+    add_missing_columns(engine, Incident.__table__)
+    if engine.dialect.name != "postgresql":
+        return
+
+    with engine.begin() as conn:
+        # 2. PostGIS geometry, kept in sync by the database
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS postgis"))
+        conn.execute(text(
+            f"ALTER TABLE incidents ADD COLUMN IF NOT EXISTS geom geometry(Point, {SRID}) "
+            f"GENERATED ALWAYS AS (ST_SetSRID(ST_MakePoint(lng, lat), {SRID})) STORED"
+        ))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_incidents_geom ON incidents USING GIST (geom)"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_incidents_geog ON incidents USING GIST (geography(geom))"))
+
+def backfill_points(conn, only_missing=True):
+    """Copies gazetteer coordinates onto incident rows (run after the locations table changes)."""
+    sql = (
+        "UPDATE incidents SET lat = locations.lat, lng = locations.lng "
+        "FROM locations WHERE incidents.location = locations.name"
+    )
+    if only_missing:
+        sql += " AND incidents.lat IS NULL"
+    return conn.execute(text(sql)).rowcount
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lng2 - lng1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(1.0, a)))
+
+def degree_box(lat, lng, radius_km):
+    """(min_lat, min_lng, max_lat, max_lng) that contains the radius circle."""
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    dlng = dlat / max(math.cos(math.radians(lat)), 1e-6)
+    return lat - dlat, lng - dlng, lat + dlat, lng + dlng
+
+# --- SQL PREDICATES ---
+def _point(lat, lng):
+    return func.ST_SetSRID(func.ST_MakePoint(lng, lat), SRID)
+
+def within_radius(dialect_name, lat, lng, radius_km):
+    if dialect_name == "postgresql":
+        return func.ST_DWithin(func.geography(GEOM), func.geography(_point(lat, lng)), radius_km * 1000)
+    # Local stand-in (SQLite): bounding-box prefilter only, callers trim to the circle with haversine_km
+    return within_bbox(dialect_name, *degree_box(lat, lng, radius_km))
+
+def within_bbox(dialect_name, min_lat, min_lng, max_lat, max_lng):
+    if dialect_name == "postgresql":
+        return GEOM.op("&&")(func.ST_MakeEnvelope(min_lng, min_lat, max_lng, max_lat, SRID))
+    return Incident.lat.between(min_lat, max_lat) & Incident.lng.between(min_lng, max_lng)
+
+def distance_km(dialect_name, lat, lng):
+    """SQL distance expression on Postgres; None elsewhere (compute with haversine_km)."""
+    if dialect_name == "postgresql":
+        return func.ST_Distance(func.geography(GEOM), func.geography(_point(lat, lng))) / 1000.0
+    return None
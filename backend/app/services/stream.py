@@ -0,0 +1,201 @@
+import asyncio
+import selectors
+import socket
+import struct
+import threading
+import time
+from collections import deque
+from app.core.config import settings
+from app.core.responses import dumps
+
+# Largest event sent between the scripts/serve.py master and its workers
+RELAY_MAX_BYTES = 1 << 20
+_SEQ = struct.Struct("<q")
+
+def _first_seq():
+    # Event ids go on across restarts (microseconds since the epoch, then +1 per event),
+    # so a Last-Event-ID from before a restart reads as "too far behind" (reset), not "ahead"
+    return time.time_ns() // 1000
+
+def _frame(seq, event_type, payload):
+    return f"id: {seq}\nevent: {event_type}\ndata: {payload}\n\n"
+
+class _Subscriber:
+    def __init__(self, maxsize):
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = False
+
+class IncidentHub:
+    """
+    Fan-out of new incidents to every dashboard connected to this process (SSE).
+
+    Each event is serialized ONCE and gets a monotonic sequence id. A short backlog
+    lets reconnecting clients resume from their Last-Event-ID. Every client has a
+    bounded queue; a client that falls behind is dropped (it reconnects and resumes)
+    instead of slowing down everyone else.
+
+    In a scripts/serve.py worker, events go through the master (StreamRelay), which
+    numbers them and sends them to every worker: all dashboards get every incident,
+    under the same ids, whichever worker they are connected to.
+    """
+
+    def __init__(self, queue_size, backlog_size):
+        self.queue_size = queue_size
+        self.backlog = deque(maxlen=backlog_size)  # (seq, frame)
+        self.subscribers = set()
+        self.loop = None
+        self.relay = None   # Socket to the scripts/serve.py master (set in its workers)
+        self._seq = _first_seq()
+        self._lock = threading.Lock()
+
+    def bind_loop(self, loop):
+        if self.loop is None:
+            self.loop = loop
+
+    def publish(self, event_type, data):
+        """Thread-safe: called from sync request handlers running in the threadpool."""
+        payload = dumps(data).decode()
+        relay = self.relay
+        if relay is not None:
+            try:
+                relay.send(f"{event_type}\n{payload}".encode())
+                return  # Comes back numbered from the master, like everyone else's
+            except OSError as e:
+                print(f"⚠️ Stream relay to the master failed, publishing to this worker only: {e}")
+                self.relay = None
+        with self._lock:
+            # Continue after the master's ids when the relay went away
+            self._seq = max(self._seq, self.backlog[-1][0] if self.backlog else 0) + 1
+            seq = self._seq
+            frame = _frame(seq, event_type, payload)
+            self.backlog.append((seq, frame))
+
+        if self.loop is not None and self.subscribers:
+            self.loop.call_soon_threadsafe(self._fanout, seq, frame)
+
+    # --- scripts/serve.py workers ---
+    def join_relay(self, sock, backlog):
+        """In the forked worker: publish through the master; start from the master's backlog."""
+        self.relay = sock
+        self.backlog.extend(backlog)
+
+    def start_relay(self):
+        """App startup: receive the master's numbered events on this event loop."""
+        if self.relay is not None:
+            self.bind_loop(asyncio.get_running_loop())
+            self.loop.add_reader(self.relay.fileno(), self._on_relay)
+
+    def _on_relay(self):
+        relay = self.relay
+        try:
+            message = relay.recv(RELAY_MAX_BYTES) if relay is not None else b""
+        except OSError:
+            message = b""
+        if not message:
+            # Master gone: go on as a single process
+            if relay is not None:
+                self.loop.remove_reader(relay.fileno())
+            self.relay = None
+            return
+        seq = _SEQ.unpack_from(message)[0]
+        frame = message[_SEQ.size:].decode()
+        with self._lock:
+            self.backlog.append((seq, frame))
+        if self.subscribers:
+            self._fanout(seq, frame)
+
+    def _fanout(self, seq, frame):
+        for sub in list(self.subscribers):
+            try:
+                sub.queue.put_nowait((seq, frame))
+            except asyncio.QueueFull:
+                # Slow consumer: stop feeding it, it drains what it has and reconnects
+                sub.dropped = True
+                self.subscribers.discard(sub)
+
+    def subscribe(self):
+        sub = _Subscriber(self.queue_size)
+        self.subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        self.subscribers.discard(sub)
+
+    def replay_since(self, last_seq):
+        """Backlog frames after last_seq, or None if the client is too far behind."""
+        with self._lock:
+            events = list(self.backlog)
+        if events and last_seq < events[0][0] - 1:
+            return None
+        return [(seq, frame) for seq, frame in events if seq > last_seq]
+
+class StreamRelay:
+    """
+    The scripts/serve.py master's side of the live stream. Each worker gets one end of
+    a socketpair at fork; an event a worker publishes arrives here, gets the next
+    global id and goes out to every worker (the sender too), so ids and order are the
+    same on all of them. Runs in the master's main loop, not a thread (the master forks).
+    """
+
+    def __init__(self, backlog_size):
+        self.seq = _first_seq()
+        self.backlog = deque(maxlen=backlog_size)  # (seq, frame): a new worker starts from it
+        self.workers = {}   # pid -> master end
+        self._selector = selectors.DefaultSelector()
+
+    @staticmethod
+    def pair():
+        """Before fork: (master end, worker end). SEQPACKET keeps every event one message."""
+        return socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+
+    def attach(self, pid, sock):
+        sock.setblocking(False)
+        self.workers[pid] = sock
+        self._selector.register(sock, selectors.EVENT_READ)
+
+    def detach(self, pid):
+        sock = self.workers.pop(pid, None)
+        if sock is not None:
+            try:
+                self._selector.unregister(sock)
+            except (KeyError, ValueError):
+                pass
+            sock.close()
+
+    def close_inherited(self):
+        """In a forked worker: the other workers' master ends are not its business."""
+        for sock in self.workers.values():
+            sock.close()
+        self._selector.close()
+
+    def pump(self, timeout):
+        """Forwards workers' events for `timeout` seconds (the master loop's sleep)."""
+        deadline = time.monotonic() + timeout
+        while (remaining := deadline - time.monotonic()) > 0:
+            for key, _ in self._selector.select(remaining):
+                self._forward(key.fileobj)
+
+    def _forward(self, sock):
+        try:
+            message = sock.recv(RELAY_MAX_BYTES)
+        except BlockingIOError:
+            return
+        except OSError:
+            message = b""
+        if not message:
+            # Worker exited; reap() detaches it
+            self._selector.unregister(sock)
+            return
+        event_type, payload = message.decode().split("\n", 1)
+        self.seq += 1
+        frame = _frame(self.seq, event_type, payload)
+        self.backlog.append((self.seq, frame))
+        out = _SEQ.pack(self.seq) + frame.encode()
+        for target in self.workers.values():
+            try:
+                target.send(out)
+            except OSError:
+                # Buffer full (a stuck worker, which the health check replaces) or exiting
+                pass
+
+hub = IncidentHub(settings.STREAM_QUEUE_SIZE, settings.STREAM_BACKLOG)
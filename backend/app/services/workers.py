@@ -0,0 +1,167 @@
+import asyncio
+import mmap
+import os
+import struct
+import time
+from app.core.config import settings
+from app.services.metrics import REQUESTS
+from app.services.nlp.predictor import predictor
+from app.services.readiness import readiness
+
+# An anonymous shared mapping the master of scripts/serve.py creates before forking
+# (MAP_SHARED: every process sees the same bytes): a header, then one fixed-size slot per worker.
+#   header:      schema migrated                                 (written by the master only)
+#   master part: pid, state, forked at                           (written by the master only)
+#   worker part: heartbeat, requests, rss, pss, model gen, ready (written by that worker only)
+_HEADER = struct.Struct("<q")
+_MASTER = struct.Struct("<qqd")
+_WORKER = struct.Struct("<dqqqqq")
+_SLOT_SIZE = _MASTER.size + _WORKER.size
+
+def _offset(slot):
+    return _HEADER.size + slot * _SLOT_SIZE
+
+FREE, RUNNING, STOPPING = 0, 1, 2
+
+class WorkerBoard:
+    """
+    Per-worker health shared by the master and its workers. Workers heartbeat from their
+    event loop, so a loop stuck in CPU work or a deadlock shows up as a stale slot even
+    though the process is alive; the master replaces such workers, and any worker can
+    report on all of them (GET /api/v1/health/workers).
+    """
+
+    def __init__(self, slots):
+        self.slots = slots
+        self.master_pid = os.getpid()
+        self.slot = None    # This process's slot (set in the forked worker)
+        self._buf = mmap.mmap(-1, _HEADER.size + _SLOT_SIZE * slots)
+
+    # --- 1. MASTER ---
+    def set_schema_ready(self):
+        _HEADER.pack_into(self._buf, 0, 1)
+
+    def free_slot(self):
+        for slot in range(self.slots):
+            if _MASTER.unpack_from(self._buf, _offset(slot))[1] == FREE:
+                return slot
+        raise RuntimeError("No free worker slot")
+
+    def reset(self, slot):
+        """Before fork: clear the worker part so a stale heartbeat can't make the new worker look ready."""
+        _WORKER.pack_into(self._buf, _offset(slot) + _MASTER.size, 0.0, 0, 0, 0, 0, 0)
+
+    def assign(self, slot, pid):
+        _MASTER.pack_into(self._buf, _offset(slot), pid, RUNNING, time.time())
+
+    def mark_stopping(self, slot):
+        pid, _, forked_at = _MASTER.unpack_from(self._buf, _offset(slot))
+        _MASTER.pack_into(self._buf, _offset(slot), pid, STOPPING, forked_at)
+
+    def release(self, slot):
+        _MASTER.pack_into(self._buf, _offset(slot), 0, FREE, 0.0)
+
+    # --- 2. WORKER ---
+    def beat(self, requests, rss_kb, pss_kb, generation, ready):
+        _WORKER.pack_into(self._buf, _offset(self.slot) + _MASTER.size, time.time(), requests, rss_kb, pss_kb, generation, int(ready))
+
+    # --- 3. READING ---
+    def schema_ready(self):
+        return _HEADER.unpack_from(self._buf, 0)[0] == 1
+
+    def read(self, slot):
+        pid, state, forked_at = _MASTER.unpack_from(self._buf, _offset(slot))
+        heartbeat, requests, rss_kb, pss_kb, generation, ready = _WORKER.unpack_from(self._buf, _offset(slot) + _MASTER.size)
+        return {
+            "slot": slot, "pid": pid, "state": state, "forked_at": forked_at, "heartbeat": heartbeat,
+            "requests": requests, "rss_kb": rss_kb, "pss_kb": pss_kb, "model_generation": generation,
+            "ready": bool(ready),
+        }
+
+    def status(self, info, now=None):
+        """
+        booting (no heartbeat yet) | warming (serving, startup steps not done) | ready |
+        stale (missed WORKER_TIMEOUT_SECONDS) | stopping.
+        """
+        now = time.time() if now is None else now
+        if info["state"] == STOPPING:
+            return "stopping"
+        if not info["heartbeat"]:
+            return "booting"
+        if now - info["heartbeat"] > settings.WORKER_TIMEOUT_SECONDS:
+            return "stale"
+        return "ready" if info["ready"] else "warming"
+
+    def snapshot(self):
+        now = time.time()
+        workers = []
+        for slot in range(self.slots):
+            info = self.read(slot)
+            if info["state"] == FREE:
+                continue
+            workers.append({
+                "slot": slot,
+                "pid": info["pid"],
+                "status": self.status(info, now),
+                "uptime_s": round(now - info["forked_at"], 1),
+                "heartbeat_age_s": round(now - info["heartbeat"], 2) if info["heartbeat"] else None,
+                "requests": info["requests"],
+                # PSS splits shared (copy-on-write) pages between the processes using them:
+                # the sum over workers is what they really cost together
+                "rss_mb": round(info["rss_kb"] / 1024, 1),
+                "pss_mb": round(info["pss_kb"] / 1024, 1),
+                "model_generation": info["model_generation"],
+            })
+        return {"master_pid": self.master_pid, "self_pid": os.getpid(), "schema_ready": self.schema_ready(), "workers": workers}
+
+# Set by scripts/serve.py before it forks; None under a plain `uvicorn app.main:app`
+board = None
+_heartbeat_task = None
+
+def memory_kb():
+    """(RSS, PSS) of this process in kB, from /proc (zeros where unavailable)."""
+    rss = pss = 0
+    try:
+        with open("/proc/self/smaps_rollup", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("Rss:"):
+                    rss = int(line.split()[1])
+                elif line.startswith("Pss:"):
+                    pss = int(line.split()[1])
+    except OSError:
+        pass
+    return rss, pss
+
+async def _heartbeat():
+    while True:
+        rss, pss = memory_kb()
+        board.beat(REQUESTS.total(), rss, pss, predictor.generation, readiness.ready)
+        # Faster while warming, so the master (rolling reload) sees "ready" promptly
+        await asyncio.sleep(settings.WORKER_HEARTBEAT_SECONDS if readiness.ready else 0.2)
+
+def start_heartbeat():
+    """Worker startup: heartbeat into this worker's slot (no-op outside scripts/serve.py)."""
+    global _heartbeat_task
+    if board is None or board.slot is None or _heartbeat_task is not None:
+        return
+    _heartbeat_task = asyncio.get_running_loop().create_task(_heartbeat())
+
+def local_snapshot():
+    """/health/workers without a launcher: just this process."""
+    rss, pss = memory_kb()
+    return {
+        "master_pid": None,
+        "self_pid": os.getpid(),
+        "schema_ready": readiness.steps.get("schema", {}).get("state") == "done",
+        "workers": [{
+            "slot": None,
+            "pid": os.getpid(),
+            "status": "ready" if readiness.ready else "warming",
+            "uptime_s": None,
+            "heartbeat_age_s": None,
+            "requests": REQUESTS.total(),
+            "rss_mb": round(rss / 1024, 1),
+            "pss_mb": round(pss / 1024, 1),
+            "model_generation": predictor.generation,
+        }],
+    }
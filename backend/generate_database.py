@@ -1,4 +1,3 @@
-import pandas as pd
 import random
 from datetime import datetime, timedelta
 
@@ -58,13 +57,12 @@ def add_noise(text):
     return final_text.lower() # Drivers mostly type lowercase
 
 # --- 4. GENERATION ENGINE ---
-data = []
-print("🚚 Generating REAL WORLD Punjab Logistics Data...")
-
-for _ in range(NUM_LOGS):
+def generate_log(start_date=START_DATE, log_time=None):
+    """One synthetic driver log (time-weighted category, template, noise); log_time defaults to a random moment."""
     # Time & Seasonality
-    random_days = random.randint(0, 30)
-    log_time = START_DATE + timedelta(days=random_days, hours=random.randint(0, 23), minutes=random.randint(0, 59))
+    if log_time is None:
+        random_days = random.randint(0, 30)
+        log_time = start_date + timedelta(days=random_days, hours=random.randint(0, 23), minutes=random.randint(0, 59))
     hour = log_time.hour
     
     # Select Category based on time (Night = Fog, Day = Traffic)
@@ -118,18 +116,27 @@ for _ in range(NUM_LOGS):
     # Apply the "Real World" Messiness
     final_message = add_noise(raw)
 
-    data.append({
+    return {
         "timestamp": log_time.strftime("%Y-%m-%d %H:%M:%S"),
         "location_reported": loc,
         "raw_message": final_message,
         "category_label": category,
         "severity_score": severity
-    })
+    }
+
+def generate_logs(num_logs=NUM_LOGS, start_date=START_DATE):
+    return [generate_log(start_date) for _ in range(num_logs)]
 
 # --- 5. EXPORT ---
-df = pd.DataFrame(data).sort_values(by="timestamp")
-df.to_csv("punjab_logistics_raw.csv", index=False)
+if __name__ == "__main__":
+    import pandas as pd  # Only the CSV export needs pandas; importers just want the generator
+
+    print("🚚 Generating REAL WORLD Punjab Logistics Data...")
+    data = generate_logs(NUM_LOGS)
+
+    df = pd.DataFrame(data).sort_values(by="timestamp")
+    df.to_csv("punjab_logistics_raw.csv", index=False)
 
-print(f"✅ Generated {NUM_LOGS} complex logs.")
-print("🔍 Preview (Notice the variations):")
-print(df[["category_label", "raw_message"]].head(10).to_string())
\ No newline at end of file
+    print(f"✅ Generated {NUM_LOGS} complex logs.")
+    print("🔍 Preview (Notice the variations):")
+    print(df[["category_label", "raw_message"]].head(10).to_string())
\ No newline at end of file
@@ -0,0 +1,55 @@
+import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services.nlp.cache import PredictionCache
+from app.services.nlp.predictor import IncidentPredictor
+
+# The prediction cache (PREDICT_CACHE_SIZE) must never change a result:
+#   python scripts/check_cache.py      exit 1 if cache on and cache off disagree on any message
+# Run it after changing normalize_text or the keyword rules. Punctuated, oddly cased and
+# oddly spaced variants are the ones that have gone wrong before.
+MESSAGES = [
+    "brake-fail truck on NH-44",
+    "brake fail truck on nh-44",
+    "pile-up at rajpura!!",
+    "Pile up at Rajpura",
+    "  ROAD CLEAR,   reaching on time. ",
+    "road clear, reaching on time.",
+    "accident near g.t. road, truck overturned",
+    "Truck fasa hai Khanna mandi\ttyre burst",
+    "zr vsblty nr amrtsr gt. dhnd bht hvy.",
+    "stuck at link road #5 -- need mechanic",
+]
+
+def make_predictor(cache_size):
+    predictor = IncidentPredictor()
+    predictor.cache = PredictionCache(cache_size, 0)
+    predictor.ensure_loaded()
+    return predictor
+
+def main():
+    cached, uncached = make_predictor(1024), make_predictor(0)
+    failures = 0
+    # Twice through the cached predictor: a miss, then a hit (possibly on another variant's entry)
+    for label, results in (
+        ("single", [cached.predict(text) for text in MESSAGES + MESSAGES]),
+        ("batch", cached.predict_batch(MESSAGES + MESSAGES)),
+    ):
+        expected = [uncached.predict(text) for text in MESSAGES] * 2
+        print(f"\n🔍 {label}")
+        for text, got, want in zip(MESSAGES + MESSAGES, results, expected):
+            ok = got == want
+            failures += not ok
+            print(f"   {'✅' if ok else '❌'} {got['priority']:<8} {got['location']:<20} {text!r}")
+            if not ok:
+                print(f"      cache off: {want}")
+
+    if failures:
+        print(f"\n❌ {failures} result(s) differ between cache on and cache off")
+        sys.exit(1)
+    print(f"\n✅ Cache on and cache off agree on all {len(MESSAGES)} messages")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import sys
+import os
+import argparse
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.config import settings
+from app.services.dedup import EventIndex, content_words, family_categories, similarity
+from app.services.nlp.predictor import predictor
+
+# Duplicate-report matching (app/services/dedup.py) against known pairs:
+#   python scripts/check_dedup.py                        exit 1 if any pair is decided wrongly
+#   python scripts/check_dedup.py --min-similarity 0.4   try another DEDUP_MIN_SIMILARITY
+# Run it after editing the lexicon's dedup_filler_words / dedup_synonyms or place names.
+# Both reports go through the predictor, so a pair is only merged when they resolve to the
+# same place and category family (model and rule labels differ for the same event).
+
+# The same event, as different drivers report it
+SAME_EVENT = [
+    ("truck stuck at Khanna mandi", "Truck fasa hai Khanna mandi"),
+    ("zero visibility near amritsar gate. dhund is very bad.", "zr vsblty nr amrtsr gt. dhnd bht hvy."),
+    ("oil tanker leak near rajpura toll", "tanker se oil leak ho raha hai rajpura toll pe"),
+    ("my canter stopped at rajpura toll. engine heat. need mechanic.", "canter khadi hai rajpura toll, engine garam, mechanic chahiye"),
+]
+
+# Different events at the same place: must stay separate incidents
+DIFFERENT_EVENTS = [
+    ("Fire at Khanna mandi godown", "Accident at Khanna mandi, truck overturned"),
+    ("bus takkar at rajpura toll", "oil tanker leak near rajpura toll"),
+    ("truck stuck at Khanna mandi", "bus stuck at Khanna mandi"),
+    ("cattle on road near nakodar. risk of accident.", "my trolley stopped at nakodar. tyre burst. need mechanic."),
+]
+
+def decide(first, second, min_similarity):
+    """
+    True when `second` merges into the open event created by `first`, on the same path as
+    /predict: classify both, look `second` up in the index, then the merge UPDATE's re-check.
+    """
+    created, reported = predictor.predict(first), predictor.predict(second)
+    if created["location"] == "Unknown" or reported["location"] == "Unknown":
+        return False
+    index = EventIndex(window_seconds=3600, min_similarity=min_similarity)
+    index.add(1, created["location"], created["category"], content_words(first))
+    match = index.match(reported["location"], reported["category"], content_words(second))
+    return match is not None and created["category"] in family_categories(reported["category"])
+
+def describe(text):
+    result = predictor.predict(text)
+    return f"{result['location']} / {result['category']}"
+
+def main():
+    parser = argparse.ArgumentParser(description="Check duplicate-report matching against known pairs")
+    parser.add_argument("--min-similarity", type=float, default=settings.DEDUP_MIN_SIMILARITY)
+    args = parser.parse_args()
+
+    failures = 0
+    for expected, pairs in ((True, SAME_EVENT), (False, DIFFERENT_EVENTS)):
+        print(f"\n{'🔁 Same event (must merge)' if expected else '🆕 Different events (must not merge)'}")
+        for first, second in pairs:
+            merged = decide(first, second, args.min_similarity)
+            score = similarity(content_words(first), content_words(second))
+            ok = merged == expected
+            failures += not ok
+            print(f"   {'✅' if ok else '❌'} {score:.2f}  {first!r} / {second!r}")
+            if not ok:
+                print(f"      classified as {describe(first)} | {describe(second)}")
+
+    if failures:
+        print(f"\n❌ {failures} pair(s) decided wrongly at min similarity {args.min_similarity:.2f}")
+        sys.exit(1)
+    print(f"\n✅ All {len(SAME_EVENT) + len(DIFFERENT_EVENTS)} pairs decided correctly at min similarity {args.min_similarity:.2f}")
+
+if __name__ == "__main__":
+    main()
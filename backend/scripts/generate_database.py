@@ -1,4 +1,3 @@
-import pandas as pd
 import random
 from datetime import datetime, timedelta
 
@@ -53,67 +52,62 @@ INCIDENT_TYPES = {
     ]
 }
 
-# --- 3. GENERATION LOGIC ---
-data = []
+# Seasonality Logic (Bias)
+# If it's Night (8 PM - 6 AM), higher chance of Smog/Cattle
+# If it's Day (8 AM - 6 PM), higher chance of Harvest Traffic/Protest
+# Keys: [Harvest, Smog, Protest, Rural, Clear]
+NIGHT_WEIGHTS = [0.1, 0.4, 0.05, 0.3, 0.15] # Night: High Fog/Rural risk
+DAY_WEIGHTS = [0.4, 0.05, 0.3, 0.1, 0.15] # Day: High Traffic/Protest risk
+
+# Assign Severity (for Ground Truth/Training)
+SEVERITY = {"clear": 0, "rural_hazard": 3, "harvest_traffic": 5, "smog_fog": 8, "protest_dharna": 10} # 10 = Critical blockage
+
+def pick_category(hour):
+    weights = NIGHT_WEIGHTS if 20 <= hour or hour <= 6 else DAY_WEIGHTS
+    return random.choices(list(INCIDENT_TYPES.keys()), weights=weights, k=1)[0]
 
-print("🚚 Starting Simulation: Punjab Logistics Engine...")
+# --- 3. GENERATION LOGIC ---
+def generate_log(log_time=None):
+    """One templated driver message; log_time defaults to a random moment in the window."""
+    if log_time is None:
+        # Random Timestamp within the window
+        random_days = random.randint(0, 30)
+        random_hours = random.randint(0, 23)
+        random_minutes = random.randint(0, 59)
+        log_time = START_DATE + timedelta(days=random_days, hours=random_hours, minutes=random_minutes)
 
-for _ in range(NUM_LOGS):
-    # Random Timestamp within the window
-    random_days = random.randint(0, 30)
-    random_hours = random.randint(0, 23)
-    random_minutes = random.randint(0, 59)
-    log_time = START_DATE + timedelta(days=random_days, hours=random_hours, minutes=random_minutes)
-    
-    # Seasonality Logic (Bias)
-    # If it's Night (8 PM - 6 AM), higher chance of Smog/Cattle
-    # If it's Day (8 AM - 6 PM), higher chance of Harvest Traffic/Protest
-    hour = log_time.hour
-    
-    weights = []
-    # Keys: [Harvest, Smog, Protest, Rural, Clear]
-    if 20 <= hour or hour <= 6:
-        weights = [0.1, 0.4, 0.05, 0.3, 0.15] # Night: High Fog/Rural risk
-    else:
-        weights = [0.4, 0.05, 0.3, 0.1, 0.15] # Day: High Traffic/Protest risk
+    category = pick_category(log_time.hour)
 
-    category = random.choices(list(INCIDENT_TYPES.keys()), weights=weights, k=1)[0]
-    
     # Pick a random template and inject noise (optional, keep simple for now)
     raw_text = random.choice(INCIDENT_TYPES[category])
     location = random.choice(LOCATIONS)
-    
-    # Assign Severity (for Ground Truth/Training)
-    if category == "clear":
-        severity = 0
-    elif category == "rural_hazard":
-        severity = 3
-    elif category == "harvest_traffic":
-        severity = 5
-    elif category == "smog_fog":
-        severity = 8
-    elif category == "protest_dharna":
-        severity = 10 # Critical blockage
 
-    entry = {
+    return {
         "timestamp": log_time.strftime("%Y-%m-%d %H:%M:%S"),
         "location_reported": location,
         "raw_message": raw_text, # The "Messy" Input
         "category_label": category, # The "Ground Truth" for ML
-        "severity_score": severity  # Impact score
+        "severity_score": SEVERITY[category]  # Impact score
     }
-    data.append(entry)
+
+def generate_logs(num_logs=NUM_LOGS):
+    return [generate_log() for _ in range(num_logs)]
 
 # --- 4. EXPORT ---
-df = pd.DataFrame(data)
-# Sort by time
-df = df.sort_values(by="timestamp")
+# Only when run: importers (scripts/loadtest.py) just want the templates and generator
+if __name__ == "__main__":
+    import pandas as pd
+
+    print("🚚 Starting Simulation: Punjab Logistics Engine...")
+    df = pd.DataFrame(generate_logs(NUM_LOGS))
+    # Sort by time
+    df = df.sort_values(by="timestamp")
 
-# Save to root directory
-output_file = "punjab_logistics_raw.csv"
-df.to_csv(output_file, index=False)
+    # Save to root directory
+    output_file = "punjab_logistics_raw.csv"
+    df.to_csv(output_file, index=False)
 
-print(f"✅ Generated {NUM_LOGS} logs.")
-print(f"📄 Saved to {output_file}")
-print("🔍 Preview of first 5 logs:")
-print(df[["timestamp", "location_reported", "raw_message"]].head().to_string())
\ No newline at end of file
+    print(f"✅ Generated {NUM_LOGS} logs.")
+    print(f"📄 Saved to {output_file}")
+    print("🔍 Preview of first 5 logs:")
+    print(df[["timestamp", "location_reported", "raw_message"]].head().to_string())
\ No newline at end of file
@@ -0,0 +1,79 @@
+import sys
+import os
+import re
+import argparse
+import subprocess
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+# Import-time budget of the API (new replicas must take traffic within ~1s):
+#   python scripts/import_report.py                  top modules by cumulative import time
+#   python scripts/import_report.py --budget 0.8     exit 1 when `import app.main` is slower
+# Also fails when a module that must stay lazy (numpy, sklearn, ...) is imported by the app
+# itself; those belong in the startup readiness step or first use (see app/services/readiness.py).
+
+BACKEND_DIR = os.path.join(os.path.dirname(__file__), '..')
+DEFAULT_LAZY = "numpy,sklearn,scipy,joblib,pandas,pyarrow"
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+def measure(module, runs):
+    """[(self µs, cumulative µs, depth, name)] of the fastest of `runs` fresh interpreters."""
+    best = None
+    for _ in range(runs):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=BACKEND_DIR, capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            sys.exit(f"❌ import {module} failed:\n{proc.stderr[-2000:]}")
+        rows = []
+        for line in proc.stderr.splitlines():
+            match = _LINE.match(line)
+            if match:
+                self_us, cumulative_us, indent, name = match.groups()
+                rows.append((int(self_us), int(cumulative_us), len(indent) // 2, name))
+        total = next((r[1] for r in reversed(rows) if r[3] == module), 0)
+        if best is None or total < best[0]:
+            best = (total, rows)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description="Report what `import app.main` costs and enforce a budget")
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--budget", type=float, default=1.0, help="Seconds allowed for the import (0 = report only)")
+    parser.add_argument("--lazy", default=DEFAULT_LAZY, help="Comma-separated packages the import must not load")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters; the fastest counts (warm disk cache)")
+    args = parser.parse_args()
+
+    # 1. Measure
+    total_us, rows = measure(args.module, args.runs)
+    print(f"⏱️ import {args.module}: {total_us / 1e6:.3f}s (fastest of {args.runs})")
+
+    # 2. What the module imports directly (cumulative: where to look) and the heaviest
+    # single modules (own time). Children are listed before their parent, one level deeper.
+    end = max(i for i, row in enumerate(rows) if row[3] == args.module and row[2] == 0)
+    start = max((i for i in range(end) if rows[i][2] == 0), default=-1) + 1
+    direct = [row for row in rows[start:end] if row[2] == 1]
+    print(f"\n📦 Top {args.top} direct imports of {args.module} by cumulative time")
+    for _, cumulative_us, _, name in sorted(direct, key=lambda row: -row[1])[:args.top]:
+        print(f"   {cumulative_us / 1000:8.1f} ms  {name}")
+    print(f"\n🔬 Top {args.top} modules by own time")
+    for self_us, _, _, name in sorted(rows, key=lambda row: -row[0])[:args.top]:
+        print(f"   {self_us / 1000:8.1f} ms  {name}")
+
+    # 3. Verdict
+    failures = []
+    imported = {name.split(".")[0] for _, _, _, name in rows}
+    eager = sorted(imported & {name.strip() for name in args.lazy.split(",") if name.strip()})
+    if eager:
+        failures.append(f"imported eagerly: {', '.join(eager)}")
+    if args.budget and total_us / 1e6 > args.budget:
+        failures.append(f"{total_us / 1e6:.3f}s is over the {args.budget:.2f}s budget")
+    if failures:
+        print(f"\n❌ {'; '.join(failures)}")
+        sys.exit(1)
+    print(f"\n✅ Within budget{f' ({args.budget:.2f}s)' if args.budget else ''}, nothing heavy imported eagerly")
+
+if __name__ == "__main__":
+    main()
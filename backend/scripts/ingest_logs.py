@@ -0,0 +1,191 @@
+"""
+Bulk-loads archived driver logs (CSV or JSONL, same shape as punjab_logistics_raw.csv)
+into the incidents table.
+
+    python scripts/ingest_logs.py archive_2024.csv
+    python scripts/ingest_logs.py archive.jsonl --workers 8 --chunk-size 20000
+
+The file is streamed in fixed-size chunks (constant memory). Each chunk is classified
+with ONE IncidentPredictor.predict_batch call and written with Postgres COPY. After
+every committed chunk the row offset goes to <file>.ckpt, so a re-run resumes where
+the last one stopped (use --restart to ignore it).
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from sqlalchemy.orm import Session
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.database import Base, engine
+from app.models import Incident
+from app.services import partitions, rollups, spatial
+from app.services.locations import location_index
+from app.services.nlp.predictor import predictor  # Loaded once (below, before forking); workers share it
+
+COPY_COLUMNS = ("text", "location", "category", "priority", "status", "timestamp", "lat", "lng")
+
+# --- 1. READERS (generators, never hold more than one row) ---
+def read_rows(path, fmt):
+    if fmt == "jsonl":
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    else:
+        with open(path, encoding="utf-8", newline="") as f:
+            yield from csv.DictReader(f)
+
+def read_chunks(path, fmt, chunk_size, skip):
+    rows = read_rows(path, fmt)
+    if skip:
+        # Consume without building anything; resume cost is a fast sequential read
+        for _ in islice(rows, skip):
+            pass
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+# --- 2. CHECKPOINT ---
+def load_checkpoint(path):
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f).get("offset", 0)
+    return 0
+
+def save_checkpoint(path, offset):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump({"offset": offset, "updated": time.strftime("%Y-%m-%d %H:%M:%S")}, f)
+    os.replace(tmp, path)  # Atomic: a crash never leaves a half-written checkpoint
+
+# --- 3. CLASSIFY + WRITE (runs in the main process or in a worker) ---
+def write_chunk(rows, text_field, time_field, status):
+    texts = [row.get(text_field) or "" for row in rows]
+    results = predictor.predict_batch(texts)
+
+    # Resolve points from the in-memory gazetteer (reloaded only when its version changes)
+    with Session(engine) as session:
+        location_index.refresh(session)
+    records = []
+    for text, res, row in zip(texts, results, rows):
+        lat, lng, _ = location_index.get(res["location"]) or (None, None, None)
+        # Parsed once: the incident row and its rollup bucket get the same UTC timestamp
+        timestamp = _parse_timestamp(row.get(time_field))
+        records.append((text, res["location"], res["category"], res["priority"], status, timestamp, lat, lng))
+
+    # Incidents + dashboard rollups commit together (one transaction per chunk)
+    rollup_rows = [(r[5], r[1], r[2], r[3]) for r in records]
+    # Archived logs can be months old: their monthly partitions must exist first
+    partitions.ensure_months(engine, [r[5] for r in records])
+    with engine.begin() as conn:
+        if engine.dialect.name == "postgresql":
+            _copy_records(conn, records)
+        else:
+            # Local stand-in (SQLite): no COPY, fall back to executemany
+            params = [dict(zip(COPY_COLUMNS, r)) for r in records]
+            conn.execute(Incident.__table__.insert(), params)
+        rollups.record(conn, rollup_rows)
+    return len(records)
+
+def _parse_timestamp(value):
+    # Incidents and rollup buckets are UTC: a missing timestamp is now (UTC), a naive one is
+    # taken as UTC, an offset one is converted (so floor_hour never lands on a half hour)
+    if not value:
+        return datetime.now(timezone.utc)
+    ts = datetime.fromisoformat(value)
+    return ts.replace(tzinfo=timezone.utc) if ts.tzinfo is None else ts.astimezone(timezone.utc)
+
+def _copy_records(conn, records):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for text, location, category, priority, status, timestamp, lat, lng in records:
+        # Timestamps are already UTC (never the server's 'now'), so they match the rollups.
+        # Empty lat/lng fields load as NULL (unknown location)
+        writer.writerow((text, location, category, priority, status, timestamp.isoformat(), lat, lng))
+    buf.seek(0)
+
+    # COPY on the DBAPI connection underneath `conn`, so it joins the same transaction
+    with conn.connection.dbapi_connection.cursor() as cur:
+        cur.copy_expert(f"COPY incidents ({', '.join(COPY_COLUMNS)}) FROM STDIN WITH (FORMAT csv)", buf)
+
+def _init_worker():
+    # Forked workers must not reuse the parent's pooled connections
+    engine.dispose(close=False)
+
+# --- 4. DRIVER ---
+def ingest(path, fmt, chunk_size, workers, text_field, time_field, status, restart):
+    ckpt_path = path + ".ckpt"
+    offset = 0 if restart else load_checkpoint(ckpt_path)
+    if offset:
+        print(f"⏩ Resuming {path} from row {offset:,}")
+
+    partitions.create_parent(engine)
+    Base.metadata.create_all(bind=engine)
+    spatial.ensure_schema(engine)
+    started = time.time()
+    done = 0
+
+    def report():
+        rate = done / max(time.time() - started, 1e-9)
+        print(f"   -> {offset:,} rows committed ({rate:,.0f} rows/s)")
+
+    chunks = read_chunks(path, fmt, chunk_size, offset)
+
+    if workers <= 1:
+        for chunk in chunks:
+            done += write_chunk(chunk, text_field, time_field, status)
+            offset += len(chunk)
+            save_checkpoint(ckpt_path, offset)
+            report()
+    else:
+        # Keep at most 2 chunks per worker in flight (bounded memory). Chunks may finish
+        # out of order; the checkpoint only advances over the contiguous finished prefix.
+        engine.dispose()
+        predictor.ensure_loaded()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            pending = []  # [(future, chunk_len)] in file order
+            for chunk in chunks:
+                pending.append((pool.submit(write_chunk, chunk, text_field, time_field, status), len(chunk)))
+                while len(pending) >= workers * 2 or (pending and pending[0][0].done()):
+                    future, size = pending.pop(0)
+                    done += future.result()
+                    offset += size
+                    save_checkpoint(ckpt_path, offset)
+                    report()
+            for future, size in pending:
+                done += future.result()
+                offset += size
+                save_checkpoint(ckpt_path, offset)
+                report()
+
+    elapsed = time.time() - started
+    print(f"✅ Ingested {done:,} logs in {elapsed:.1f}s ({done / max(elapsed, 1e-9):,.0f} rows/s)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream archived driver logs into the incidents table.")
+    parser.add_argument("path", help="CSV or JSONL file")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="Default: from the file extension")
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    parser.add_argument("--workers", type=int, default=1, help="Processes classifying/copying chunks in parallel")
+    parser.add_argument("--text-field", default="raw_message")
+    parser.add_argument("--time-field", default="timestamp")
+    parser.add_argument("--status", default="Closed", help="Status for historical incidents")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and start from row 0")
+    args = parser.parse_args()
+
+    fmt = args.format or ("jsonl" if args.path.endswith((".jsonl", ".ndjson")) else "csv")
+    print(f"🚚 Ingesting {args.path} ({fmt}, chunks of {args.chunk_size:,}, {args.workers} worker(s))...")
+    ingest(args.path, fmt, args.chunk_size, args.workers, args.text_field, args.time_field, args.status, args.restart)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,370 @@
+"""
+Fleet-scale load test: how many trucks can one backend serve. Open-loop asyncio clients
+replay a realistic driver message mix against /api/v1/predict and the dashboard's read
+endpoints at a Poisson arrival rate with harvest-season bursts, and report throughput,
+latency percentiles and error rates every few seconds (plus a JSON timeline).
+
+    python scripts/loadtest.py                                        # docker-compose stack on :8000
+    python scripts/loadtest.py --in-process --rate 50 --duration 30   # the app in this process
+    python scripts/loadtest.py --rate 200 --burst-every 60 --burst-seconds 15 --burst-x 4 --out load.json
+    python scripts/loadtest.py --mix predict=1 --rate 500             # write path only
+
+Messages come from generate_database.py (composed templates + add_noise) and
+scripts/generate_database.py (the hand-written INCIDENT_TYPES, noised with the same
+add_noise), each with its own day/night category weighting, driven by a simulated clock
+(--sim-start, --sim-speed simulated seconds per real second).
+
+Open loop: arrivals never wait for responses, so a slow server can't slow the offered
+load down and hide its own latency. Arrivals beyond --max-in-flight are counted as
+dropped, and "lag" shows how late the client itself started requests (if it grows, the
+load generator is the bottleneck: run several of them, and not --in-process).
+In-process mode shares one event loop and CPU between client and server: use it for
+regressions, not capacity numbers.
+WARNING: /predict stores incidents, point it at a scratch database.
+"""
+import argparse
+import asyncio
+import importlib.util
+import json
+import os
+import random
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+import httpx
+
+BACKEND_DIR = os.path.join(os.path.dirname(__file__), '..')
+sys.path.append(BACKEND_DIR)
+
+API = "/api/v1"
+# Ludhiana, when the gazetteer can't be read
+FALLBACK_POINT = (30.9010, 75.8573)
+DEFAULT_MIX = "predict=70,incidents=12,near=8,summary=5,locations=5"
+
+# --- 1. MESSAGE MIX ---
+def _load(name, path):
+    """Imports a generator by path: both files are called generate_database.py."""
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+composed = _load("composed_logs", os.path.join(BACKEND_DIR, "generate_database.py"))
+templated = _load("templated_logs", os.path.join(BACKEND_DIR, "scripts", "generate_database.py"))
+
+class MessageMix:
+    """Driver messages for the simulated time of day (night: fog/cattle, day: mandi traffic/protests)."""
+
+    def __init__(self, templated_share, sim_start, sim_speed):
+        self.templated_share = templated_share
+        self.sim_start = sim_start
+        self.sim_speed = sim_speed
+
+    def sim_time(self, elapsed):
+        return self.sim_start + timedelta(seconds=elapsed * self.sim_speed)
+
+    def message(self, elapsed):
+        log_time = self.sim_time(elapsed)
+        if random.random() < self.templated_share:
+            return composed.add_noise(templated.generate_log(log_time)["raw_message"])
+        return composed.generate_log(log_time=log_time)["raw_message"]
+
+# --- 2. REQUESTS ---
+# name -> (method, path, kwargs) for one request; reads look like the dashboard's
+def _predict(mix, elapsed, points):
+    return "POST", f"{API}/predict", {"json": {"raw_text": mix.message(elapsed)}}
+
+def _incidents(mix, elapsed, points):
+    params = {"limit": 50}
+    if random.random() < 0.3:
+        params["priority"] = random.choice(["Critical", "High"])
+    return "GET", f"{API}/incidents", {"params": params}
+
+def _near(mix, elapsed, points):
+    lat, lng = random.choice(points)
+    return "GET", f"{API}/incidents/near", {"params": {"lat": lat, "lng": lng, "radius_km": 10}}
+
+def _summary(mix, elapsed, points):
+    return "GET", f"{API}/stats/summary", {"params": {"hours": 24}}
+
+def _locations(mix, elapsed, points):
+    return "GET", f"{API}/locations", {}
+
+REQUESTS = {"predict": _predict, "incidents": _incidents, "near": _near, "summary": _summary, "locations": _locations}
+
+def parse_mix(spec):
+    weights = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in REQUESTS:
+            raise SystemExit(f"❌ Unknown request '{name}' in --mix (choose from {', '.join(REQUESTS)})")
+        weights[name] = float(weight or 1)
+    return weights
+
+# --- 3. ARRIVALS ---
+class Arrivals:
+    """
+    Poisson arrivals at `rate` per second, `burst_x` times that during the first
+    `burst_seconds` of every `burst_every` seconds (harvest-season spikes: mandi gates
+    open, every trolley reports at once). Non-homogeneous, sampled by thinning.
+    """
+
+    def __init__(self, rate, burst_every=0, burst_seconds=0, burst_x=1.0):
+        self.rate = rate
+        self.burst_every = burst_every
+        self.burst_seconds = burst_seconds
+        self.burst_x = burst_x
+        self.peak = rate * max(1.0, burst_x if burst_every and burst_seconds else 1.0)
+
+    def in_burst(self, t):
+        return bool(self.burst_every and self.burst_seconds) and t % self.burst_every < self.burst_seconds
+
+    def rate_at(self, t):
+        return self.rate * self.burst_x if self.in_burst(t) else self.rate
+
+    def next_after(self, t):
+        while True:
+            t += random.expovariate(self.peak)
+            if random.random() * self.peak <= self.rate_at(t):
+                return t
+
+# --- 4. STATS ---
+def percentiles(samples_ms):
+    if not samples_ms:
+        return {}
+    ordered = sorted(samples_ms)
+    pick = lambda q: round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 2)
+    return {"p50": pick(0.50), "p90": pick(0.90), "p95": pick(0.95), "p99": pick(0.99), "max": round(ordered[-1], 2)}
+
+class Window:
+    """Everything that finished (or was offered) during one reporting interval."""
+
+    def __init__(self):
+        self.offered = 0
+        self.dropped = 0
+        self.latencies = {}     # request name -> [ms] of 2xx responses
+        self.errors = {}        # request name -> Counter(status code / exception name)
+        self.lag_ms = 0.0
+        self.burst = False      # Some arrivals fell in a harvest spike
+
+    def ok(self, name, ms):
+        self.latencies.setdefault(name, []).append(ms)
+
+    def error(self, name, kind):
+        self.errors.setdefault(name, Counter())[kind] += 1
+
+    def merge(self, other):
+        self.offered += other.offered
+        self.dropped += other.dropped
+        self.lag_ms = max(self.lag_ms, other.lag_ms)
+        for name, samples in other.latencies.items():
+            self.latencies.setdefault(name, []).extend(samples)
+        for name, kinds in other.errors.items():
+            self.errors.setdefault(name, Counter()).update(kinds)
+
+    def summary(self, seconds):
+        names = sorted(set(self.latencies) | set(self.errors))
+        per_request = {}
+        for name in names:
+            ok = len(self.latencies.get(name, []))
+            failed = sum(self.errors.get(name, Counter()).values())
+            per_request[name] = {
+                "done": ok + failed,
+                "rps": round((ok + failed) / seconds, 2),
+                "error_rate": round(failed / (ok + failed), 4) if ok + failed else 0.0,
+                "latency_ms": percentiles(self.latencies.get(name, [])),
+                "errors": dict(self.errors.get(name, {})),
+            }
+        ok = sum(len(samples) for samples in self.latencies.values())
+        failed = sum(sum(kinds.values()) for kinds in self.errors.values())
+        return {
+            "seconds": round(seconds, 2),
+            "offered_rps": round(self.offered / seconds, 2),
+            "done_rps": round((ok + failed) / seconds, 2),
+            "error_rate": round(failed / (ok + failed), 4) if ok + failed else 0.0,
+            "dropped": self.dropped,
+            "max_lag_ms": round(self.lag_ms, 1),
+            "latency_ms": percentiles([ms for samples in self.latencies.values() for ms in samples]),
+            "requests": per_request,
+        }
+
+# --- 5. RUNNER ---
+class LoadTest:
+    def __init__(self, client, args):
+        self.client = client
+        self.args = args
+        self.arrivals = Arrivals(args.rate, args.burst_every, args.burst_seconds, args.burst_x)
+        self.mix = MessageMix(args.templated_share, args.sim_start, args.sim_speed)
+        weights = parse_mix(args.mix)
+        self.names, self.weights = list(weights), list(weights.values())
+        self.points = [FALLBACK_POINT]
+        self.window = Window()
+        self.total = Window()
+        self.timeline = []
+        self.in_flight = 0
+        self.started = self.interval_started = None
+
+    async def wait_ready(self):
+        """Polls /health/ready (servers without it count as ready) so warm-up isn't measured."""
+        deadline = time.monotonic() + self.args.ready_timeout
+        while True:
+            try:
+                response = await self.client.get(f"{API}/health/ready")
+                if response.status_code in (200, 404):
+                    break
+            except httpx.HTTPError:
+                pass
+            if time.monotonic() > deadline:
+                raise SystemExit(f"❌ Backend not ready after {self.args.ready_timeout:.0f}s")
+            await asyncio.sleep(0.5)
+        try:
+            locations = (await self.client.get(f"{API}/locations")).json()
+            self.points = [(loc["lat"], loc["lng"]) for loc in locations if loc.get("lat") is not None] or self.points
+        except (httpx.HTTPError, ValueError, TypeError, KeyError):
+            pass
+
+    async def one(self, name, elapsed):
+        method, path, kwargs = REQUESTS[name](self.mix, elapsed, self.points)
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, path, **kwargs)
+        except httpx.TimeoutException:
+            self.window.error(name, "timeout")
+        except httpx.HTTPError as e:
+            self.window.error(name, type(e).__name__)
+        except Exception as e:
+            # Anything else is still a failed request, never an unretrieved task exception
+            self.window.error(name, type(e).__name__)
+        else:
+            if response.status_code < 400:
+                self.window.ok(name, (time.perf_counter() - started) * 1000)
+            else:
+                self.window.error(name, str(response.status_code))
+        finally:
+            self.in_flight -= 1
+
+    async def report(self):
+        while True:
+            await asyncio.sleep(self.args.report_every)
+            self.flush()
+
+    def flush(self):
+        """Closes the current interval: one timeline entry + one printed line."""
+        now = time.perf_counter()
+        window, self.window = self.window, Window()
+        self.total.merge(window)
+        summary = window.summary(max(now - self.interval_started, 1e-9))
+        self.interval_started = now
+        elapsed = now - self.started
+        summary.update(t=round(elapsed, 1), sim_time=self.mix.sim_time(elapsed).strftime("%H:%M"),
+                       burst=window.burst, in_flight=self.in_flight)
+        self.timeline.append(summary)
+        latency = summary["latency_ms"]
+        print(f"{summary['t']:6.1f}s {summary['sim_time']}{' 🌾' if summary['burst'] else '   '}"
+              f" offered {summary['offered_rps']:7.1f}/s  done {summary['done_rps']:7.1f}/s"
+              f"  err {summary['error_rate']:6.2%}  p50 {latency.get('p50', 0):7.1f}"
+              f"  p95 {latency.get('p95', 0):7.1f}  p99 {latency.get('p99', 0):7.1f} ms"
+              f"  in-flight {self.in_flight:4d}  dropped {summary['dropped']}  lag {summary['max_lag_ms']:.0f}ms")
+
+    async def run(self):
+        await self.wait_ready()
+        loop = asyncio.get_running_loop()
+        tasks = set()
+        self.started = self.interval_started = time.perf_counter()
+        reporter = loop.create_task(self.report())
+        t = 0.0
+        while True:
+            t = self.arrivals.next_after(t)
+            if t >= self.args.duration:
+                break
+            delay = self.started + t - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self.window.lag_ms = max(self.window.lag_ms, -delay * 1000)
+            self.window.offered += 1
+            self.window.burst = self.window.burst or self.arrivals.in_burst(t)
+            if self.in_flight >= self.args.max_in_flight:
+                self.window.dropped += 1
+                continue
+            self.in_flight += 1
+            task = loop.create_task(self.one(random.choices(self.names, self.weights)[0], t))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.wait(tasks, timeout=self.args.timeout)
+        reporter.cancel()
+        if self.window.offered:
+            self.flush()
+        else:
+            # Only stragglers of the last interval: a line for them would show a bogus rate
+            self.total.merge(self.window)
+        return {"summary": self.total.summary(time.perf_counter() - self.started), "timeline": self.timeline}
+
+def print_summary(summary):
+    print(f"\n📊 {summary['seconds']:.0f}s: offered {summary['offered_rps']}/s, done {summary['done_rps']}/s, "
+          f"errors {summary['error_rate']:.2%}, dropped {summary['dropped']}, max client lag {summary['max_lag_ms']}ms")
+    print(f"   {'request':<10} {'done':>8} {'rps':>8} {'err':>7} {'p50':>8} {'p90':>8} {'p95':>8} {'p99':>8} {'max':>8}  (ms)")
+    for name, stats in summary["requests"].items():
+        latency = stats["latency_ms"]
+        print(f"   {name:<10} {stats['done']:>8} {stats['rps']:>8} {stats['error_rate']:>7.2%}"
+              + "".join(f" {latency.get(q, 0):>8}" for q in ("p50", "p90", "p95", "p99", "max")))
+        if stats["errors"]:
+            print(f"   {'':<10} errors: {', '.join(f'{kind} x{n}' for kind, n in stats['errors'].items())}")
+
+# --- 6. CLIENTS ---
+async def main_async(args):
+    limits = httpx.Limits(max_connections=args.connections, max_keepalive_connections=args.connections)
+    if not args.in_process:
+        async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits) as client:
+            return await LoadTest(client, args).run()
+
+    from app.main import app
+    await app.router.startup()  # ASGITransport doesn't run the app's startup hooks
+    try:
+        # Unhandled app exceptions come back as 500s (counted), not raised into the client
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=args.timeout, limits=limits) as client:
+            return await LoadTest(client, args).run()
+    finally:
+        await app.router.shutdown()
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay simulated driver traffic against the backend and report throughput/latency")
+    parser.add_argument("--url", default="http://localhost:8000", help="Backend base URL (docker-compose: the default)")
+    parser.add_argument("--in-process", action="store_true", help="Serve app.main inside this process instead (DATABASE_URL applies)")
+    parser.add_argument("--rate", type=float, default=20.0, help="Mean arrivals per second outside bursts")
+    parser.add_argument("--duration", type=float, default=60.0, help="Seconds of offered load")
+    parser.add_argument("--burst-every", type=float, default=0, help="Seconds between harvest spikes (0 = steady Poisson)")
+    parser.add_argument("--burst-seconds", type=float, default=10)
+    parser.add_argument("--burst-x", type=float, default=5.0, help="Rate multiplier during a spike")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Request weights (default {DEFAULT_MIX})")
+    parser.add_argument("--templated-share", type=float, default=0.3, help="Share of messages from scripts/generate_database.py templates")
+    parser.add_argument("--sim-start", type=datetime.fromisoformat, default=datetime(2025, 10, 15, 18, 0), help="Simulated clock at t=0 (day/night mix)")
+    parser.add_argument("--sim-speed", type=float, default=600.0, help="Simulated seconds per real second (600: a day in 2.4 minutes)")
+    parser.add_argument("--connections", type=int, default=200, help="HTTP keep-alive connection pool size")
+    parser.add_argument("--max-in-flight", type=int, default=2000, help="Outstanding requests before arrivals are dropped")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout (s)")
+    parser.add_argument("--ready-timeout", type=float, default=120.0, help="Max wait for /health/ready (s)")
+    parser.add_argument("--report-every", type=float, default=5.0, help="Seconds per timeline line")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--out", help="Write config, summary and timeline as JSON")
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    target = "in-process app" if args.in_process else args.url
+    burst = f", x{args.burst_x:g} for {args.burst_seconds:g}s every {args.burst_every:g}s" if args.burst_every else ""
+    print(f"🚛 Load test: {args.rate:g} req/s Poisson{burst} for {args.duration:g}s against {target} ({args.mix})")
+    results = asyncio.run(main_async(args))
+    print_summary(results["summary"])
+
+    if args.out:
+        config = {key: (value.isoformat() if isinstance(value, datetime) else value) for key, value in vars(args).items()}
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"config": config, **results}, f, indent=2)
+        print(f"📄 Saved to {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+import sys
+import os
+import time
+import argparse
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.config import settings
+from app.core.database import engine, add_missing_columns
+from app.models import Incident
+from app.services import migrations, partitions
+
+# Monthly upkeep of the partitioned `incidents` table (run from cron, e.g. nightly):
+#   1. create partitions for this month and PARTITION_PREMAKE_MONTHS ahead
+#   2. detach months older than PARTITION_RETENTION_MONTHS, export each to
+#      ARCHIVE_DIR/<YYYY-MM>.parquet, then drop it (GET /api/v1/archive/* reads them)
+# --migrate converts an existing unpartitioned table first (takes an exclusive lock).
+
+def main():
+    parser = argparse.ArgumentParser(description="Create, retire and archive monthly incident partitions")
+    parser.add_argument("--migrate", action="store_true", help="Convert an existing plain incidents table to partitions")
+    parser.add_argument("--keep-months", type=int, default=settings.PARTITION_RETENTION_MONTHS,
+                        help="Months kept in the database, current included (0 = keep everything)")
+    args = parser.parse_args()
+
+    started = time.time()
+    if args.migrate:
+        add_missing_columns(engine, Incident.__table__)
+        print("🔀 Converting incidents to monthly partitions...")
+        moved = partitions.migrate(engine)
+        print(f"✅ {moved:,} incidents moved into partitions")
+
+    # 1. Schema + upcoming months
+    migrations.migrate(engine)
+
+    # 2. Retention
+    archived = partitions.apply_retention(engine, keep_months=args.keep_months)
+    rows = sum(info["rows"] for info in archived)
+    print(f"✅ Archived {len(archived)} month(s), {rows:,} incidents in {time.time() - started:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+import sys
+import os
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.database import engine
+from app.services import migrations
+
+# One-time schema step of a deploy (e.g. a release job before the API starts):
+# creates/extends tables and indexes so API workers never run DDL themselves.
+# scripts/serve.py does the same in its master unless --no-migrate.
+
+def main():
+    started = time.time()
+    print("🛠️ Migrating database schema...")
+    migrations.migrate(engine)
+    print(f"✅ Schema up to date in {time.time() - started:.1f}s")
+
+if __name__ == "__main__":
+    main()
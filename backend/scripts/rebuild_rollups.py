@@ -0,0 +1,31 @@
+import sys
+import os
+import time
+import argparse
+from datetime import datetime, timedelta, timezone
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.database import engine, Base
+from app.services import partitions, rollups
+
+# Recomputes `incident_rollups` from `incidents`. The API and ingest keep rollups
+# current incrementally; run this after manual data fixes or to backfill.
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild hourly incident rollups")
+    parser.add_argument("--hours", type=int, default=None, help="Only rebuild the last N hours (default: everything)")
+    args = parser.parse_args()
+
+    partitions.create_parent(engine)
+    Base.metadata.create_all(bind=engine)
+    since = datetime.now(timezone.utc) - timedelta(hours=args.hours) if args.hours else None
+
+    print(f"🔄 Rebuilding rollups {'since ' + since.strftime('%Y-%m-%d %H:00 UTC') if since else 'from full history'}...")
+    started = time.time()
+    with engine.begin() as conn:
+        buckets = rollups.rebuild(conn, since)
+    print(f"✅ {buckets:,} rollup rows written in {time.time() - started:.1f}s")
+
+if __name__ == "__main__":
+    main()
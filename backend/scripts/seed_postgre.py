@@ -7,7 +7,8 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 from app.core.database import Base
 from app.core.config import settings
-from app.models import Location
+from app.models import GazetteerVersion, Location
+from app.services import partitions, spatial
 
 # --- 1. LOCATIONS TO INSERT ---
 LOCATIONS = {
@@ -57,7 +58,9 @@ def seed_data():
     SessionLocal = sessionmaker(bind=engine)
     session = SessionLocal()
 
+    partitions.create_parent(engine)
     Base.metadata.create_all(bind=engine)
+    partitions.ensure_upcoming(engine)
 
     # CLEAR OLD DATA to ensure Phagwara gets added
     print("🧹 Wiping old location data...")
@@ -81,9 +84,22 @@ def seed_data():
             new_locations.append(loc)
 
     session.add_all(new_locations)
+
+    # Bump the gazetteer version so running API workers reload their location index
+    version_row = session.get(GazetteerVersion, 1)
+    if version_row is None:
+        session.add(GazetteerVersion(id=1, version=1))
+    else:
+        version_row.version += 1
     session.commit()
     print(f"✅ Success! Added {len(new_locations)} locations.")
     session.close()
 
+    # Re-resolve stored incident points against the new coordinates
+    spatial.ensure_schema(engine)
+    with engine.begin() as conn:
+        updated = spatial.backfill_points(conn, only_missing=False)
+    print(f"📍 Updated coordinates on {updated:,} incidents.")
+
 if __name__ == "__main__":
     seed_data()
\ No newline at end of file
@@ -0,0 +1,305 @@
+import sys
+import os
+import gc
+import time
+import random
+import signal
+import socket
+import argparse
+import traceback
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+# The master's migration process does the schema once; workers must not repeat it
+os.environ["MIGRATE_ON_STARTUP"] = "false"
+
+import uvicorn
+from app.core.config import settings
+from app.core.database import engine
+from app.main import app
+from app.services import migrations, readiness, workers
+from app.services.nlp.predictor import predictor
+from app.services.stream import StreamRelay, hub
+
+# Production launcher (pre-fork):
+#   1. master: imports the app and loads lexicon + active model ONCE (disk only, no
+#      database); gc.freeze() keeps the collector from touching (= copying) those pages
+#   2. master: binds the socket and forks N workers that serve it (the kernel spreads
+#      connections) and share the preloaded pages copy-on-write. Workers answer
+#      /health/live at once and /health/ready when their startup steps are done
+#   3. master: forks one migration process that retries until the database is reachable,
+#      migrates once and flags the schema ready on the worker board (no wait_for_db step)
+#   4. master loop: replaces workers that exit or whose heartbeat goes stale, and relays
+#      live-stream events between workers (each SSE dashboard sees every worker's incidents)
+# Signals to the master:
+#   SIGHUP           graceful reload: refresh models/lexicon in the master, then replace the
+#                    workers one at a time (the new one is ready before the old one drains)
+#   SIGTERM/SIGINT   graceful stop (in-flight requests get WORKER_GRACEFUL_SECONDS)
+# Code changes need a restart of the master. GET /api/v1/health/workers shows every worker.
+
+BOOT_TIMEOUT_SECONDS = 120
+RESPAWN_DELAY_SECONDS = 1.0
+
+class Master:
+    def __init__(self, sock, count, log_level):
+        self.sock = sock
+        self.count = count
+        self.log_level = log_level
+        self.children = {}      # pid -> board slot
+        self.retiring = set()   # pids sent SIGTERM (stop / reload): not replaced when they exit
+        # Room for a full second set while a reload swaps workers
+        self.board = workers.board = workers.WorkerBoard(2 * count)
+        self.relay = StreamRelay(settings.STREAM_BACKLOG)
+        self.migrator = None    # pid of the migration process while it runs
+        self._stop = False
+        self._reload = False
+        self._last_crash = 0.0
+
+    # --- 1. WORKERS ---
+    def spawn(self):
+        slot = self.board.free_slot()
+        self.board.reset(slot)
+        master_end, worker_end = self.relay.pair()
+        pid = os.fork()
+        if pid == 0:
+            self.board.slot = slot
+            master_end.close()
+            self.relay.close_inherited()
+            hub.join_relay(worker_end, self.relay.backlog)
+            self._serve()
+        worker_end.close()
+        self.relay.attach(pid, master_end)
+        self.board.assign(slot, pid)
+        self.children[pid] = slot
+        return pid
+
+    def _serve(self):
+        """Worker process body; never returns."""
+        code = 0
+        try:
+            # Own process group: a Ctrl+C in the terminal reaches the master only, which then
+            # stops the workers once. uvicorn installs its own SIGTERM/SIGINT handlers.
+            os.setpgid(0, 0)
+            signal.signal(signal.SIGHUP, signal.SIG_IGN)
+            for sig in (signal.SIGTERM, signal.SIGINT):
+                signal.signal(sig, signal.SIG_DFL)
+            random.seed()  # Else every worker repeats the master's sequence (shadow sampling)
+            readiness.readiness.started_at = time.time()  # Readiness timings from fork, not master start
+            config = uvicorn.Config(app, log_level=self.log_level, timeout_graceful_shutdown=settings.WORKER_GRACEFUL_SECONDS)
+            uvicorn.Server(config).run(sockets=[self.sock])
+        except BaseException:
+            traceback.print_exc()
+            code = 1
+        finally:
+            os._exit(code)
+
+    def start_migration(self):
+        pid = os.fork()
+        if pid == 0:
+            self._migrate()
+        self.migrator = pid
+
+    def _migrate(self):
+        """Migration process body; never returns. Retries until the database accepts it."""
+        code = 0
+        self.relay.close_inherited()
+        try:
+            os.setpgid(0, 0)
+            signal.signal(signal.SIGHUP, signal.SIG_IGN)
+            for sig in (signal.SIGTERM, signal.SIGINT):
+                signal.signal(sig, signal.SIG_DFL)
+            started = time.time()
+            while True:
+                try:
+                    migrations.migrate(engine)
+                    break
+                except Exception as e:
+                    print(f"⏳ Migration not possible yet ({readiness.describe(e)}), retrying in {settings.READINESS_RETRY_SECONDS:.0f}s")
+                    time.sleep(settings.READINESS_RETRY_SECONDS)
+            print(f"🛠️ Schema up to date ({time.time() - started:.1f}s)")
+        except BaseException:
+            traceback.print_exc()
+            code = 1
+        finally:
+            os._exit(code)
+
+    def active(self):
+        return [pid for pid in self.children if pid not in self.retiring]
+
+    def terminate(self, pid):
+        if pid in self.retiring:
+            return
+        self.retiring.add(pid)
+        self.board.mark_stopping(self.children[pid])
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+
+    def reap(self):
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            if pid == self.migrator:
+                self.migrator = None
+                if os.WIFEXITED(status) and os.WEXITSTATUS(status) == 0:
+                    self.board.set_schema_ready()
+                elif not self._stop:
+                    print(f"⚠️ Migration process exited ({_describe(status)}), restarting it")
+                    self.start_migration()
+                continue
+            slot = self.children.pop(pid, None)
+            if slot is None:
+                continue
+            self.relay.detach(pid)
+            self.board.release(slot)
+            if pid in self.retiring:
+                self.retiring.discard(pid)
+            else:
+                self._last_crash = time.monotonic()
+                print(f"⚠️ Worker {pid} exited unexpectedly ({_describe(status)})")
+
+    def fill(self):
+        while len(self.active()) < self.count:
+            if time.monotonic() - self._last_crash < RESPAWN_DELAY_SECONDS:
+                return  # Don't spin if workers die right after boot
+            self.spawn()
+
+    def check_health(self):
+        """SIGKILLs (then replaces) workers whose event loop stopped heartbeating or never booted."""
+        now = time.time()
+        for pid in self.active():
+            info = self.board.read(self.children[pid])
+            status = self.board.status(info, now)
+            if status == "stale" or (status == "booting" and now - info["forked_at"] > BOOT_TIMEOUT_SECONDS):
+                since = info["heartbeat"] or info["forked_at"]
+                print(f"💀 Worker {pid} {status} (no heartbeat for {now - since:.0f}s), replacing it")
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+
+    # --- 2. RELOAD ---
+    def reload(self):
+        print("🔄 Reload: refreshing models in the master, then replacing workers one by one")
+        try:
+            predictor.refresh()
+        except Exception as e:
+            print(f"❌ Model refresh failed, workers restart with the current one: {e}")
+        gc.collect()
+        gc.freeze()
+        for old in self.active():
+            new = self.spawn()
+            if not self._wait_ready(new):
+                print(f"❌ Replacement worker {new} never became ready, reload aborted ({old} keeps serving)")
+                if new in self.children:
+                    self.terminate(new)
+                return
+            self.terminate(old)
+        print("✅ Reload complete")
+
+    def _wait_ready(self, pid):
+        deadline = time.monotonic() + BOOT_TIMEOUT_SECONDS
+        while time.monotonic() < deadline and not self._stop:
+            self.reap()
+            if pid not in self.children:
+                return False
+            if self.board.status(self.board.read(self.children[pid])) == "ready":
+                return True
+            self.relay.pump(0.1)
+        return False
+
+    # --- 3. MAIN LOOP ---
+    def run(self, migrate=True):
+        signal.signal(signal.SIGHUP, self._on_reload)
+        signal.signal(signal.SIGTERM, self._on_stop)
+        signal.signal(signal.SIGINT, self._on_stop)
+
+        host, port = self.sock.getsockname()[:2]
+        print(f"🚀 Master {os.getpid()} serving http://{host}:{port} with {self.count} workers")
+        if migrate:
+            self.start_migration()
+        else:
+            self.board.set_schema_ready()
+        while not self._stop:
+            self.reap()
+            if self._reload:
+                self._reload = False
+                self.reload()
+            self.check_health()
+            if not self._stop:
+                self.fill()
+            self.relay.pump(0.5)
+        self.shutdown()
+
+    def _on_reload(self, *_):
+        self._reload = True
+
+    def _on_stop(self, *_):
+        self._stop = True
+
+    def shutdown(self):
+        print(f"🛑 Stopping {len(self.children)} workers (up to {settings.WORKER_GRACEFUL_SECONDS:.0f}s for in-flight requests)")
+        for pid in list(self.children):
+            self.terminate(pid)
+        deadline = time.monotonic() + settings.WORKER_GRACEFUL_SECONDS + 5
+        while self.children and time.monotonic() < deadline:
+            self.reap()
+            self.relay.pump(0.1)  # Draining workers still publish (and would block on a full socket)
+        for pid in list(self.children):
+            print(f"⚠️ Worker {pid} still running, killing it")
+            try:
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+            except (ProcessLookupError, ChildProcessError):
+                pass
+        if self.migrator is not None:
+            try:
+                os.kill(self.migrator, signal.SIGKILL)
+                os.waitpid(self.migrator, 0)
+            except (ProcessLookupError, ChildProcessError):
+                pass
+        self.sock.close()
+        print("✅ All workers stopped")
+
+def _describe(status):
+    if os.WIFSIGNALED(status):
+        return f"signal {os.WTERMSIG(status)}"
+    return f"exit code {os.waitstatus_to_exitcode(status)}"
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the API from N pre-forked worker processes")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=settings.WEB_WORKERS, help="Worker processes (0 = one per CPU core)")
+    parser.add_argument("--no-migrate", action="store_true", help="Skip the schema step (run scripts/migrate.py before)")
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+    count = args.workers or os.cpu_count() or 1
+
+    # 1. Lexicon + model from disk (importing the app loaded neither); everything loaded so
+    # far stays shared: the collector skips it
+    predictor.ensure_loaded()
+    # No pooled DB connection may be shared by the forked processes
+    engine.dispose()
+    gc.collect()
+    gc.freeze()
+    print(f"📦 App and model {predictor.model_version} preloaded in the master")
+
+    # 2. One listening socket for all workers
+    family = socket.AF_INET6 if ":" in args.host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((args.host, args.port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+
+    # 3 + 4. Fork workers and the migration process, then supervise
+    Master(sock, count, args.log_level).run(migrate=not args.no_migrate)
+
+if __name__ == "__main__":
+    main()
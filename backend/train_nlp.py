@@ -2,6 +2,11 @@
 import pandas as pd
 import joblib
 import os
+import sys
+import json
+import argparse
+from collections import Counter
+from datetime import datetime
 from sklearn.model_selection import train_test_split
 from sklearn.feature_extraction.text import CountVectorizer, TfidfTransformer
 from sklearn.naive_bayes import MultinomialNB
@@ -14,6 +19,8 @@ DATA_FILE = "punjab_logistics_raw.csv"
 # FIX: Save to 'ml_models' to avoid conflict with database 'models.py'
 MODEL_DIR = "app/ml_models/punjab_logistics_v1" 
 MODEL_PATH = os.path.join(MODEL_DIR, "incident_classifier.pkl")
+# Flat numpy/JSON copy the API memory-maps without importing sklearn
+COMPACT_DIR = os.path.join(MODEL_DIR, "compact")
 
 def train_model():
     print("🧠 Starting AI Training Sequence...")
@@ -54,7 +61,159 @@ def train_model():
         
     joblib.dump(text_clf, MODEL_PATH)
     print(f"💾 Model saved to: {MODEL_PATH}")
+
+    # 7. Export the compact serving format
+    export_compact_model(text_clf)
     print("🚀 Ready for integration with Backend!")
 
+def export_compact_model(text_clf=None):
+    from app.services.nlp.compact import export_compact
+
+    if text_clf is None:
+        if not os.path.exists(MODEL_PATH):
+            print(f"❌ Error: {MODEL_PATH} not found. Train first.")
+            return
+        text_clf = joblib.load(MODEL_PATH)
+
+    export_compact(text_clf, COMPACT_DIR)
+    print(f"📦 Compact model exported to: {COMPACT_DIR}")
+
+# --- INCREMENTAL MODE (HashingVectorizer + partial_fit, constant memory) ---
+def _stream_csv(path, chunk_size):
+    """(texts, labels, None) per chunk; pandas reads the file chunk_size rows at a time."""
+    for chunk in pd.read_csv(path, chunksize=chunk_size, usecols=["raw_message", "category_label"]):
+        chunk = chunk.dropna()
+        yield list(chunk["raw_message"].astype(str)), list(chunk["category_label"].astype(str)), None
+
+# When a keyword rule fires (app/services/nlp/lexicon.json) the stored category is the
+# rule's, not the model's. These map one-to-one onto a model class; "Accident/Hazard"
+# (rural_hazard or vehicle_breakdown) and "Traffic Jam" (harvest_traffic or
+# protest_dharna) don't, and are skipped unless a dispatcher set a model class.
+RULE_CATEGORY_CLASSES = {
+    "weather/slow": "smog_fog",
+    "logistics update": "clear",
+}
+
+def _stream_confirmed(after, chunk_size, classes):
+    """Dispatcher-reviewed incidents (confirmed_at set) newer than the (confirmed_at, id) watermark."""
+    from sqlalchemy import literal, select, tuple_
+    from app.core.database import engine
+    from app.models import Incident
+
+    by_lower = {c.lower(): c for c in classes}
+    by_lower.update((rule, c) for rule, c in RULE_CATEGORY_CLASSES.items() if c in classes)
+    stmt = (
+        select(Incident.id, Incident.text, Incident.category, Incident.confirmed_at)
+        .where(Incident.confirmed_at.isnot(None))
+        .order_by(Incident.confirmed_at, Incident.id)
+    )
+    if after:
+        # Typed like the columns: SQLite compares an untyped datetime as differently formatted text
+        confirmed_at = literal(datetime.fromisoformat(after[0]), Incident.confirmed_at.type)
+        stmt = stmt.where(tuple_(Incident.confirmed_at, Incident.id) > tuple_(confirmed_at, literal(after[1], Incident.id.type)))
+
+    with engine.connect() as conn:
+        result = conn.execution_options(yield_per=chunk_size).execute(stmt)
+        for rows in result.partitions():
+            # Stored categories are title-cased model labels or rule categories; map both to
+            # model classes where possible (the rest is skipped and reported by the caller)
+            pairs = [(row.text or "", by_lower.get((row.category or "").lower(), row.category)) for row in rows]
+            last = rows[-1]
+            yield [t for t, _ in pairs], [y for _, y in pairs], [last.confirmed_at.isoformat(), last.id]
+
+def train_incremental(csv_path, from_db, chunk_size, fresh):
+    from app.services.nlp import incremental
+
+    print("🧠 Starting Incremental Training...")
+
+    # 1. Continue from the version being served (or start a new hashed model)
+    parent = None if fresh else incremental.current_version()
+    if parent:
+        pipeline, info = incremental.load_version(parent)
+        print(f"   -> Continuing from {info['version']} ({info['rows_seen']:,} rows seen)")
+    else:
+        pipeline, info = incremental.new_pipeline(), {"rows_seen": 0, "db_watermark": None}
+        print("   -> Starting a new hashed model")
+
+    # partial_fit needs the full label set on the first call; reuse the batch model's classes
+    if parent:
+        classes = list(pipeline.named_steps["clf"].classes_)
+    elif os.path.exists(os.path.join(COMPACT_DIR, "meta.json")):
+        with open(os.path.join(COMPACT_DIR, "meta.json"), encoding="utf-8") as f:
+            classes = json.load(f)["classes"]
+    else:
+        classes = sorted(pd.read_csv(DATA_FILE, usecols=["category_label"])["category_label"].dropna().unique())
+
+    score = {"seen": 0, "correct": 0}
+    rows, skipped = 0, Counter()
+    watermark = info.get("db_watermark")
+    known = set(classes)
+
+    # 2. Stream sources chunk by chunk
+    sources = []
+    if csv_path:
+        sources.append(("csv", _stream_csv(csv_path, chunk_size)))
+    if from_db:
+        sources.append(("db", _stream_confirmed(watermark, chunk_size, classes)))
+
+    for source, chunks in sources:
+        for texts, labels, mark in chunks:
+            watermark = mark or watermark
+            keep = [i for i, y in enumerate(labels) if y in known]
+            skipped.update(y for y in labels if y not in known)
+            if not keep:
+                continue
+            texts, labels = [texts[i] for i in keep], [labels[i] for i in keep]
+
+            # Test-then-train: score each chunk BEFORE learning it (an honest running accuracy)
+            if hasattr(pipeline.named_steps["clf"], "classes_"):
+                predictions = pipeline.predict(texts)
+                score["seen"] += len(labels)
+                score["correct"] += int(sum(p == y for p, y in zip(predictions, labels)))
+            incremental.partial_fit(pipeline, texts, labels, classes)
+            rows += len(labels)
+            print(f"   -> [{source}] {rows:,} rows learned")
+
+    if skipped:
+        print(f"⚠️ Skipped {sum(skipped.values()):,} rows whose label is not a model class (rule categories without one: see RULE_CATEGORY_CLASSES):")
+        for label, n in skipped.most_common():
+            print(f"   {n:8,}  {label}")
+
+    if rows == 0:
+        print("⚠️ No new training rows; nothing published.")
+        return
+
+    # 3. Publish a new version; running API workers hot-swap to it
+    accuracy = score["correct"] / score["seen"] if score["seen"] else None
+    if accuracy is not None:
+        print(f"✅ Progressive Accuracy (test-then-train): {accuracy:.2%}")
+    path = incremental.publish_version(pipeline, {
+        "parent": os.path.basename(parent) if parent else None,
+        "rows_seen": info["rows_seen"] + rows,
+        "rows_this_run": rows,
+        "skipped_unknown_labels": sum(skipped.values()),
+        "skipped_by_label": dict(skipped),
+        "progressive_accuracy": accuracy,
+        "db_watermark": watermark,
+        "sources": [source for source, _ in sources],
+    })
+    print(f"💾 Published {path} (now CURRENT)")
+
 if __name__ == "__main__":
-    train_model()
\ No newline at end of file
+    # `python train_nlp.py --export-only` re-exports the existing pickle without retraining
+    # `python train_nlp.py --incremental [--csv FILE] [--from-db] [--chunk-size N] [--fresh]`
+    if "--export-only" in sys.argv:
+        export_compact_model()
+    elif "--incremental" in sys.argv:
+        parser = argparse.ArgumentParser(description="Incremental (partial_fit) training")
+        parser.add_argument("--incremental", action="store_true")
+        parser.add_argument("--csv", default=None, help="Labelled CSV (raw_message, category_label) to stream")
+        parser.add_argument("--from-db", action="store_true", help="Learn dispatcher-confirmed incidents since the last run")
+        parser.add_argument("--chunk-size", type=int, default=50000)
+        parser.add_argument("--fresh", action="store_true", help="Ignore the current version and start over")
+        args = parser.parse_args()
+        if not args.csv and not args.from_db:
+            parser.error("give --csv FILE and/or --from-db")
+        train_incremental(args.csv, args.from_db, args.chunk_size, args.fresh)
+    else:
+        train_model()
\ No newline at end of file
@@ -3,7 +3,7 @@ import { AppShell, Group, ThemeIcon, ActionIcon, Modal, Table, ScrollArea, Text,
 import { useDisclosure } from '@mantine/hooks';
 import { IconCpu, IconSettings, IconInfoCircle, IconDatabase, IconServer, IconMap, IconBrandPython, IconBrandReact, IconContainer } from '@tabler/icons-react';
 
-import { fetchLocations, fetchIncidents, analyzeLog } from './services/api';
+import { fetchLocations, fetchIncidents, analyzeLog, subscribeIncidents } from './services/api';
 import LogisticsMap from './components/Map/LogisticsMap';
 import ControlPanel from './components/Dashboard/ControlPanel';
 import './index.css';
@@ -21,9 +21,34 @@ export default function App() {
   
   const [opened, { open, close }] = useDisclosure(false);
 
+  const toFeedEntry = (data, geo) => ({
+    id: data.id,
+    position: geo,
+    locationName: data.location || "Unknown Area",
+    category: data.category || "General",
+    priority: data.priority || "Low",
+    text: data.text,
+    report_count: data.report_count || 1,
+    time: new Date().toLocaleTimeString([], {hour: '2-digit', minute:'2-digit'})
+  });
+
+  // Known ids are updated in place: our own /predict result also arrives on the stream,
+  // and a duplicate report re-sends its event with a higher report_count
+  const addToFeed = (entry) => setScanHistory(prev => prev.some(e => e.id === entry.id)
+    ? prev.map(e => e.id === entry.id ? { ...e, report_count: Math.max(e.report_count || 1, entry.report_count) } : e)
+    : [entry, ...prev]);
+
   useEffect(() => {
+    const loadFeed = () => fetchIncidents().then(data => setScanHistory(Array.isArray(data) ? data : []));
     fetchLocations().then(data => setDbLocations(Array.isArray(data) ? data : []));
-    fetchIncidents().then(data => setScanHistory(Array.isArray(data) ? data : []));
+    loadFeed();
+
+    // Live push instead of refetching the whole list
+    const unsubscribe = subscribeIncidents(
+      ({ incident, geo_target }) => addToFeed(toFeedEntry(incident, geo_target || PUNJAB_CENTER)),
+      loadFeed
+    );
+    return unsubscribe;
   }, []);
 
   const handleAnalyze = async (textOverride = null) => {
@@ -41,16 +66,7 @@ export default function App() {
             setSearchResult({ coords: geo, label: data.location });
             setActiveCoords(geo);
             
-            const newEntry = {
-                id: Date.now(),
-                position: geo,
-                locationName: data.location || "Unknown Area",
-                category: data.category || "General",
-                priority: data.priority || "Low",
-                text: textToAnalyze,
-                time: new Date().toLocaleTimeString([], {hour: '2-digit', minute:'2-digit'})
-            };
-            setScanHistory(prev => [newEntry, ...prev]);
+            addToFeed(toFeedEntry({ ...data, text: textToAnalyze }, geo));
 
             setLoading(false);
             if(!textOverride) setInputText("");
@@ -220,6 +220,7 @@ export default function ControlPanel({
                               color={item.priority.includes("Critical") ? "red" : item.priority.includes("High") ? "orange" : item.priority.includes("Medium") ? "yellow" : "green"}
                           >
                               <Text c="dark" size="xs" fw={700} tt="uppercase">{item.locationName}</Text>
+                              {item.report_count > 1 && <Text c="dimmed" size="xs" fw={600}>{item.report_count} reports</Text>}
                               <Text c="dimmed" size="xs" lh={1.3}>{item.text}</Text>
                           </Timeline.Item>
                       ))}
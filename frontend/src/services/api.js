@@ -15,13 +15,32 @@ export const analyzeLog = async (text) => {
     });
 
     if (!response.ok) throw new Error("AI Service Failed");
-    return await response.json();
+    const result = await response.json();
+    // 202: the backend queued the report (PREDICT_MODE=queue), follow the ticket
+    if (response.status === 202) return await waitForTicket(result.status_url);
+    return result;
   } catch (error) {
     console.error("Error analyzing log:", error);
     return null;
   }
 };
 
+/**
+ * Polls a queued report's ticket until it is stored: { incident, geo_target } or null.
+ */
+export const waitForTicket = async (statusUrl, { intervalMs = 250, timeoutMs = 15000 } = {}) => {
+  const deadline = Date.now() + timeoutMs;
+  while (Date.now() < deadline) {
+    const response = await fetch(statusUrl);
+    if (!response.ok) return null;
+    const status = await response.json();
+    if (status.status === "done") return status;
+    if (status.status === "failed") return null;
+    await new Promise((resolve) => setTimeout(resolve, intervalMs));
+  }
+  return null;  // Still queued: it will arrive on the live stream
+};
+
 /**
  * Fetches all map locations (Hubs, Mandis) to populate the map.
  */
@@ -37,15 +56,114 @@ export const fetchLocations = async () => {
 };
 
 /**
- * Fetches the history of recent incidents for the dashboard feed.
+ * Fetches one page of recent incidents (newest first) for the dashboard feed.
+ * @param {object} params - e.g. { limit: 100, priority: "Critical", cursor: "<next_cursor>" }
  */
-export const fetchIncidents = async () => {
+export const fetchIncidents = async (params = {}) => {
   try {
-    const response = await fetch(`${API_BASE_URL}/incidents`);
+    const query = new URLSearchParams({ limit: 100, include_text: true, ...params });
+    const response = await fetch(`${API_BASE_URL}/incidents?${query}`);
     if (!response.ok) throw new Error("Failed to load history");
-    return await response.json();
+    const page = await response.json();
+    return page.items;
   } catch (error) {
     console.error("Error fetching incidents:", error);
     return [];
   }
-};
\ No newline at end of file
+};
+
+/**
+ * Fetches precomputed dashboard aggregates.
+ * @param {string} kind - 'summary', 'heatmap' or 'timeseries'
+ * @param {object} params - hours | since/until, location, category, priority
+ */
+export const fetchStats = async (kind = "summary", params = {}) => {
+  try {
+    const query = new URLSearchParams(params);
+    const response = await fetch(`${API_BASE_URL}/stats/${kind}?${query}`);
+    if (!response.ok) throw new Error("Failed to load stats");
+    return await response.json();
+  } catch (error) {
+    console.error("Error fetching stats:", error);
+    return null;
+  }
+};
+
+/**
+ * Incidents within radiusKm of a point, closest first (each item has distance_km).
+ */
+export const fetchIncidentsNear = async (lat, lng, radiusKm = 5, params = {}) => {
+  try {
+    const query = new URLSearchParams({ lat, lng, radius_km: radiusKm, ...params });
+    const response = await fetch(`${API_BASE_URL}/incidents/near?${query}`);
+    if (!response.ok) throw new Error("Failed to load nearby incidents");
+    return (await response.json()).items;
+  } catch (error) {
+    console.error("Error fetching nearby incidents:", error);
+    return [];
+  }
+};
+
+/**
+ * Incidents inside the current map viewport.
+ * @param {L.LatLngBounds} bounds - e.g. map.getBounds() from react-leaflet
+ */
+export const fetchIncidentsInView = async (bounds, params = {}) => {
+  try {
+    const query = new URLSearchParams({
+      min_lat: bounds.getSouth(), min_lng: bounds.getWest(),
+      max_lat: bounds.getNorth(), max_lng: bounds.getEast(),
+      ...params,
+    });
+    const response = await fetch(`${API_BASE_URL}/incidents/bbox?${query}`);
+    if (!response.ok) throw new Error("Failed to load incidents in view");
+    return (await response.json()).items;
+  } catch (error) {
+    console.error("Error fetching incidents in view:", error);
+    return [];
+  }
+};
+
+/**
+ * Closest hubs/mandis to a point (type: comma-separated location types).
+ */
+export const fetchNearestNodes = async (lat, lng, k = 1, type = "Hub,Mandi") => {
+  try {
+    const query = new URLSearchParams({ lat, lng, k, type });
+    const response = await fetch(`${API_BASE_URL}/locations/nearest?${query}`);
+    if (!response.ok) throw new Error("Failed to find nearest node");
+    return (await response.json()).items;
+  } catch (error) {
+    console.error("Error finding nearest node:", error);
+    return [];
+  }
+};
+
+/**
+ * k best routes between two nodes, ranked by ETA including delays from open incidents.
+ */
+export const fetchRoutes = async (source, target, k = 3) => {
+  try {
+    const query = new URLSearchParams({ source, target, k });
+    const response = await fetch(`${API_BASE_URL}/routes?${query}`);
+    if (!response.ok) throw new Error("Failed to compute routes");
+    return (await response.json()).routes;
+  } catch (error) {
+    console.error("Error fetching routes:", error);
+    return [];
+  }
+};
+
+/**
+ * Subscribes to the live incident stream (Server-Sent Events).
+ * EventSource reconnects on its own and resumes from the last event id.
+ * @param {function} onIncident - called with { incident, geo_target } for each new incident
+ * @param {function} onReset - called when the server can't resume (refetch the feed)
+ * @returns {function} unsubscribe
+ */
+export const subscribeIncidents = (onIncident, onReset = () => {}) => {
+  const source = new EventSource(`${API_BASE_URL}/incidents/stream`);
+  source.addEventListener("incident", (event) => onIncident(JSON.parse(event.data)));
+  source.addEventListener("reset", () => onReset());
+  return () => source.close();
+};